@@ -0,0 +1,52 @@
+"""Queries and time of the blood pressure analysis, per column versus single statement.
+
+    python -m benchmarks.bench_analytics --readings 100000
+"""
+
+import argparse
+import time
+
+from benchmarks.common import QueryCounter, seeded_session
+from models.enumerations import Operation
+from models.models import CardiovascularParameter
+from routes.calc.cache import analytics_cache
+from routes.calc.calculation import analize_columns, operation
+
+COLUMNS = [CardiovascularParameter.systolic, CardiovascularParameter.diastolic, CardiovascularParameter.heart_rate]
+
+
+def per_column(db):
+    """What /analize/blood_pressure did before: three queries for each of the three columns"""
+    for column in COLUMNS:
+        for selected in (Operation.minimum, Operation.maximum, Operation.mean):
+            operation("patient0", db, selected, column, CardiovascularParameter)
+
+
+def single_statement(db):
+    analize_columns("patient0", db, COLUMNS, CardiovascularParameter)
+
+
+def measure(function, db, counter, repeat: int) -> tuple[int, float]:
+    counter.count = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        analytics_cache.clear()
+        function(db)
+    return counter.count // repeat, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readings", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    db = seeded_session(args.readings)
+    counter = QueryCounter(db.get_bind())
+    for name, function in (("per column", per_column), ("single statement", single_statement)):
+        queries, seconds = measure(function, db, counter, args.repeat)
+        print(f"{name:<18} {queries:>3} queries  {seconds * 1000:8.2f} ms/request")
+
+
+if __name__ == "__main__":
+    main()
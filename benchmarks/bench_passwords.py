@@ -0,0 +1,49 @@
+"""Micro-benchmark of the password pool.
+
+Simulates a login burst: every client verifies a password against the same
+bcrypt hash through the pool, awaiting it on one event loop as the /token
+endpoint does, and the script reports logins/sec in total and per core.
+
+    python -m benchmarks.bench_passwords --logins 200 --rounds 12
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from security.passwords import PasswordPool
+
+
+async def burst(pool: PasswordPool, hashed: str, logins: int) -> list[bool]:
+    return await asyncio.gather(*(pool.verify("jH3.*3tH2nAs_p", hashed) for _ in range(logins)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    cores = os.cpu_count() or 1
+
+    # The queue is as large as the burst so no login gets rejected.
+    pool = PasswordPool(workers=args.workers, queue_depth=args.logins, rounds=args.rounds)
+    hashed = asyncio.run(pool.hash("jH3.*3tH2nAs_p"))
+
+    start = time.perf_counter()
+    results = asyncio.run(burst(pool, hashed, args.logins))
+    elapsed = time.perf_counter() - start
+
+    assert all(results)
+    logins_per_second = args.logins / elapsed
+    print(f"bcrypt rounds:     {args.rounds}")
+    print(f"workers:           {args.workers}")
+    print(f"cores:             {cores}")
+    print(f"logins:            {args.logins} in {elapsed:.2f}s")
+    print(f"logins/sec:        {logins_per_second:.1f}")
+    print(f"logins/sec/core:   {logins_per_second / cores:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Time of the extended blood sugar and blood pressure analysis, ORM objects plus
+the statistics module versus packed columns and NumPy.
+
+    python -m benchmarks.bench_vectorized --readings 1000000
+"""
+
+import argparse
+import statistics
+import time
+
+from sqlalchemy import select
+
+from benchmarks.common import seeded_session
+from models.models import BloodSugarLevel, CardiovascularParameter
+from routes.calc.cache import analytics_cache
+from routes.calc.vectorized import blood_pressure_extended, blood_sugar_extended
+
+
+def per_object(db):
+    """Loading the ORM objects and computing the same metrics in pure Python"""
+    sugar = [row.value for row in db.scalars(select(BloodSugarLevel).where(BloodSugarLevel.patient_id == "patient0"))]
+    statistics.quantiles(sugar, n=4)
+    statistics.pstdev(sugar)
+    sum(3.9 <= value <= 10.0 for value in sugar)
+    pressure = db.scalars(select(CardiovascularParameter).where(CardiovascularParameter.patient_id == "patient0")).all()
+    for name in ("systolic", "diastolic", "heart_rate"):
+        values = [getattr(row, name) for row in pressure if getattr(row, name) is not None]
+        statistics.quantiles(values, n=4)
+        statistics.pstdev(values)
+    sum(row.systolic >= 140 or row.diastolic >= 90 for row in pressure)
+
+
+def vectorized(db):
+    blood_sugar_extended(db, "patient0")
+    blood_pressure_extended(db, "patient0")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readings", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    db = seeded_session(args.readings)
+    for name, function in (("orm objects", per_object), ("numpy", vectorized)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            analytics_cache.clear()
+            function(db)
+            db.expunge_all()
+        print(f"{name:<12} {(time.perf_counter() - start) / args.repeat * 1000:10.2f} ms/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Helpers shared by the benchmarks: an in-memory SQLite database with synthetic readings."""
+
+import os
+import random
+from datetime import datetime, timedelta
+
+# The application modules read their configuration when imported
+os.environ.setdefault("DATABASE_TYPE", "sqlite")
+os.environ.setdefault("BD", ":memory:")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+from sqlalchemy import create_engine, event, insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from cruds.patient_search import search_columns  # noqa: E402
+from cruds.patient_stats import recompute_stats  # noqa: E402
+from cruds.summaries import refresh_patient_days  # noqa: E402
+from database.database import Base  # noqa: E402
+from models.models import BloodSugarLevel, CardiovascularParameter, Doctor, Patient  # noqa: E402
+
+
+class QueryCounter:
+    """Counts the statements sent to the database"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self.increment)
+
+    def increment(self, *args):
+        self.count += 1
+
+
+def seeded_session(readings: int, patients: int = 1, seed: int = 0) -> Session:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = Session(engine)
+    db.add(Doctor(id="doctor", first_name="Doctor", password="-"))
+    db.add_all(
+        Patient(id=f"patient{p}", first_name=f"Patient {p}", password="-", **search_columns(f"Patient {p}", None))
+        for p in range(patients)
+    )
+    db.flush()
+
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    pressure, sugar = [], []
+    for index in range(readings):
+        patient_id = f"patient{index % patients}"
+        date = start + timedelta(minutes=15 * index)
+        pressure.append(
+            {
+                "date": date,
+                "systolic": rng.randint(95, 180),
+                "diastolic": rng.randint(55, 110),
+                "heart_rate": rng.randint(50, 120),
+                "patient_id": patient_id,
+                "doctor_id": "doctor",
+            }
+        )
+        sugar.append({"date": date, "value": round(rng.uniform(3.0, 14.0), 1), "patient_id": patient_id, "doctor_id": "doctor"})
+    db.execute(insert(CardiovascularParameter), pressure)
+    db.execute(insert(BloodSugarLevel), sugar)
+    for p in range(patients):
+        for model in (CardiovascularParameter, BloodSugarLevel):
+            refresh_patient_days(db, model, f"patient{p}")
+            recompute_stats(db, model, f"patient{p}")
+    db.commit()
+    return db
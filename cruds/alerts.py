@@ -0,0 +1,188 @@
+# Alerts of the measurements over the thresholds, evaluated when they are written
+from datetime import datetime
+
+from sqlalchemy import and_, delete, false, func, insert, literal, or_, select, tuple_, update
+from sqlalchemy.orm import Session, aliased
+
+from models.models import Alert, AlertThreshold, BloodSugarLevel, CardiovascularParameter, Patient, doctor_patient
+
+# Readings at or above any of these values raise an alert, unless the doctor configured
+# other thresholds (AlertThreshold, routes/doctor_scope/thresholds.py)
+CARDIOVASCULAR_THRESHOLDS = {"systolic": 120, "diastolic": 80, "heart_rate": 100}
+BLOOD_SUGAR_THRESHOLDS = {"value": 6.1}
+THRESHOLDS = {CardiovascularParameter: CARDIOVASCULAR_THRESHOLDS, BloodSugarLevel: BLOOD_SUGAR_THRESHOLDS}
+
+ALERT_COLUMNS = ["doctor_id", "patient_id", "measure", "measurement_id", "date"]
+
+
+def alerts_source(model_db):
+    """Readings over the thresholds with each doctor of their patient, in the order of ALERT_COLUMNS.
+
+    The measurements are joined with doctor_patient and with the doctor's thresholds
+    twice, the patient override and the doctor profile; every limit is the first
+    of override, profile and default that is not null. The whole evaluation is this
+    one set-based statement, whatever the number of patients.
+    """
+    override = aliased(AlertThreshold)
+    profile = aliased(AlertThreshold)
+    breach = or_(
+        *[
+            getattr(model_db, field) >= func.coalesce(getattr(override, field), getattr(profile, field), limit)
+            for field, limit in THRESHOLDS[model_db].items()
+        ]
+    )
+    return (
+        select(
+            doctor_patient.c.doctor_id,
+            model_db.patient_id,
+            literal(model_db.__tablename__),
+            model_db.id,
+            model_db.date,
+        )
+        .join(doctor_patient, doctor_patient.c.patient_id == model_db.patient_id)
+        .outerjoin(
+            override,
+            and_(override.doctor_id == doctor_patient.c.doctor_id, override.patient_id == model_db.patient_id),
+        )
+        .outerjoin(profile, and_(profile.doctor_id == doctor_patient.c.doctor_id, profile.patient_id.is_(None)))
+        .where(breach)
+    )
+
+
+def already_alerted(model_db):
+    """Whether the doctor of the source row keeps an alert of the measurement (once the
+    unacknowledged ones were deleted, an acknowledged one)"""
+    kept = aliased(Alert)
+    return (
+        select(kept.id)
+        .where(
+            kept.doctor_id == doctor_patient.c.doctor_id,
+            kept.measure == model_db.__tablename__,
+            kept.measurement_id == model_db.id,
+        )
+        .exists()
+    )
+
+
+def evaluate_alerts(db: Session, model_db, keys: list[tuple]):
+    """Records the alerts of the measurements with these (patient_id, date). It does not commit.
+
+    Measurements whose alert the doctor already acknowledged are not raised again.
+    """
+    keys = {(patient_id, date) for patient_id, date in keys if patient_id is not None and date is not None}
+    if not keys:
+        return
+    source = alerts_source(model_db).where(
+        tuple_(model_db.patient_id, model_db.date).in_(keys), ~already_alerted(model_db)
+    )
+    db.execute(insert(Alert).from_select(ALERT_COLUMNS, source))
+
+
+def reevaluate_alerts(db: Session, doctor_id: str, since: datetime) -> int:
+    """Evaluates again all the readings of the doctor's patients since `since`, after the
+    thresholds changed. Returns the number of unacknowledged alerts.
+
+    The unacknowledged alerts of the period are replaced; acknowledged readings are not
+    raised again. One DELETE and one INSERT ... SELECT per measure.
+    """
+    db.execute(
+        delete(Alert)
+        .where(Alert.doctor_id == doctor_id, Alert.acknowledged == false(), Alert.date >= since)
+        .execution_options(synchronize_session=False)
+    )
+    for model_db in THRESHOLDS:
+        source = alerts_source(model_db).where(
+            doctor_patient.c.doctor_id == doctor_id, model_db.date >= since, ~already_alerted(model_db)
+        )
+        db.execute(insert(Alert).from_select(ALERT_COLUMNS, source))
+    count = db.scalar(
+        select(func.count()).where(Alert.doctor_id == doctor_id, Alert.acknowledged == false(), Alert.date >= since)
+    )
+    db.commit()
+    return count
+
+
+def delete_alerts(db: Session, model_db, keys: list[tuple] | None = None, patient_id: str | None = None):
+    """Deletes the alerts of all of a patient's measurements, or those of the measurements
+    with these (patient_id, date) before evaluating them again.
+
+    With keys the acknowledged alerts are kept while their measurement exists, so an
+    edit does not bring back an alert the doctor already dealt with.
+    """
+    stmt = delete(Alert).where(Alert.measure == model_db.__tablename__)
+    if patient_id is not None:
+        stmt = stmt.where(Alert.patient_id == patient_id)
+    else:
+        keys = {(patient_id, date) for patient_id, date in keys if patient_id is not None and date is not None}
+        if not keys:
+            return
+        measurement = select(model_db.id).where(model_db.id == Alert.measurement_id).exists()
+        stmt = stmt.where(
+            tuple_(Alert.patient_id, Alert.date).in_(keys), or_(Alert.acknowledged == false(), ~measurement)
+        )
+    db.execute(stmt.execution_options(synchronize_session=False))
+
+
+def alerts_stmt(
+    model_db,
+    columns: list,
+    severity: list,
+    doctor_id: str,
+    since: datetime,
+    worst_per_patient: bool = False,
+    limit: int | None = None,
+    offset: int | None = None,
+):
+    """The doctor's unacknowledged alerts of a measure since `since`, with the values of the
+    measurement and the name of the patient.
+
+    Served by the (doctor_id, acknowledged, date) index; the measurement and the patient
+    are joined by primary key. Same options as cruds/warnings.py:warnings_stmt.
+    """
+    rank = func.row_number().over(
+        partition_by=Alert.patient_id, order_by=[*[column.desc() for column in severity], Alert.date.desc()]
+    )
+    stmt = (
+        select(
+            Alert.id.label("alert_id"),
+            Alert.patient_id,
+            *columns,
+            Alert.date,
+            Patient.first_name,
+            Patient.last_name,
+            *([rank.label("rank")] if worst_per_patient else []),
+        )
+        .join(model_db, model_db.id == Alert.measurement_id)
+        .join(Patient, Patient.id == Alert.patient_id)
+        .where(
+            Alert.doctor_id == doctor_id,
+            Alert.acknowledged == false(),
+            Alert.date >= since,
+            Alert.measure == model_db.__tablename__,
+        )
+    )
+    if worst_per_patient:
+        ranked = stmt.subquery()
+        stmt = select(*[column for column in ranked.c if column.key != "rank"]).where(ranked.c.rank == 1)
+        order = [ranked.c.date.desc(), ranked.c.alert_id.desc()]
+    else:
+        order = [Alert.date.desc(), Alert.id.desc()]
+    return stmt.order_by(*order).limit(limit).offset(offset)
+
+
+def get_alerts(db: Session, *args, **kwargs) -> list:
+    """Rows of alerts_stmt as mappings"""
+    return db.execute(alerts_stmt(*args, **kwargs)).mappings().all()
+
+
+def acknowledge_alerts(db: Session, doctor_id: str, alert_ids: list[int]) -> int:
+    """Marks the doctor's alerts as acknowledged, returns how many changed"""
+    stmt = (
+        update(Alert)
+        .where(Alert.doctor_id == doctor_id, Alert.id.in_(alert_ids), Alert.acknowledged == false())
+        .values(acknowledged=True)
+        .execution_options(synchronize_session=False)
+    )
+    count = db.execute(stmt).rowcount
+    db.commit()
+    return count
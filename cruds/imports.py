@@ -0,0 +1,144 @@
+# Background import of the measurement files exported by the devices
+import csv
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, UTC
+from itertools import islice
+from uuid import uuid4
+
+from fastapi import HTTPException
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+
+from cruds.measures import add_measurements_bulk
+from database.database import session_local
+from models.enumerations import BulkStatus, FileFormat, JobStatus
+from models.models import ImportJob as ImportJobDb
+from schemas.schemas import ImportJobOut
+
+# Rows validated and saved per transaction
+CHUNK_SIZE = 1000
+# Errors kept in the job status, the rest are only counted
+MAX_ERRORS = 100
+# Jobs are deleted this long after they were created
+JOB_RETENTION = timedelta(days=1)
+
+# Imports run in their own small pool so a large file never holds one of the request threads
+import_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="import")
+
+
+# Progress of a job in the worker that runs it. Its status is written to import_jobs when
+# the job starts, after every chunk and when it finishes, so every worker can answer the polls.
+class ImportJob:
+    def __init__(self, measure: str, doctor_id: str):
+        self.doctor_id = doctor_id
+        self.status = ImportJobOut(id=uuid4().hex, measure=measure, status=JobStatus.pending, created=datetime.now(UTC))
+        self.lock = threading.Lock()
+
+    def add_error(self, line: int, detail: str):
+        if len(self.status.errors) < MAX_ERRORS:
+            self.status.errors.append(f"Row {line}: {detail}")
+
+    def snapshot(self) -> ImportJobOut:
+        with self.lock:
+            return self.status.model_copy(deep=True)
+
+    def save(self):
+        """Writes the status to import_jobs in a session of its own"""
+        values = self.snapshot().model_dump(exclude={"id", "measure", "created"})
+        with session_local() as db:
+            db.execute(update(ImportJobDb).where(ImportJobDb.id == self.status.id).values(**values))
+            db.commit()
+
+
+def read_rows(path: str, file_format: FileFormat):
+    """Yields the rows of the file one by one, NDJSON lines are parsed when validated"""
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        if file_format == FileFormat.csv:
+            for row in csv.DictReader(file):
+                # Empty cells are missing values
+                yield {key: value if value != "" else None for key, value in row.items()}
+        else:
+            for line in file:
+                if line.strip():
+                    yield line
+
+
+def import_chunk(job: ImportJob, chunk: list, first_line: int, schema, model_db, db):
+    measurements, lines = [], []
+    for line, row in enumerate(chunk, start=first_line):
+        try:
+            if isinstance(row, str):
+                row = json.loads(row)
+            measurements.append(schema(**row))
+            lines.append(line)
+        except (ValueError, TypeError) as error:
+            with job.lock:
+                job.status.rejected += 1
+                job.add_error(line, str(error).splitlines()[0])
+
+    result = add_measurements_bulk(measurements, job.doctor_id, model_db=model_db, db=db) if measurements else None
+    with job.lock:
+        job.status.processed += len(chunk)
+        if result:
+            job.status.inserted += result.inserted
+            job.status.skipped += result.skipped
+            job.status.rejected += result.rejected
+            for row in result.rows:
+                if row.status == BulkStatus.rejected:
+                    job.add_error(lines[row.index], row.detail)
+
+
+def run_import(job: ImportJob, path: str, file_format: FileFormat, schema, model_db):
+    """Reads the file in chunks of CHUNK_SIZE rows, each chunk is committed on its own"""
+    with job.lock:
+        job.status.status = JobStatus.running
+    job.save()
+    # The header of a CSV is line 1
+    line = 2 if file_format == FileFormat.csv else 1
+    db = session_local()
+    try:
+        rows = read_rows(path, file_format)
+        while chunk := list(islice(rows, CHUNK_SIZE)):
+            try:
+                import_chunk(job, chunk, line, schema, model_db, db)
+            except HTTPException as error:
+                # The chunk collided with measurements saved meanwhile, it is not retried
+                with job.lock:
+                    job.status.processed += len(chunk)
+                    job.status.rejected += len(chunk)
+                    job.add_error(line, error.detail)
+            line += len(chunk)
+            job.save()
+        status = JobStatus.done
+    except Exception as error:
+        with job.lock:
+            job.add_error(line, f"The import stopped: {error}")
+        status = JobStatus.failed
+    finally:
+        db.close()
+        os.remove(path)
+    with job.lock:
+        job.status.status = status
+        job.status.finished = datetime.now(UTC)
+    job.save()
+
+
+def start_import(path: str, file_format: FileFormat, measure: str, schema, model_db, doctor_id: str) -> ImportJob:
+    job = ImportJob(measure, doctor_id)
+    with session_local() as db:
+        db.execute(delete(ImportJobDb).where(ImportJobDb.created < datetime.now(UTC) - JOB_RETENTION))
+        db.execute(insert(ImportJobDb).values(doctor_id=doctor_id, **job.snapshot().model_dump()))
+        db.commit()
+    import_executor.submit(run_import, job, path, file_format, schema, model_db)
+    return job
+
+
+def get_import_job(db: Session, job_id: str, doctor_id: str) -> ImportJobOut | None:
+    """Status of one of the doctor's imports, whichever worker runs it"""
+    job = db.get(ImportJobDb, job_id)
+    if job is None or job.doctor_id != doctor_id:
+        return None
+    return ImportJobOut.model_validate(job, from_attributes=True)
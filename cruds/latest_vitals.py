@@ -0,0 +1,103 @@
+# Last reading of each measure per patient, for the doctor's dashboard
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from models.models import BloodSugarLevel, CardiovascularParameter, PatientLatestVitals
+
+# Column of the measurement -> column of patient_latest_vitals
+LATEST_COLUMNS = {
+    CardiovascularParameter: {
+        "date": "blood_pressure_date",
+        "systolic": "systolic",
+        "diastolic": "diastolic",
+        "heart_rate": "heart_rate",
+    },
+    BloodSugarLevel: {"date": "blood_sugar_date", "value": "blood_sugar"},
+}
+
+
+def naive(moment: datetime) -> datetime:
+    """Dates are compared without time zone, as the database stores them"""
+    return moment.replace(tzinfo=None)
+
+
+def newest_readings(db: Session, model_db, patient_ids: set) -> dict:
+    """Newest reading of the measure of each patient, in the order of LATEST_COLUMNS.
+
+    One statement for all the patients: the readings are ranked per patient by date
+    with ROW_NUMBER and only the first of each is kept.
+    """
+    columns = [getattr(model_db, column) for column in LATEST_COLUMNS[model_db]]
+    rank = func.row_number().over(
+        partition_by=model_db.patient_id, order_by=[model_db.date.desc(), model_db.id.desc()]
+    )
+    ranked = (
+        select(model_db.patient_id, *columns, rank.label("rank")).where(model_db.patient_id.in_(patient_ids)).subquery()
+    )
+    stmt = select(ranked.c.patient_id, *[ranked.c[column.key] for column in columns]).where(ranked.c.rank == 1)
+    return {row[0]: tuple(row[1:]) for row in db.execute(stmt)}
+
+
+def locked_vitals(db: Session, patient_ids: set) -> dict:
+    """Rows of patient_latest_vitals of the patients, locked until the commit"""
+    stmt = select(PatientLatestVitals).where(PatientLatestVitals.patient_id.in_(patient_ids)).with_for_update()
+    return {vitals.patient_id: vitals for vitals in db.scalars(stmt)}
+
+
+def store_latest(db: Session, model_db, vitals: dict, patient_id: str, latest: tuple | None):
+    """Copies a reading to the patient's row of vitals, adding the row if needed"""
+    row = vitals.get(patient_id)
+    if row is None:
+        if latest is None:
+            return
+        row = PatientLatestVitals(patient_id=patient_id)
+        db.add(row)
+    for index, target in enumerate(LATEST_COLUMNS[model_db].values()):
+        setattr(row, target, None if latest is None else latest[index])
+
+
+def refresh_latest_vitals(db: Session, model_db, patient_ids):
+    """Copies the newest reading of the measure of each patient to patient_latest_vitals,
+    inserting the patient's row if needed. It does not commit.
+
+    Two statements whatever the number of patients: the newest readings and the
+    rows of vitals. Valid after inserts, updates and deletes alike; without readings
+    the columns become null.
+    """
+    patient_ids = {patient_id for patient_id in patient_ids if patient_id is not None}
+    if not patient_ids:
+        return
+    latest = newest_readings(db, model_db, patient_ids)
+    vitals = locked_vitals(db, patient_ids)
+    for patient_id in patient_ids:
+        store_latest(db, model_db, vitals, patient_id, latest.get(patient_id))
+    db.flush()
+
+
+def latest_vitals_inserted(db: Session, model_db, values: list[dict]):
+    """Updates patient_latest_vitals after inserting these measurements. It does not commit.
+
+    Only the newest reading of the batch of each patient is compared with the stored
+    one, so the measurements table is not read again: one statement for the rows of vitals.
+    """
+    columns = LATEST_COLUMNS[model_db]
+    newest = {}
+    for value in values:
+        if value["patient_id"] is None or value["date"] is None:
+            continue
+        current = newest.get(value["patient_id"])
+        # Later rows of the batch have higher ids, they win the ties as in newest_readings
+        if current is None or naive(value["date"]) >= naive(current["date"]):
+            newest[value["patient_id"]] = value
+    if not newest:
+        return
+    vitals = locked_vitals(db, set(newest))
+    date_column = columns["date"]
+    for patient_id, value in newest.items():
+        row = vitals.get(patient_id)
+        stored = getattr(row, date_column) if row is not None else None
+        if stored is None or naive(value["date"]) >= naive(stored):
+            store_latest(db, model_db, vitals, patient_id, tuple(value.get(column) for column in columns))
+    db.flush()
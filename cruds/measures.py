@@ -1,11 +1,151 @@
 # CRUDs for vital parameters
+import base64
+import csv
+import io
+import json
+from collections import defaultdict
 from datetime import datetime
 
+from fastapi import status
+from fastapi.exceptions import HTTPException
 from fastapi.responses import JSONResponse
-from sqlalchemy import select, delete, update
+from sqlalchemy import and_, event, false, or_, select, delete, update, insert, tuple_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from cruds.alerts import delete_alerts, evaluate_alerts
+from cruds.latest_vitals import latest_vitals_inserted, refresh_latest_vitals
+from cruds.patient_stats import accumulate, delete_stats, recompute_stats
+from cruds.summaries import delete_patient_summaries, refresh_daily_summaries
+from database.database import session_local
+from env_loader import EnvLoader
+from events.events import EventBroker
+from models.enumerations import BulkStatus, FileFormat
 from models.exceptions import exception_if_not_exists, exception_if_already_exists
+from models.models import Alert, Patient, doctor_patient
+from schemas.schemas import BulkMeasurementResult, BulkMeasurementRow
+
+# Maximum number of measurements accepted by a bulk request
+MAX_BULK_SIZE = 5000
+# Rows fetched from the server-side cursor per round trip when exporting
+EXPORT_BATCH_SIZE = 1000
+
+env_loader = EnvLoader()
+
+# New readings and alerts pushed to the doctors of the patient (GET /events)
+broker = EventBroker(queue_size=env_loader.events_queue_size)
+
+
+# Derived data (daily summaries, lifetime statistics, latest vitals, data versions, alerts)
+# is written in the same transaction as the measurements. These take a sync Session;
+# the async CRUDs call them with run_sync.
+def bump_data_version(db: Session, patient_ids):
+    """Invalidates the cached analytics of the patients (routes/calc/cache.py)"""
+    patient_ids = {patient_id for patient_id in patient_ids if patient_id is not None}
+    if patient_ids:
+        db.execute(
+            update(Patient)
+            .where(Patient.id.in_(patient_ids))
+            .values(data_version=Patient.data_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def queue_events(db: Session, model_db, keys: list[tuple], values: list[dict] | None = None):
+    """Prepares the events of a write for the subscribed doctors of the patients.
+
+    They wait in the session until the commit (publish_events), so a rolled back
+    write is never announced. Without subscribers nothing is queried.
+    """
+    if not broker.has_subscribers():
+        return
+    measure = model_db.__tablename__
+    patient_ids = {patient_id for patient_id, _ in keys if patient_id is not None}
+    doctors = defaultdict(list)
+    stmt = select(doctor_patient.c.patient_id, doctor_patient.c.doctor_id).where(
+        doctor_patient.c.patient_id.in_(patient_ids)
+    )
+    for patient_id, doctor_id in db.execute(stmt):
+        doctors[patient_id].append(doctor_id)
+
+    events = db.info.setdefault("pending_events", [])
+    if values is not None:
+        for value in values:
+            for doctor_id in doctors[value["patient_id"]]:
+                events.append((doctor_id, {"type": "measurement", "measure": measure, **value}))
+    else:
+        for patient_id in patient_ids:
+            changed = {"type": "measurements_changed", "measure": measure, "patient_id": patient_id}
+            events += [(doctor_id, changed) for doctor_id in doctors[patient_id]]
+
+    dated = {(patient_id, date) for patient_id, date in keys if patient_id is not None and date is not None}
+    if dated:
+        stmt = select(Alert).where(
+            Alert.measure == measure, Alert.acknowledged == false(), tuple_(Alert.patient_id, Alert.date).in_(dated)
+        )
+        for alert in db.scalars(stmt):
+            events.append(
+                (
+                    alert.doctor_id,
+                    {
+                        "type": "alert",
+                        "alert_id": alert.id,
+                        "measure": measure,
+                        "patient_id": alert.patient_id,
+                        "measurement_id": alert.measurement_id,
+                        "date": alert.date,
+                    },
+                )
+            )
+
+
+@event.listens_for(Session, "after_commit")
+def publish_events(session: Session):
+    for doctor_id, payload in session.info.pop("pending_events", []):
+        broker.publish(doctor_id, payload)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_events(session: Session):
+    session.info.pop("pending_events", None)
+
+
+def is_duplicate_key(error: IntegrityError) -> bool:
+    """Whether the error is a unique key violation (MySQL 1062, SQLite UNIQUE constraint)
+    rather than a foreign key or NOT NULL one"""
+    args = getattr(error.orig, "args", ())
+    return (bool(args) and args[0] == 1062) or "UNIQUE constraint failed" in str(error.orig)
+
+
+def measurements_inserted(db: Session, model_db, values: list[dict]):
+    keys = [(value["patient_id"], value["date"]) for value in values]
+    refresh_daily_summaries(db, model_db, keys)
+    accumulate(db, model_db, values)
+    latest_vitals_inserted(db, model_db, values)
+    evaluate_alerts(db, model_db, keys)
+    bump_data_version(db, [value["patient_id"] for value in values])
+    queue_events(db, model_db, keys, values)
+
+
+def measurements_changed(db: Session, model_db, keys: list[tuple]):
+    """After updates or deletes of the measurements with these (patient_id, date)"""
+    refresh_daily_summaries(db, model_db, keys)
+    for patient_id in {patient_id for patient_id, _ in keys}:
+        recompute_stats(db, model_db, patient_id)
+    refresh_latest_vitals(db, model_db, [patient_id for patient_id, _ in keys])
+    delete_alerts(db, model_db, keys)
+    evaluate_alerts(db, model_db, keys)
+    bump_data_version(db, [patient_id for patient_id, _ in keys])
+    queue_events(db, model_db, keys)
+
+
+def patient_measurements_deleted(db: Session, model_db, patient_id: str):
+    delete_patient_summaries(db, model_db, patient_id)
+    delete_stats(db, model_db, patient_id)
+    refresh_latest_vitals(db, model_db, [patient_id])
+    delete_alerts(db, model_db, patient_id=patient_id)
+    bump_data_version(db, [patient_id])
+    queue_events(db, model_db, [(patient_id, None)])
 
 
 # Create
@@ -19,17 +159,212 @@ def add_measurement(measurement, doctor_id, model_db, db: Session):
     measurement_dict = measurement.model_dump()
     measurement_dict["doctor_id"] = doctor_id
     db.add(model_db(**measurement_dict))
+    db.flush()
+    measurements_inserted(db, model_db, [measurement_dict])
     db.commit()
     return JSONResponse("The measurement was saved correctly")
 
 
+def measurement_key(patient_id: str, date: datetime) -> tuple:
+    """Natural key of a measurement, compared without time zone as the database stores it"""
+    return patient_id, date.replace(tzinfo=None)
+
+
+def required_columns(model_db) -> list[str]:
+    """Measured values that cannot be null in the table"""
+    return [
+        column.name
+        for column in model_db.__table__.columns
+        if not column.nullable and not column.primary_key and not column.foreign_keys
+    ]
+
+
+def add_measurements_bulk(
+    measurements: list, doctor_id, model_db, db: Session, patient_id: str | None = None
+) -> BulkMeasurementResult:
+    """Saves a batch of measurements in one transaction.
+
+    Rows of unknown patients or without date or required values are rejected,
+    rows already stored (or repeated in the batch) are skipped. Duplicates are
+    looked up with one set-based query and the rest is inserted with one executemany.
+
+    With `patient_id` the batch belongs to that patient: rows without patient take
+    it and rows of other patients are rejected.
+    """
+    if len(measurements) > MAX_BULK_SIZE:
+        raise HTTPException(
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, f"A bulk request accepts at most {MAX_BULK_SIZE} measurements."
+        )
+    result = BulkMeasurementResult()
+    rows = [BulkMeasurementRow(index=index, status=BulkStatus.inserted) for index in range(len(measurements))]
+    if patient_id:
+        for row, measurement in zip(rows, measurements):
+            if measurement.patient_id in (None, patient_id):
+                measurement.patient_id = patient_id
+            else:
+                row.status, row.detail = BulkStatus.rejected, "You can only add your own measurements."
+
+    patient_ids = {measurement.patient_id for measurement in measurements if measurement.patient_id}
+    known_patients = set(db.scalars(select(Patient.id).where(Patient.id.in_(patient_ids)))) if patient_ids else set()
+    required = required_columns(model_db)
+
+    candidates = []
+    for row, measurement in zip(rows, measurements):
+        missing = [name for name in required if getattr(measurement, name) is None]
+        if row.status == BulkStatus.rejected:
+            continue
+        elif measurement.patient_id not in known_patients:
+            row.status, row.detail = BulkStatus.rejected, f"The patient {measurement.patient_id} does not exist."
+        elif measurement.date is None:
+            row.status, row.detail = BulkStatus.rejected, "The date is required."
+        elif missing:
+            row.status, row.detail = BulkStatus.rejected, f"Missing values: {', '.join(missing)}."
+        else:
+            candidates.append((row, measurement))
+
+    existing = set()
+    if candidates:
+        keys = {(measurement.patient_id, measurement.date) for _, measurement in candidates}
+        stmt = select(model_db.patient_id, model_db.date).where(tuple_(model_db.patient_id, model_db.date).in_(keys))
+        existing = {measurement_key(patient_id, date) for patient_id, date in db.execute(stmt)}
+
+    values = []
+    for row, measurement in candidates:
+        key = measurement_key(measurement.patient_id, measurement.date)
+        if key in existing:
+            row.status, row.detail = BulkStatus.skipped, "Measurement already exists."
+            continue
+        existing.add(key)
+        measurement_dict = measurement.model_dump()
+        measurement_dict["doctor_id"] = doctor_id
+        values.append(measurement_dict)
+
+    if values:
+        try:
+            db.execute(insert(model_db), values)
+            measurements_inserted(db, model_db, values)
+            db.commit()
+        except IntegrityError as error:
+            db.rollback()
+            if not is_duplicate_key(error):
+                raise
+            # Another request stored some of these measurements in the meantime
+            exception_if_already_exists(True, "Some measurements were saved by another request, retry the upload.")
+
+    for row in rows:
+        setattr(result, row.status.value, getattr(result, row.status.value) + 1)
+    result.rows = rows
+    return result
+
+
 # Read
-def get_all_measurements(patient_id: str, model_db, db: Session):
-    """**Obtains all measurements of the patient's cardiovascular parameters**"""
+def encode_cursor(measurement) -> str:
+    """Opaque cursor with the (date, id) of the last measurement of a page"""
+    position = json.dumps([measurement.date.isoformat(), measurement.id])
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        date, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(date), int(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "The cursor is invalid.")
+
+
+def measurements_page_stmt(
+    patient_id: str,
+    model_db,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+):
+    """Page of measurements ordered by (date, id), served by the (patient_id, date) index.
+
+    The page after `cursor` starts with a range condition instead of an OFFSET,
+    so every page costs the same. One extra row is read to know if there is a next page.
+    """
     stmt = select(model_db).where(model_db.patient_id == patient_id)
+    if date_from:
+        stmt = stmt.where(model_db.date >= date_from)
+    if date_to:
+        stmt = stmt.where(model_db.date <= date_to)
+    if cursor:
+        date, id = decode_cursor(cursor)
+        stmt = stmt.where(or_(model_db.date > date, and_(model_db.date == date, model_db.id > id)))
+    stmt = stmt.order_by(model_db.date, model_db.id)
+    if limit:
+        stmt = stmt.limit(limit + 1)
+    return stmt
+
+
+def split_page(results: list, patient_id: str, limit: int | None, cursor: str | None) -> tuple[list, str | None]:
+    """Returns the measurements of the page and the cursor of the next one"""
+    if not cursor:
+        exception_if_not_exists(results, detail=f"The patient with id {patient_id} has no records")
+    if limit and len(results) > limit:
+        results = results[:limit]
+        return results, encode_cursor(results[-1])
+    return results, None
+
+
+def get_all_measurements(
+    patient_id: str,
+    model_db,
+    db: Session,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+) -> tuple[list, str | None]:
+    """**Obtains a page of the patient's measurements and the cursor of the next page**"""
+    stmt = measurements_page_stmt(patient_id, model_db, date_from, date_to, limit, cursor)
     results = db.scalars(stmt).all()
-    exception_if_not_exists(results, detail=f"The patient with id {patient_id} has no records")
-    return results
+    return split_page(results, patient_id, limit, cursor)
+
+
+def check_has_measurements(patient_id: str, model_db, db: Session):
+    stmt = select(model_db.id).where(model_db.patient_id == patient_id).limit(1)
+    exception_if_not_exists(db.scalar(stmt), detail=f"The patient with id {patient_id} has no records")
+
+
+def export_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def export_measurements(patient_id: str, model_db, columns: list[str], file_format: FileFormat):
+    """Yields the patient's measurements as CSV or NDJSON text, one block per batch of rows.
+
+    The rows are read with a server-side cursor while the response is being sent,
+    so it uses its own session instead of the one of the request.
+    """
+    stmt = (
+        select(*[getattr(model_db, column) for column in columns])
+        .where(model_db.patient_id == patient_id)
+        .order_by(model_db.date, model_db.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    db = session_local()
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if file_format == FileFormat.csv:
+            writer.writerow(columns)
+        for rows in db.execute(stmt).partitions():
+            for row in rows:
+                values = [export_value(value) for value in row]
+                if file_format == FileFormat.csv:
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(columns, values))) + "\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
 
 
 # Update
@@ -38,10 +373,19 @@ def update_measurement(func, measurment_id: int, measurement, model_db, db: Sess
     result = db.scalars(stmt).first()
     exception_if_not_exists(result, "There are no registered patients")
     func(measurement, result)
+    affected = [(result.patient_id, result.date), (result.patient_id, measurement.date)]
 
     stmt = update(model_db).where(model_db.id == measurment_id).values(**measurement.model_dump())
-    db.execute(stmt)
-    db.commit()
+    try:
+        db.execute(stmt)
+        measurements_changed(db, model_db, affected)
+        db.commit()
+    except IntegrityError as error:
+        db.rollback()
+        if not is_duplicate_key(error):
+            raise
+        # The new date collides with another measurement of the patient (unique patient_id, date)
+        exception_if_already_exists(True, "Measurement already exists.")
     return JSONResponse("The measurement has been changed successfully.")
 
 
@@ -54,13 +398,16 @@ def delete_measurements(model_db, db: Session, patient_id: str | None = None, me
 
         stmt = delete(model_db).where(model_db.patient_id == patient_id)
         db.execute(stmt)
+        patient_measurements_deleted(db, model_db, patient_id)
         db.commit()
         return JSONResponse(f"All patient measurements with id {patient_id} have been successfully deleted.")
     else:
         stmt = select(model_db).where(model_db.id == measurement_id)
         result = db.scalars(stmt).one_or_none()
         exception_if_not_exists(result, "There is no such measurement")
+        affected = [(result.patient_id, result.date)]
         stmt = delete(model_db).where(model_db.id == measurement_id)
         db.execute(stmt)
+        measurements_changed(db, model_db, affected)
         db.commit()
         return JSONResponse(f"Patient measurement with id {measurement_id} have been successfully deleted.")
@@ -0,0 +1,98 @@
+# Async CRUDs for vital parameters, used when DATABASE_MODE is async
+from datetime import datetime
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import select, delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.exceptions import exception_if_not_exists, exception_if_already_exists
+from cruds.measures import (
+    is_duplicate_key,
+    measurements_changed,
+    measurements_inserted,
+    measurements_page_stmt,
+    patient_measurements_deleted,
+    split_page,
+)
+
+
+# Create
+async def add_measurement(measurement, doctor_id, model_db, db: AsyncSession):
+    stmt = select(model_db).where(
+        model_db.patient_id == measurement.patient_id,
+        model_db.date == measurement.date,
+    )
+    result = (await db.execute(stmt)).first()
+    exception_if_already_exists(result, "Measurement already exists.")
+    measurement_dict = measurement.model_dump()
+    measurement_dict["doctor_id"] = doctor_id
+    db.add(model_db(**measurement_dict))
+    await db.flush()
+    await db.run_sync(measurements_inserted, model_db, [measurement_dict])
+    await db.commit()
+    return JSONResponse("The measurement was saved correctly")
+
+
+# Read
+async def get_all_measurements(
+    patient_id: str,
+    model_db,
+    db: AsyncSession,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+) -> tuple[list, str | None]:
+    """**Obtains a page of the patient's measurements and the cursor of the next page**"""
+    stmt = measurements_page_stmt(patient_id, model_db, date_from, date_to, limit, cursor)
+    results = (await db.scalars(stmt)).all()
+    return split_page(results, patient_id, limit, cursor)
+
+
+# Update
+async def update_measurement(func, measurment_id: int, measurement, model_db, db: AsyncSession):
+    stmt = select(model_db).where(model_db.id == measurment_id)
+    result = (await db.scalars(stmt)).first()
+    exception_if_not_exists(result, "There are no registered patients")
+    func(measurement, result)
+    affected = [(result.patient_id, result.date), (result.patient_id, measurement.date)]
+
+    stmt = update(model_db).where(model_db.id == measurment_id).values(**measurement.model_dump())
+    try:
+        await db.execute(stmt)
+        await db.run_sync(measurements_changed, model_db, affected)
+        await db.commit()
+    except IntegrityError as error:
+        await db.rollback()
+        if not is_duplicate_key(error):
+            raise
+        # The new date collides with another measurement of the patient (unique patient_id, date)
+        exception_if_already_exists(True, "Measurement already exists.")
+    return JSONResponse("The measurement has been changed successfully.")
+
+
+# Delete
+async def delete_measurements(
+    model_db, db: AsyncSession, patient_id: str | None = None, measurement_id: int | None = None
+):
+    if patient_id:
+        stmt = select(model_db.id).where(model_db.patient_id == patient_id).limit(1)
+        result = (await db.scalars(stmt)).first()
+        exception_if_not_exists(result, "This patient not have measurements")
+
+        stmt = delete(model_db).where(model_db.patient_id == patient_id)
+        await db.execute(stmt)
+        await db.run_sync(patient_measurements_deleted, model_db, patient_id)
+        await db.commit()
+        return JSONResponse(f"All patient measurements with id {patient_id} have been successfully deleted.")
+    else:
+        stmt = select(model_db).where(model_db.id == measurement_id)
+        result = (await db.scalars(stmt)).one_or_none()
+        exception_if_not_exists(result, "There is no such measurement")
+        affected = [(result.patient_id, result.date)]
+        stmt = delete(model_db).where(model_db.id == measurement_id)
+        await db.execute(stmt)
+        await db.run_sync(measurements_changed, model_db, affected)
+        await db.commit()
+        return JSONResponse(f"Patient measurement with id {measurement_id} have been successfully deleted.")
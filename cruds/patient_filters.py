@@ -0,0 +1,162 @@
+# Filters of the doctor's patient list, compiled to cached statements
+from datetime import datetime
+from functools import lru_cache
+
+from fastapi import status
+from fastapi.exceptions import HTTPException
+from sqlalchemy import Integer, asc, bindparam, desc, func, select
+from sqlalchemy.orm import Session, selectinload
+
+from models.enumerations import FilterBy, Gender, Order, Scholing
+from models.models import Patient, doctor_patient
+
+
+def parse_bool(text: str) -> bool:
+    match text.lower():
+        case "true" | "1" | "yes":
+            return True
+        case "false" | "0" | "no":
+            return False
+    raise ValueError(text)
+
+
+# Columns that can be filtered: parser of their values and operations allowed on them
+FILTER_COLUMNS = {
+    FilterBy.first_name: (str, {"eq", "in", "prefix"}),
+    FilterBy.last_name: (str, {"eq", "in", "prefix"}),
+    FilterBy.birth_date: (datetime.fromisoformat, {"eq", "range", "in"}),
+    FilterBy.gender: (Gender, {"eq", "in"}),
+    FilterBy.height: (int, {"eq", "range", "in"}),
+    FilterBy.weight: (float, {"eq", "range", "in"}),
+    FilterBy.scholing: (Scholing, {"eq", "in"}),
+    FilterBy.employee: (parse_bool, {"eq"}),
+    FilterBy.married: (parse_bool, {"eq"}),
+}
+
+
+def filter_error(text: str, detail: str) -> HTTPException:
+    return HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, f"Invalid filter '{text}': {detail}")
+
+
+def parse_filter(text: str) -> tuple[str, str, object]:
+    """Parses `field:operation:value` into (field, operation, value).
+
+    Operations are `eq`, `in` (comma separated values), `prefix` and `range`
+    (`min,max`, one of them may be left empty). A range with a single bound
+    becomes `ge` or `le`.
+    """
+    try:
+        field, operation, raw = text.split(":", 2)
+    except ValueError:
+        raise filter_error(text, "expected field:operation:value")
+    if field not in FILTER_COLUMNS:
+        raise filter_error(text, f"'{field}' can not be filtered")
+    parser, operations = FILTER_COLUMNS[field]
+    if operation not in operations:
+        raise filter_error(text, f"'{field}' accepts {', '.join(sorted(operations))}")
+
+    try:
+        match operation:
+            case "range":
+                low, high = (item.strip() for item in raw.split(",", 1))
+                low = parser(low) if low else None
+                high = parser(high) if high else None
+                if low is None and high is None:
+                    raise ValueError(raw)
+                if high is None:
+                    return field, "ge", low
+                if low is None:
+                    return field, "le", high
+                return field, "range", (low, high)
+            case "in":
+                values = [parser(item.strip()) for item in raw.split(",") if item.strip()]
+                if not values:
+                    raise ValueError(raw)
+                return field, "in", values
+            case _:
+                return field, operation, parser(raw)
+    except ValueError:
+        raise filter_error(text, f"invalid value for '{field}'")
+
+
+def escape_like(text: str) -> str:
+    """Escapes the LIKE wildcards of a value compared with escape='\\'"""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def filter_condition(field: str, operation: str, name: str):
+    column = getattr(Patient, field)
+    match operation:
+        case "eq":
+            return column == bindparam(name, type_=column.type)
+        case "ge":
+            return column >= bindparam(name, type_=column.type)
+        case "le":
+            return column <= bindparam(name, type_=column.type)
+        case "range":
+            low = bindparam(f"{name}_min", type_=column.type)
+            high = bindparam(f"{name}_max", type_=column.type)
+            return column.between(low, high)
+        case "in":
+            return column.in_(bindparam(name, expanding=True, type_=column.type))
+        case "prefix":
+            return column.like(bindparam(name, type_=column.type), escape="\\")
+
+
+def filter_params(operation: str, value, name: str) -> dict:
+    match operation:
+        case "range":
+            return {f"{name}_min": value[0], f"{name}_max": value[1]}
+        case "prefix":
+            return {name: escape_like(value) + "%"}
+        case _:
+            return {name: value}
+
+
+@lru_cache(maxsize=256)
+def patient_list_stmt(shape: tuple[tuple[str, str], ...], order_by: str, order: str, limit: bool, offset: bool):
+    """Statement of the doctor's patient list for a filter shape, built once per shape.
+
+    `shape` holds the (field, operation) of every filter; the values, the doctor,
+    the limit and the offset are bound parameters, so every request with the same
+    shape reuses the same statement and SQLAlchemy's compiled cache entry.
+    Each row carries the total of matching patients (count over the filtered rows).
+    """
+    conditions = [filter_condition(field, operation, f"f{index}") for index, (field, operation) in enumerate(shape)]
+    direction = desc if order == Order.desc else asc
+    stmt = (
+        select(Patient, func.count().over().label("total"))
+        .join(doctor_patient, doctor_patient.c.patient_id == Patient.id)
+        .where(doctor_patient.c.doctor_id == bindparam("doctor_id"), *conditions)
+        .options(selectinload(Patient.address))
+        .order_by(direction(getattr(Patient, order_by)), Patient.id)
+    )
+    if limit:
+        stmt = stmt.limit(bindparam("limit", type_=Integer))
+    if offset:
+        stmt = stmt.offset(bindparam("offset", type_=Integer))
+    return stmt
+
+
+def get_patient_list(
+    db: Session,
+    doctor_id: str,
+    filters: list[tuple[str, str, object]],
+    order_by: str,
+    order: str,
+    limit: int | None = None,
+    offset: int | None = None,
+) -> list:
+    """Rows (Patient, total) of the doctor's patients matching every filter"""
+    filters = sorted(filters, key=lambda item: item[:2])
+    shape = tuple((field, operation) for field, operation, _ in filters)
+    stmt = patient_list_stmt(shape, order_by, order, limit is not None, offset is not None)
+
+    params = {"doctor_id": doctor_id}
+    if limit is not None:
+        params["limit"] = limit
+    if offset is not None:
+        params["offset"] = offset
+    for index, (_, operation, value) in enumerate(filters):
+        params.update(filter_params(operation, value, f"f{index}"))
+    return db.execute(stmt, params).all()
@@ -0,0 +1,126 @@
+# Name search of the doctor's patients over the normalized search columns
+import sys
+import unicodedata
+
+from sqlalchemy import and_, case, func, or_, select, union
+from sqlalchemy.orm import Session, selectinload
+
+from cruds.patient_filters import escape_like
+from models.models import Patient, doctor_patient
+
+SEARCH_LENGTH = 64
+
+
+def normalize_name(text: str | None) -> str:
+    """Lowercase, without accents and with single spaces: 'Ángel  Núñez' -> 'angel nunez'"""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.lower().split())
+
+
+def search_columns(first_name: str | None, last_name: str | None) -> dict:
+    """Values of search_name (first name first) and search_last (last name first)"""
+    first, last = normalize_name(first_name), normalize_name(last_name)
+    return {
+        "search_name": " ".join(filter(None, (first, last)))[:SEARCH_LENGTH],
+        "search_last": " ".join(filter(None, (last, first)))[:SEARCH_LENGTH],
+    }
+
+
+def with_search_columns(values: dict, patient: Patient | None = None) -> dict:
+    """Adds the search columns to the values of an insert or update of a patient.
+
+    On updates the name that is not being changed is taken from `patient`; values
+    that do not touch the names are returned unchanged.
+    """
+    if "first_name" not in values and "last_name" not in values:
+        return values
+    first_name = values.get("first_name", patient.first_name if patient else None)
+    last_name = values.get("last_name", patient.last_name if patient else None)
+    values.update(search_columns(first_name, last_name))
+    return values
+
+
+def starts_with(column, phrase: str):
+    """`column` starts with `phrase` as a range of the index: phrase <= column < successor.
+
+    Unlike LIKE 'phrase%' it is served by the B-tree on every backend (SQLite only
+    uses an index for LIKE with a NOCASE column). The columns hold normalized text,
+    so the order of the characters is the same in every collation. When the last
+    character is the highest code point there is no successor and only the lower
+    bound is used.
+    """
+    last = ord(phrase[-1])
+    if last == sys.maxunicode:
+        return column >= phrase
+    # The surrogates can not be encoded, the successor of U+D7FF is U+E000
+    successor = last + 1 if last + 1 != 0xD800 else 0xE000
+    return and_(column >= phrase, column < phrase[:-1] + chr(successor))
+
+
+def scoped(matches, doctor_id: str, order: list, limit: int | None):
+    """The doctor's patients among the ids of `matches`, ordered by `order` then by last name"""
+    return (
+        select(Patient, func.count().over().label("total"))
+        .join(matches, matches.c.id == Patient.id)
+        .join(doctor_patient, and_(doctor_patient.c.patient_id == Patient.id, doctor_patient.c.doctor_id == doctor_id))
+        .options(selectinload(Patient.address))
+        .order_by(*order, Patient.search_last, Patient.id)
+        .limit(limit)
+    )
+
+
+def prefix_stmt(doctor_id: str, phrase: str, limit: int | None = None):
+    """Patients whose full name, in either order, starts with `phrase`; the exact name first.
+
+    The matching ids come from two index range scans (ix_patients_search_name and
+    ix_patients_search_last) joined by union; no row outside the ranges is read from
+    `patients`. They are then joined with the doctor's rows of doctor_patient.
+    """
+    matches = union(
+        select(Patient.id).where(starts_with(Patient.search_name, phrase)),
+        select(Patient.id).where(starts_with(Patient.search_last, phrase)),
+    ).subquery()
+    rank = case((or_(Patient.search_name == phrase, Patient.search_last == phrase), 0), else_=1)
+    return scoped(matches, doctor_id, [rank], limit)
+
+
+def words_stmt(doctor_id: str, phrase: str, limit: int | None = None):
+    """Patients where every word of `phrase` starts some word of the name ('her lao'
+    finds 'Javier Hernandez Lao').
+
+    The LIKE '% word%' patterns can not use an index: this reads every patient of the
+    doctor (doctor_patient by doctor_id, then patients by primary key).
+    """
+    words = [
+        or_(
+            Patient.search_name.like(escape_like(word) + "%", escape="\\"),
+            Patient.search_name.like("% " + escape_like(word) + "%", escape="\\"),
+        )
+        for word in phrase.split()
+    ]
+    matches = (
+        select(Patient.id)
+        .join(doctor_patient, and_(doctor_patient.c.patient_id == Patient.id, doctor_patient.c.doctor_id == doctor_id))
+        .where(*words)
+        .subquery()
+    )
+    return scoped(matches, doctor_id, [], limit)
+
+
+def search_patients(db: Session, doctor_id: str, query: str, limit: int | None = None) -> list:
+    """Rows (Patient, total) of the doctor's patients matching `query`, empty for a blank query.
+
+    Case and accent insensitive. The indexed prefix search runs first; only when it
+    finds nothing does the word search scan the doctor's patients.
+    """
+    # The search columns are cut to SEARCH_LENGTH, a longer phrase could never be their prefix
+    phrase = normalize_name(query)[:SEARCH_LENGTH]
+    if not phrase:
+        return []
+    rows = db.execute(prefix_stmt(doctor_id, phrase, limit)).all()
+    if not rows:
+        rows = db.execute(words_stmt(doctor_id, phrase, limit)).all()
+    return rows
@@ -0,0 +1,122 @@
+# Lifetime statistics of the vital parameters, one accumulator per patient, measure and column
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from models.models import DAILY_SUMMARIES, PatientStat
+
+
+def welford(accumulator: list, value: float):
+    """Adds one value to a [count, mean, m2, minimum, maximum] accumulator"""
+    count, mean, m2, minimum, maximum = accumulator
+    count += 1
+    delta = value - mean
+    mean += delta / count
+    m2 += delta * (value - mean)
+    accumulator[:] = [
+        count,
+        mean,
+        m2,
+        value if minimum is None else min(minimum, value),
+        value if maximum is None else max(maximum, value),
+    ]
+
+
+def merge(stat: PatientStat, count: int, mean: float, m2: float, minimum: float, maximum: float):
+    """Merges the accumulator of a batch into the stored one (Chan et al. parallel variance)"""
+    total = stat.count + count
+    delta = mean - stat.mean
+    stat.mean += delta * count / total
+    stat.m2 += m2 + delta * delta * stat.count * count / total
+    stat.minimum = min(stat.minimum, minimum)
+    stat.maximum = max(stat.maximum, maximum)
+    stat.count = total
+
+
+def accumulate(db: Session, model_db, measurements: list[dict]):
+    """Adds new measurements to the accumulators of their patients. It does not commit.
+
+    The batch is reduced in memory and merged into the stored rows, which are read
+    with FOR UPDATE so concurrent inserts of the same patient are serialized.
+    """
+    measure = model_db.__tablename__
+    batches = {}
+    for measurement in measurements:
+        for field in DAILY_SUMMARIES[model_db].measured:
+            value = measurement.get(field)
+            if value is not None:
+                welford(batches.setdefault((measurement["patient_id"], field), [0, 0.0, 0.0, None, None]), float(value))
+    if not batches:
+        return
+
+    stmt = (
+        select(PatientStat)
+        .where(PatientStat.measure == measure, tuple_(PatientStat.patient_id, PatientStat.field).in_(batches))
+        .with_for_update()
+    )
+    stored = {(stat.patient_id, stat.field): stat for stat in db.scalars(stmt)}
+    for (patient_id, field), batch in batches.items():
+        if (patient_id, field) in stored:
+            merge(stored[(patient_id, field)], *batch)
+        else:
+            count, mean, m2, minimum, maximum = batch
+            db.add(
+                PatientStat(
+                    patient_id=patient_id,
+                    measure=measure,
+                    field=field,
+                    count=count,
+                    mean=mean,
+                    m2=m2,
+                    minimum=minimum,
+                    maximum=maximum,
+                )
+            )
+    db.flush()
+
+
+def delete_stats(db: Session, model_db, patient_id: str):
+    db.execute(
+        delete(PatientStat).where(PatientStat.patient_id == patient_id, PatientStat.measure == model_db.__tablename__)
+    )
+
+
+def recompute_stats(db: Session, model_db, patient_id: str):
+    """Rebuilds the patient's accumulators of a measure from its daily summaries.
+
+    Used after updates and deletes: a minimum or maximum cannot be taken back, so the
+    accumulators are computed again, in O(days) as the summaries are already up to date.
+    """
+    summary = DAILY_SUMMARIES[model_db]
+    aggregates = []
+    for field in summary.measured:
+        aggregates += [
+            func.sum(getattr(summary, f"{field}_count")),
+            func.sum(getattr(summary, f"{field}_sum")),
+            func.sum(getattr(summary, f"{field}_sumsq")),
+            func.min(getattr(summary, f"{field}_min")),
+            func.max(getattr(summary, f"{field}_max")),
+        ]
+    row = db.execute(select(*aggregates).where(summary.patient_id == patient_id)).one()
+
+    stored = {stat.field: stat for stat in db.scalars(patient_stats_stmt(patient_id, model_db).with_for_update())}
+    for index, field in enumerate(summary.measured):
+        count, total, total_squares, minimum, maximum = row[index * 5 : index * 5 + 5]
+        stat = stored.pop(field, None)
+        if not count:
+            if stat:
+                db.delete(stat)
+            continue
+        count = int(count)
+        if stat is None:
+            stat = PatientStat(patient_id=patient_id, measure=model_db.__tablename__, field=field)
+            db.add(stat)
+        stat.count = count
+        stat.mean = total / count
+        stat.m2 = max(total_squares - total * stat.mean, 0.0)
+        stat.minimum, stat.maximum = minimum, maximum
+    db.flush()
+
+
+def patient_stats_stmt(patient_id: str, model_db):
+    """The patient's accumulators of a measure, a lookup by primary key prefix"""
+    return select(PatientStat).where(PatientStat.patient_id == patient_id, PatientStat.measure == model_db.__tablename__)
@@ -0,0 +1,79 @@
+# Daily summaries of the vital parameters
+from datetime import date, datetime, time, timedelta
+from typing import Iterable
+
+from sqlalchemy import and_, delete, func, insert, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from models.models import DAILY_SUMMARIES
+
+# Aggregates stored for every measured column, in the order of the summary columns
+SUMMARY_AGGREGATES = ("count", "sum", "sumsq", "min", "max")
+
+
+def summary_columns(summary) -> list[str]:
+    columns = ["patient_id", "day", "readings"]
+    for name in summary.measured:
+        columns += [f"{name}_{aggregate}" for aggregate in SUMMARY_AGGREGATES]
+    return columns
+
+
+def summary_select(model_db, summary):
+    """Rows of the summary computed from the measurements, grouped by patient and day"""
+    day = func.date(model_db.date)
+    columns = [model_db.patient_id, day, func.count()]
+    for name in summary.measured:
+        column = getattr(model_db, name)
+        columns += [func.count(column), func.sum(column), func.sum(column * column), func.min(column), func.max(column)]
+    return select(*columns).group_by(model_db.patient_id, day)
+
+
+def refresh_patient_days(
+    db: Session, model_db, patient_id: str, first_day: date | None = None, last_day: date | None = None
+):
+    """Recomputes the patient's summary rows between two days (inclusive), all of them by default.
+
+    The rows are deleted and inserted again from the measurements of those days,
+    so it is valid after inserts, updates and deletes alike. It does not commit.
+    """
+    summary = DAILY_SUMMARIES[model_db]
+    stmt = delete(summary).where(summary.patient_id == patient_id)
+    source = summary_select(model_db, summary).where(model_db.patient_id == patient_id)
+    if first_day:
+        stmt = stmt.where(summary.day >= first_day)
+        source = source.where(model_db.date >= datetime.combine(first_day, time.min))
+    if last_day:
+        stmt = stmt.where(summary.day <= last_day)
+        source = source.where(model_db.date < datetime.combine(last_day + timedelta(days=1), time.min))
+    db.execute(stmt)
+    db.execute(insert(summary).from_select(summary_columns(summary), source))
+
+
+def refresh_daily_summaries(db: Session, model_db, keys: Iterable[tuple[str, datetime]]):
+    """Recomputes the summary rows touched by the measurements with these (patient_id, date).
+
+    Only the exact (patient, day) rows are refreshed, with one DELETE and one
+    INSERT ... SELECT whatever the number of patients; each day is read as a range of
+    the (patient_id, date) index. Called before the commit of every write so summaries
+    and measurements change together; the async CRUDs run it with `AsyncSession.run_sync`.
+    """
+    days = {(patient_id, measured.date()) for patient_id, measured in keys if patient_id and measured}
+    if not days:
+        return
+    summary = DAILY_SUMMARIES[model_db]
+    ranges = [
+        and_(
+            model_db.patient_id == patient_id,
+            model_db.date >= datetime.combine(day, time.min),
+            model_db.date < datetime.combine(day + timedelta(days=1), time.min),
+        )
+        for patient_id, day in days
+    ]
+    db.execute(delete(summary).where(tuple_(summary.patient_id, summary.day).in_(days)))
+    source = summary_select(model_db, summary).where(or_(*ranges))
+    db.execute(insert(summary).from_select(summary_columns(summary), source))
+
+
+def delete_patient_summaries(db: Session, model_db, patient_id: str):
+    summary = DAILY_SUMMARIES[model_db]
+    db.execute(delete(summary).where(summary.patient_id == patient_id))
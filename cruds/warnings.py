@@ -0,0 +1,62 @@
+# Out-of-range measurements of the warning endpoints
+from datetime import datetime
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+
+from models.models import Patient, doctor_patient
+
+
+def warnings_stmt(
+    model_db,
+    columns: list,
+    condition,
+    severity: list,
+    since: datetime,
+    doctor_id: str | None = None,
+    patient_id: str | None = None,
+    worst_per_patient: bool = False,
+    limit: int | None = None,
+    offset: int | None = None,
+):
+    """Measurements since `since` that meet `condition`, with the name of their patient.
+
+    One statement joining the measurements with `patients` and, for a doctor, with
+    `doctor_patient` so only their patients are seen; `patient_id` restricts it to one
+    patient. Only `columns` are projected. With `worst_per_patient` each patient keeps
+    the reading that sorts first by `severity` (row_number per patient).
+    Newest first, paginated with `limit` and `offset`.
+    """
+    rank = func.row_number().over(
+        partition_by=model_db.patient_id, order_by=[*[column.desc() for column in severity], model_db.date.desc()]
+    )
+    stmt = select(
+        model_db.patient_id,
+        *columns,
+        model_db.date,
+        model_db.id,
+        Patient.first_name,
+        Patient.last_name,
+        *([rank.label("rank")] if worst_per_patient else []),
+    ).join(Patient, Patient.id == model_db.patient_id)
+    if doctor_id is not None:
+        stmt = stmt.join(
+            doctor_patient,
+            and_(doctor_patient.c.patient_id == model_db.patient_id, doctor_patient.c.doctor_id == doctor_id),
+        )
+    if patient_id is not None:
+        stmt = stmt.where(model_db.patient_id == patient_id)
+    stmt = stmt.where(model_db.date >= since, condition)
+
+    if worst_per_patient:
+        ranked = stmt.subquery()
+        stmt = select(*[column for column in ranked.c if column.key != "rank"]).where(ranked.c.rank == 1)
+        order = [ranked.c.date.desc(), ranked.c.id.desc()]
+    else:
+        order = [model_db.date.desc(), model_db.id.desc()]
+    return stmt.order_by(*order).limit(limit).offset(offset)
+
+
+def get_warnings(db: Session, *args, **kwargs) -> list:
+    """Rows of warnings_stmt as mappings"""
+    return db.execute(warnings_stmt(*args, **kwargs)).mappings().all()
@@ -0,0 +1,40 @@
+"""Rebuilds the daily summaries and the latest vitals of the measurements.
+
+Migrations 0003 and 0008 fill them when the tables are created and every write keeps them
+up to date afterwards. This rebuilds them from the measurements, for instance after
+loading data directly in the database:
+
+    python -m database.backfill_summaries                  # every patient
+    python -m database.backfill_summaries --patient p1 p2  # only these patients
+
+Each patient is rebuilt and committed separately, so the tables are never locked
+for long and the command can be interrupted and run again.
+"""
+
+import argparse
+
+from sqlalchemy import select
+
+from cruds.latest_vitals import refresh_latest_vitals
+from cruds.summaries import refresh_patient_days
+from database.database import session_local
+from models.models import DAILY_SUMMARIES, Patient
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patient", nargs="*", help="Ids of the patients to rebuild, all by default")
+    args = parser.parse_args()
+
+    with session_local() as db:
+        patient_ids = args.patient or db.scalars(select(Patient.id).order_by(Patient.id)).all()
+        for patient_id in patient_ids:
+            for model_db in DAILY_SUMMARIES:
+                refresh_patient_days(db, model_db, patient_id)
+                refresh_latest_vitals(db, model_db, [patient_id])
+            db.commit()
+            print(f"{patient_id}: summaries and latest vitals rebuilt")
+
+
+if __name__ == "__main__":
+    main()
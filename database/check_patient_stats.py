@@ -0,0 +1,94 @@
+"""Compares the lifetime statistics accumulators with a full recompute.
+
+For every patient and measure the count, mean, variance, minimum and maximum stored
+in patient_stats are checked against an aggregate over the raw measurements:
+
+    python -m database.check_patient_stats          # report the differences
+    python -m database.check_patient_stats --fix    # and rebuild the wrong patients
+
+--fix rebuilds the daily summaries and the accumulators of the affected patients
+from the measurements. The exit status is 1 when differences were found.
+"""
+
+import argparse
+import math
+
+from sqlalchemy import func, select
+
+from cruds.patient_stats import recompute_stats
+from cruds.summaries import refresh_patient_days
+from database.database import session_local
+from models.models import DAILY_SUMMARIES, PatientStat
+
+# Relative tolerance of the floating point comparisons
+TOLERANCE = 1e-6
+
+
+def recomputed(db, model_db) -> dict[tuple[str, str], tuple]:
+    """(patient_id, field) -> (count, mean, variance, minimum, maximum) from the measurements"""
+    expected = {}
+    for field in DAILY_SUMMARIES[model_db].measured:
+        column = getattr(model_db, field)
+        stmt = (
+            select(
+                model_db.patient_id,
+                func.count(column),
+                func.avg(column),
+                func.avg(column * column),
+                func.min(column),
+                func.max(column),
+            )
+            .group_by(model_db.patient_id)
+            .having(func.count(column) > 0)
+        )
+        for patient_id, count, mean, mean_square, minimum, maximum in db.execute(stmt):
+            mean = float(mean)
+            variance = max(float(mean_square) - mean * mean, 0.0)
+            expected[(patient_id, field)] = (count, mean, variance, float(minimum), float(maximum))
+    return expected
+
+
+def stored(db, model_db) -> dict[tuple[str, str], tuple]:
+    stmt = select(PatientStat).where(PatientStat.measure == model_db.__tablename__)
+    return {
+        (stat.patient_id, stat.field): (stat.count, stat.mean, stat.m2 / stat.count, stat.minimum, stat.maximum)
+        for stat in db.scalars(stmt)
+    }
+
+
+def same(expected: tuple | None, actual: tuple | None) -> bool:
+    if expected is None or actual is None:
+        return expected == actual
+    return expected[0] == actual[0] and all(
+        math.isclose(a, b, rel_tol=TOLERANCE, abs_tol=TOLERANCE) for a, b in zip(expected[1:], actual[1:])
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fix", action="store_true", help="Rebuild the patients with differences")
+    args = parser.parse_args()
+
+    wrong = set()
+    with session_local() as db:
+        for model_db in DAILY_SUMMARIES:
+            expected = recomputed(db, model_db)
+            actual = stored(db, model_db)
+            for key in sorted(expected.keys() | actual.keys()):
+                if not same(expected.get(key), actual.get(key)):
+                    print(f"{model_db.__tablename__} {key[0]} {key[1]}: stored {actual.get(key)}, expected {expected.get(key)}")
+                    wrong.add((model_db, key[0]))
+
+        if args.fix:
+            for model_db, patient_id in sorted(wrong, key=lambda item: (item[0].__tablename__, item[1])):
+                refresh_patient_days(db, model_db, patient_id)
+                recompute_stats(db, model_db, patient_id)
+                db.commit()
+                print(f"{model_db.__tablename__} {patient_id}: rebuilt")
+
+    print(f"{len(wrong)} patient measures with differences")
+    raise SystemExit(1 if wrong and not args.fix else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,18 @@
+import os
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
 from env_loader import EnvLoader
-from database.engine import create_engine_from_user_choice, DatabaseConfig
+from database.engine import create_engine_from_user_choice, create_async_engine_from_user_choice, DatabaseConfig
 
 env_loader = EnvLoader()
 
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
 
 class Base(DeclarativeBase):
     pass
@@ -17,12 +25,41 @@ database_config = DatabaseConfig(
     env_loader.host,
     env_loader.port,
     env_loader.database,
+    profile=env_loader.database_profile,
+    echo=env_loader.db_echo,
+    pool_size=env_loader.db_pool_size,
+    max_overflow=env_loader.db_max_overflow,
+    pool_timeout=env_loader.db_pool_timeout,
+    pool_recycle=env_loader.db_pool_recycle,
+    pool_pre_ping=env_loader.db_pool_pre_ping,
+    statement_timeout=env_loader.db_statement_timeout,
 )
 
-engine = create_engine_from_user_choice("mysql_cloud", database_config)
+engine = create_engine_from_user_choice(env_loader.database_type, database_config)
 
 session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The async engine is only created in async mode, its drivers are optional
+if env_loader.database_mode == "async":
+    async_engine = create_async_engine_from_user_choice(env_loader.database_type, database_config)
+    async_session_local = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+else:
+    async_engine = None
+    async_session_local = None
+
+
+def check_schema_version():
+    """Fails if the database is not at the latest migration.
+
+    It only reads the alembic_version table; the schema itself is created and
+    changed with `alembic upgrade head` as a deploy step.
+    """
+    heads = set(ScriptDirectory.from_config(Config(ALEMBIC_INI)).get_heads())
+    with engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    if current != heads:
+        raise RuntimeError(
+            f"The database schema is at revision {sorted(current) or 'none'} but the code expects {sorted(heads)}. "
+            "Run `alembic upgrade head`."
+        )
 
-def create_tables():
-    Base.metadata.create_all(engine)
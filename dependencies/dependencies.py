@@ -1,6 +1,6 @@
 # This module manages the connection with the database.
 
-from database.database import session_local
+from database.database import session_local, async_session_local
 
 
 # Dependency database
@@ -10,3 +10,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependency async database, only available when DATABASE_MODE is async
+async def get_async_db():
+    async with async_session_local() as db:
+        yield db
@@ -1,6 +1,17 @@
 import os
 from dotenv import load_dotenv
 
+
+def getenv_int(name: str) -> int | None:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else None
+
+
+def getenv_bool(name: str) -> bool | None:
+    value = os.getenv(name)
+    return value.lower() in ("1", "true", "yes", "on") if value not in (None, "") else None
+
+
 # Objeto para cargar variables de entornos
 
 class EnvLoader:
@@ -11,8 +22,30 @@ class EnvLoader:
         self.host = os.getenv("HOST")
         self.port = os.getenv("PORT")
         self.database = os.getenv("BD")
+        self.database_type = os.getenv("DATABASE_TYPE", "mysql_cloud")
+        self.database_profile = os.getenv("DATABASE_PROFILE", "production")
+        # "sync" o "async": las rutas de mediciones y análisis usan AsyncSession en modo async
+        self.database_mode = os.getenv("DATABASE_MODE", "sync")
+        # Sobrescriben los valores del perfil cuando se configuran
+        self.db_echo = getenv_bool("DB_ECHO")
+        self.db_pool_size = getenv_int("DB_POOL_SIZE")
+        self.db_max_overflow = getenv_int("DB_MAX_OVERFLOW")
+        self.db_pool_timeout = getenv_int("DB_POOL_TIMEOUT")
+        self.db_pool_recycle = getenv_int("DB_POOL_RECYCLE")
+        self.db_pool_pre_ping = getenv_bool("DB_POOL_PRE_PING")
+        self.db_statement_timeout = getenv_int("DB_STATEMENT_TIMEOUT")
         self.from_address = os.getenv("EMAIL")
         self.password_google = os.getenv("PASSWORD_GOOGLE")
         self.secrete_key = os.getenv("SECRET_KEY")
         self.algorithm = os.getenv("ALGORITHM")
-        self.acces_token_expire_minutes = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
\ No newline at end of file
+        self.acces_token_expire_minutes = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
+        self.principal_cache_ttl = int(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+        self.principal_cache_size = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+        self.analytics_cache_size = int(os.getenv("ANALYTICS_CACHE_SIZE", "4096"))
+        self.analytics_cache_bytes = int(os.getenv("ANALYTICS_CACHE_BYTES", str(64 * 1024 * 1024)))
+        self.events_queue_size = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+        self.password_workers = int(os.getenv("PASSWORD_WORKERS", str(os.cpu_count() or 1)))
+        self.password_queue_depth = int(os.getenv("PASSWORD_QUEUE_DEPTH", str(2 * self.password_workers)))
+        self.bcrypt_rounds = int(os.getenv("BCRYPT_ROUNDS", "12"))
+        # Token de operaciones de /monitoring (cabecera X-Monitoring-Token); sin él no se monta
+        self.monitoring_token = os.getenv("MONITORING_TOKEN")
\ No newline at end of file
@@ -0,0 +1,81 @@
+# In-process publish/subscribe of the measurement events, fanned out to the SSE subscribers.
+
+import asyncio
+import threading
+from collections import defaultdict
+
+
+class Subscription:
+    """Bounded queue of one subscriber. When it is full the oldest event is dropped,
+    so a slow client never blocks the writers nor grows the memory."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, event: dict):
+        # Runs in the subscriber's event loop
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: float) -> dict | None:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    """Fan-out of events to the subscriptions of each doctor.
+
+    `publish` may be called from any thread (the sync endpoints run in the AnyIO
+    threadpool): the events are handed to each subscriber's loop with
+    call_soon_threadsafe.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self.published = 0
+        self._subscriptions: dict[str, set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, doctor_id: str) -> Subscription:
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscriptions[doctor_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, doctor_id: str, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(doctor_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[doctor_id]
+
+    def has_subscribers(self) -> bool:
+        return bool(self._subscriptions)
+
+    def publish(self, doctor_id: str, event: dict):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(doctor_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+                self.published += 1
+            except RuntimeError:
+                # The loop of the subscriber is closed
+                self.unsubscribe(doctor_id, subscription)
+
+    def stats(self) -> dict:
+        with self._lock:
+            subscriptions = [subscription for group in self._subscriptions.values() for subscription in group]
+            return {
+                "doctors": len(self._subscriptions),
+                "subscribers": len(subscriptions),
+                "published": self.published,
+                "dropped": sum(subscription.dropped for subscription in subscriptions),
+            }
@@ -14,8 +14,12 @@ from routes.doctor_scope import (
     patients,
     email,
     photo,
+    imports,
+    alerts,
+    thresholds,
+    events,
 )
-from routes import oauth
+from routes import oauth, monitoring
 from routes.patient_scope import (
     analize_blood_pressure_patient,
     analize_blood_sugar_patient,
@@ -23,17 +27,22 @@ from routes.patient_scope import (
     blood_sugar_patient,
     patient,
 )
-from database.database import create_tables
+from routes.async_scope import (
+    analize as analize_async,
+    blood_pressure as blood_pressure_async,
+    blood_sugar as blood_sugar_async,
+)
+from database.database import check_schema_version
+from env_loader import EnvLoader
+
+env_loader = EnvLoader()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    try:
-        create_tables()
-        yield
-    except Exception as e:
-        # Handle the exception or log the error
-        print(f"Error occurred during database initialization: {e}")
+    # Fail fast: a worker must not serve requests against an outdated schema
+    check_schema_version()
+    yield
 
 
 app = FastAPI(
@@ -45,6 +54,12 @@ app = FastAPI(
 app.mount("/photos", StaticFiles(directory="photos"), name="photos")
 
 app.include_router(root.router)
+if env_loader.database_mode == "async":
+    # Registered first so they take precedence over the sync routes with the same path.
+    # They keep the same contract, so the documentation comes from the sync routers.
+    app.include_router(blood_pressure_async.router, include_in_schema=False)
+    app.include_router(blood_sugar_async.router, include_in_schema=False)
+    app.include_router(analize_async.router, include_in_schema=False)
 app.include_router(doctors.router)
 app.include_router(patients.router)
 app.include_router(blood_pressure.router)
@@ -53,7 +68,14 @@ app.include_router(analize_blood_pressure.router)
 app.include_router(analize_blood_sugar.router)
 app.include_router(email.router)
 app.include_router(photo.router)
+app.include_router(imports.router)
+app.include_router(alerts.router)
+app.include_router(thresholds.router)
+app.include_router(events.router)
 app.include_router(oauth.router)
+if env_loader.monitoring_token:
+    # Pool, cache and subscriber internals, only for the operators holding the token
+    app.include_router(monitoring.router)
 app.include_router(patient.router)
 app.include_router(blood_pressure_patient.router)
 app.include_router(blood_sugar_patient.router)
@@ -0,0 +1,106 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 09:00:00
+
+Schema as created by `Base.metadata.create_all` before the migrations existed.
+Databases created that way are adopted with `alembic stamp 0001`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "doctors",
+        sa.Column("id", sa.String(30), primary_key=True),
+        sa.Column("first_name", sa.String(30), nullable=False),
+        sa.Column("last_name", sa.String(30), nullable=True),
+        sa.Column("specialty", sa.String(30), nullable=True),
+        sa.Column("password", sa.String(255), nullable=False),
+        sa.Column("portrait", sa.String(100), nullable=True),
+    )
+    op.create_table(
+        "address",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("address", sa.JSON(), nullable=True),
+    )
+    op.create_table(
+        "email",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email_address", sa.String(30), nullable=False),
+        sa.Column("email_verify", sa.Boolean(), nullable=False),
+        sa.Column("code", sa.Integer(), nullable=False),
+        sa.Column("doctor_id", sa.String(30), sa.ForeignKey("doctors.id", ondelete="CASCADE"), nullable=False),
+    )
+    op.create_table(
+        "patients",
+        sa.Column("id", sa.String(30), primary_key=True),
+        sa.Column("first_name", sa.String(30), nullable=False),
+        sa.Column("last_name", sa.String(30), nullable=True),
+        sa.Column("birth_date", sa.DateTime(), nullable=True),
+        sa.Column("gender", sa.Enum("male", "female", name="gender"), nullable=True),
+        sa.Column("height", sa.Integer(), nullable=True),
+        sa.Column("weight", sa.Float(), nullable=True),
+        sa.Column(
+            "scholing",
+            sa.Enum(
+                "primary",
+                "secondary",
+                "pre_university",
+                "university",
+                "middle_technical",
+                "other",
+                name="scholing",
+            ),
+            nullable=True,
+        ),
+        sa.Column("employee", sa.Boolean(), nullable=True),
+        sa.Column("married", sa.Boolean(), nullable=True),
+        sa.Column("password", sa.String(255), nullable=False),
+        sa.Column("address_id", sa.Integer(), sa.ForeignKey("address.id"), nullable=True),
+    )
+    op.create_table(
+        "doctor_patient",
+        sa.Column("doctor_id", sa.String(30), sa.ForeignKey("doctors.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("patient_id", sa.String(30), sa.ForeignKey("patients.id", ondelete="CASCADE"), nullable=True),
+        sa.UniqueConstraint("doctor_id", "patient_id", name="uix_1"),
+    )
+    op.create_table(
+        "cardiovascular_parameters",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("systolic", sa.Integer(), nullable=False),
+        sa.Column("diastolic", sa.Integer(), nullable=False),
+        sa.Column("heart_rate", sa.Integer(), nullable=True),
+        sa.Column("patient_id", sa.String(30), sa.ForeignKey("patients.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("doctor_id", sa.String(30), sa.ForeignKey("doctors.id", ondelete="CASCADE"), nullable=False),
+    )
+    op.create_table(
+        "blood_sugar_levels",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("value", sa.Float(), nullable=False),
+        sa.Column("patient_id", sa.String(30), sa.ForeignKey("patients.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("doctor_id", sa.String(30), sa.ForeignKey("doctors.id", ondelete="CASCADE"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("blood_sugar_levels")
+    op.drop_table("cardiovascular_parameters")
+    op.drop_table("doctor_patient")
+    op.drop_table("patients")
+    op.drop_table("email")
+    op.drop_table("address")
+    op.drop_table("doctors")
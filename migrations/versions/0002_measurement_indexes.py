@@ -0,0 +1,52 @@
+"""Patient/date access-path indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:10:00
+
+Replaces database/migrate_indexes.py. Databases where that script already ran
+are adopted with `alembic stamp 0002`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+MEASUREMENT_TABLES = ("cardiovascular_parameters", "blood_sugar_levels")
+
+
+def check_duplicates() -> None:
+    """The unique indexes cannot be created while a patient has two measurements with the same date"""
+    connection = op.get_bind()
+    for table in MEASUREMENT_TABLES:
+        duplicates = connection.execute(
+            sa.text(f"SELECT patient_id, date, COUNT(*) FROM {table} GROUP BY patient_id, date HAVING COUNT(*) > 1")
+        ).all()
+        if duplicates:
+            detail = ", ".join(f"{patient_id} on {date}" for patient_id, date, _ in duplicates[:20])
+            raise RuntimeError(f"Remove the duplicated measurements of {table} before upgrading: {detail}")
+
+
+def upgrade() -> None:
+    check_duplicates()
+    for table in MEASUREMENT_TABLES:
+        op.create_index(f"ix_{table}_patient_date", table, ["patient_id", "date"], unique=True)
+        op.create_index(f"ix_{table}_date", table, ["date"])
+    op.create_index("ix_doctor_patient_patient_id", "doctor_patient", ["patient_id"])
+    op.create_index("ix_email_doctor_id", "email", ["doctor_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_email_doctor_id", table_name="email")
+    op.drop_index("ix_doctor_patient_patient_id", table_name="doctor_patient")
+    for table in MEASUREMENT_TABLES:
+        op.drop_index(f"ix_{table}_date", table_name=table)
+        op.drop_index(f"ix_{table}_patient_date", table_name=table)
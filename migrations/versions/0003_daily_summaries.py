@@ -0,0 +1,67 @@
+"""Daily summaries of the measurements
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 10:30:00
+
+Creates the per patient and day summary tables and fills them from the
+existing measurements. `python -m database.backfill_summaries` rebuilds them later.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SUMMARIES = {
+    "cardiovascular_daily_summaries": ("cardiovascular_parameters", ("systolic", "diastolic", "heart_rate")),
+    "blood_sugar_daily_summaries": ("blood_sugar_levels", ("value",)),
+}
+
+
+def measured_columns(name: str) -> list[sa.Column]:
+    return [
+        sa.Column(f"{name}_count", sa.Integer(), nullable=False),
+        sa.Column(f"{name}_sum", sa.Float(), nullable=True),
+        sa.Column(f"{name}_sumsq", sa.Float(), nullable=True),
+        sa.Column(f"{name}_min", sa.Float(), nullable=True),
+        sa.Column(f"{name}_max", sa.Float(), nullable=True),
+    ]
+
+
+def backfill(summary: str, table: str, measured: tuple[str, ...]) -> None:
+    columns = ["patient_id", "day", "readings"]
+    aggregates = ["patient_id", "DATE(date)", "COUNT(*)"]
+    for name in measured:
+        columns += [f"{name}_count", f"{name}_sum", f"{name}_sumsq", f"{name}_min", f"{name}_max"]
+        aggregates += [f"COUNT({name})", f"SUM({name})", f"SUM({name} * {name})", f"MIN({name})", f"MAX({name})"]
+    op.execute(
+        f"INSERT INTO {summary} ({', '.join(columns)}) "
+        f"SELECT {', '.join(aggregates)} FROM {table} GROUP BY patient_id, DATE(date)"
+    )
+
+
+def upgrade() -> None:
+    for summary, (table, measured) in SUMMARIES.items():
+        op.create_table(
+            summary,
+            sa.Column(
+                "patient_id", sa.String(30), sa.ForeignKey("patients.id", ondelete="CASCADE"), primary_key=True
+            ),
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("readings", sa.Integer(), nullable=False),
+            *[column for name in measured for column in measured_columns(name)],
+        )
+        backfill(summary, table, measured)
+
+
+def downgrade() -> None:
+    for summary in SUMMARIES:
+        op.drop_table(summary)
@@ -0,0 +1,52 @@
+"""Lifetime statistics accumulators
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 11:15:00
+
+Creates patient_stats and fills it from the daily summaries of revision 0003.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SUMMARIES = {
+    "cardiovascular_daily_summaries": ("cardiovascular_parameters", ("systolic", "diastolic", "heart_rate")),
+    "blood_sugar_daily_summaries": ("blood_sugar_levels", ("value",)),
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "patient_stats",
+        sa.Column("patient_id", sa.String(30), sa.ForeignKey("patients.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("measure", sa.String(30), primary_key=True),
+        sa.Column("field", sa.String(30), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("mean", sa.Float(), nullable=False),
+        sa.Column("m2", sa.Float(), nullable=False),
+        sa.Column("minimum", sa.Float(), nullable=False),
+        sa.Column("maximum", sa.Float(), nullable=False),
+    )
+    for summary, (measure, fields) in SUMMARIES.items():
+        for field in fields:
+            count, total, squares = f"SUM({field}_count)", f"SUM({field}_sum)", f"SUM({field}_sumsq)"
+            op.execute(
+                "INSERT INTO patient_stats (patient_id, measure, field, count, mean, m2, minimum, maximum) "
+                f"SELECT patient_id, '{measure}', '{field}', {count}, {total} / {count}, "
+                f"{squares} - {total} * {total} / {count}, MIN({field}_min), MAX({field}_max) "
+                f"FROM {summary} GROUP BY patient_id HAVING {count} > 0"
+            )
+
+
+def downgrade() -> None:
+    op.drop_table("patient_stats")
@@ -0,0 +1,64 @@
+"""Alerts of the measurements over the thresholds
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 13:00:00
+
+Creates the alerts table and raises the alerts of the readings of the last
+30 days, so the warning endpoints do not start empty.
+"""
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Thresholds of cruds/alerts.py when this revision was written
+BREACHES = {
+    "cardiovascular_parameters": "m.systolic >= 120 OR m.diastolic >= 80 OR m.heart_rate >= 100",
+    "blood_sugar_levels": "m.value >= 6.1",
+}
+BACKFILL_DAYS = 30
+
+
+def upgrade() -> None:
+    op.create_table(
+        "alerts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("doctor_id", sa.String(30), sa.ForeignKey("doctors.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("patient_id", sa.String(30), sa.ForeignKey("patients.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("measure", sa.String(30), nullable=False),
+        sa.Column("measurement_id", sa.Integer(), nullable=False),
+        sa.Column("date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("acknowledged", sa.Boolean(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_alerts_doctor_acknowledged_date", "alerts", ["doctor_id", "acknowledged", "date"])
+    op.create_index("ix_alerts_patient_measure_date", "alerts", ["patient_id", "measure", "date"])
+
+    connection = op.get_bind()
+    since = datetime.now() - timedelta(days=BACKFILL_DAYS)
+    for table, breach in BREACHES.items():
+        connection.execute(
+            sa.text(
+                "INSERT INTO alerts (doctor_id, patient_id, measure, measurement_id, date) "
+                f"SELECT dp.doctor_id, m.patient_id, '{table}', m.id, m.date FROM {table} m "
+                "JOIN doctor_patient dp ON dp.patient_id = m.patient_id "
+                f"WHERE m.date >= :since AND ({breach})"
+            ),
+            {"since": since},
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_alerts_patient_measure_date", table_name="alerts")
+    op.drop_index("ix_alerts_doctor_acknowledged_date", table_name="alerts")
+    op.drop_table("alerts")
@@ -0,0 +1,35 @@
+"""Alert thresholds per doctor and patient
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 13:45:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "alert_thresholds",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("doctor_id", sa.String(30), sa.ForeignKey("doctors.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("patient_id", sa.String(30), sa.ForeignKey("patients.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("systolic", sa.Float(), nullable=True),
+        sa.Column("diastolic", sa.Float(), nullable=True),
+        sa.Column("heart_rate", sa.Float(), nullable=True),
+        sa.Column("value", sa.Float(), nullable=True),
+        sa.UniqueConstraint("doctor_id", "patient_id", name="uix_alert_thresholds_doctor_patient"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("alert_thresholds")
@@ -0,0 +1,47 @@
+"""Latest vitals per patient
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 14:30:00
+
+Creates patient_latest_vitals and fills it with the newest reading of each
+measure of every patient.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "patient_latest_vitals",
+        sa.Column("patient_id", sa.String(30), sa.ForeignKey("patients.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("blood_pressure_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("systolic", sa.Integer(), nullable=True),
+        sa.Column("diastolic", sa.Integer(), nullable=True),
+        sa.Column("heart_rate", sa.Integer(), nullable=True),
+        sa.Column("blood_sugar_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("blood_sugar", sa.Float(), nullable=True),
+    )
+    op.execute(
+        "INSERT INTO patient_latest_vitals "
+        "(patient_id, blood_pressure_date, systolic, diastolic, heart_rate, blood_sugar_date, blood_sugar) "
+        "SELECT p.id, c.date, c.systolic, c.diastolic, c.heart_rate, b.date, b.value FROM patients p "
+        "LEFT JOIN cardiovascular_parameters c ON c.id = ("
+        "SELECT id FROM cardiovascular_parameters WHERE patient_id = p.id ORDER BY date DESC, id DESC LIMIT 1) "
+        "LEFT JOIN blood_sugar_levels b ON b.id = ("
+        "SELECT id FROM blood_sugar_levels WHERE patient_id = p.id ORDER BY date DESC, id DESC LIMIT 1) "
+        "WHERE c.id IS NOT NULL OR b.id IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("patient_latest_vitals")
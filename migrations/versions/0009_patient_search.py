@@ -0,0 +1,66 @@
+"""Patient name search columns
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 15:30:00
+
+Adds the normalized names of the patients (lowercase, without accents) in both
+orders, indexed for the prefix search of GET /patients/search, and fills them.
+"""
+import unicodedata
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Same rules as cruds.patient_search.normalize_name, frozen for this revision
+def normalize_name(text):
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.lower().split())
+
+
+def upgrade() -> None:
+    op.add_column("patients", sa.Column("search_name", sa.String(64), nullable=True))
+    op.add_column("patients", sa.Column("search_last", sa.String(64), nullable=True))
+    op.create_index("ix_patients_search_name", "patients", ["search_name"])
+    op.create_index("ix_patients_search_last", "patients", ["search_last"])
+
+    connection = op.get_bind()
+    patients = sa.table(
+        "patients",
+        sa.column("id", sa.String),
+        sa.column("first_name", sa.String),
+        sa.column("last_name", sa.String),
+        sa.column("search_name", sa.String),
+        sa.column("search_last", sa.String),
+    )
+    rows = connection.execute(sa.select(patients.c.id, patients.c.first_name, patients.c.last_name)).all()
+    for patient_id, first_name, last_name in rows:
+        first, last = normalize_name(first_name), normalize_name(last_name)
+        connection.execute(
+            patients.update()
+            .where(patients.c.id == patient_id)
+            .values(
+                search_name=" ".join(filter(None, (first, last)))[:64],
+                search_last=" ".join(filter(None, (last, first)))[:64],
+            )
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_patients_search_last", table_name="patients")
+    op.drop_index("ix_patients_search_name", table_name="patients")
+    with op.batch_alter_table("patients") as batch_op:
+        batch_op.drop_column("search_last")
+        batch_op.drop_column("search_name")
@@ -0,0 +1,54 @@
+"""Readings entered by the patient
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 18:00:00
+
+The measurements entered by the patient have no doctor: doctor_id becomes
+nullable and the 'by patient' marker, which is not a doctor id, becomes NULL.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("cardiovascular_parameters", "blood_sugar_levels")
+
+
+def upgrade() -> None:
+    doctors = sa.table("doctors", sa.column("id", sa.String))
+    for name in TABLES:
+        with op.batch_alter_table(name) as batch_op:
+            batch_op.alter_column("doctor_id", existing_type=sa.String(30), nullable=True)
+        measurements = sa.table(name, sa.column("doctor_id", sa.String))
+        op.execute(
+            measurements.update()
+            .where(measurements.c.doctor_id.not_in(sa.select(doctors.c.id)))
+            .values(doctor_id=None)
+        )
+
+
+def downgrade() -> None:
+    # doctor_id can only become NOT NULL again without readings entered by the patients,
+    # no value can stand for them under the foreign key to doctors.id
+    connection = op.get_bind()
+    for name in TABLES:
+        measurements = sa.table(name, sa.column("doctor_id", sa.String))
+        count = connection.scalar(
+            sa.select(sa.func.count()).select_from(measurements).where(measurements.c.doctor_id.is_(None))
+        )
+        if count:
+            raise RuntimeError(
+                f"{name} has {count} readings entered by patients (doctor_id NULL). "
+                "Delete them or assign them to a doctor before downgrading."
+            )
+    for name in TABLES:
+        with op.batch_alter_table(name) as batch_op:
+            batch_op.alter_column("doctor_id", existing_type=sa.String(30), nullable=False)
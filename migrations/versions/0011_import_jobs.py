@@ -0,0 +1,44 @@
+"""Status of the imports
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17 18:30:00
+
+Creates the import_jobs table. The status of the background imports was kept in
+the memory of the worker that ran them, so a poll served by another worker
+could not find the job.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "import_jobs",
+        sa.Column("id", sa.String(32), primary_key=True),
+        sa.Column("doctor_id", sa.String(30), sa.ForeignKey("doctors.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("measure", sa.String(30), nullable=False),
+        sa.Column("status", sa.Enum("pending", "running", "done", "failed", name="jobstatus"), nullable=False),
+        sa.Column("processed", sa.Integer(), nullable=False),
+        sa.Column("inserted", sa.Integer(), nullable=False),
+        sa.Column("skipped", sa.Integer(), nullable=False),
+        sa.Column("rejected", sa.Integer(), nullable=False),
+        sa.Column("errors", sa.JSON(), nullable=True),
+        sa.Column("created", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_import_jobs_doctor_id", "import_jobs", ["doctor_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_import_jobs_doctor_id", table_name="import_jobs")
+    op.drop_table("import_jobs")
@@ -38,6 +38,12 @@ class FilterBy(str, Enum):
     married = "married"
 
 
+class Bucket(str, Enum):
+    hour = "hour"
+    day = "day"
+    week = "week"
+
+
 class Order(str, Enum):
     asc = "asc"
     desc = "desc"
@@ -47,3 +53,21 @@ class Operation(str, Enum):
     minimum = "max"
     maximum = "min"
     mean = "mean"
+
+
+class BulkStatus(str, Enum):
+    inserted = "inserted"
+    skipped = "skipped"
+    rejected = "rejected"
+
+
+class FileFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+class JobStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
@@ -1,11 +1,11 @@
-from datetime import datetime as dt
+from datetime import date, datetime as dt
 
-from sqlalchemy import Enum, ForeignKey, Table, Column, UniqueConstraint
-from sqlalchemy.types import String, DateTime, JSON
+from sqlalchemy import Enum, ForeignKey, Index, Table, Column, UniqueConstraint, func
+from sqlalchemy.types import String, Date, DateTime, Float, JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from database.database import Base
-from models.enumerations import Gender, Scholing
+from models.enumerations import Gender, JobStatus, Scholing
 
 
 doctor_patient = Table(
@@ -13,7 +13,9 @@ doctor_patient = Table(
     Base.metadata,
     Column("doctor_id", String(30), ForeignKey("doctors.id", ondelete="CASCADE")),
     Column("patient_id", String(30), ForeignKey("patients.id", ondelete="CASCADE")),
+    # uix_1 is also the (doctor_id, patient_id) index of the doctor's patient lists
     UniqueConstraint("doctor_id", "patient_id", name="uix_1"),
+    Index("ix_doctor_patient_patient_id", "patient_id"),
 )
 
 
@@ -44,7 +46,7 @@ class Email(Base):
     email_address: Mapped[str] = mapped_column(String(30))
     email_verify: Mapped[bool] = mapped_column(default=False)
     code: Mapped[int]
-    doctor_id: Mapped[str] = mapped_column(String(30), ForeignKey("doctors.id", ondelete="CASCADE"))
+    doctor_id: Mapped[str] = mapped_column(String(30), ForeignKey("doctors.id", ondelete="CASCADE"), index=True)
     doctor = relationship("Doctor", back_populates="email")
 
 
@@ -69,7 +71,13 @@ class Patient(Base):
     scholing: Mapped[Scholing | None]
     employee: Mapped[bool | None]
     married: Mapped[bool | None]
-    password:  Mapped[str]
+    password: Mapped[str] = mapped_column(String(255))
+    # Incremented by every write of the patient's measurements, part of the analytics cache keys
+    data_version: Mapped[int] = mapped_column(default=0, server_default="0")
+    # Normalized full name (lowercase, without accents) in both orders, for the prefix
+    # search of GET /patients/search; written with the names by cruds.patient_search.search_columns
+    search_name: Mapped[str | None] = mapped_column(String(64), index=True)
+    search_last: Mapped[str | None] = mapped_column(String(64), index=True)
     doctors: Mapped[list["Doctor"]] = relationship(
         secondary=doctor_patient,
         cascade="all, delete",
@@ -87,6 +95,10 @@ class Patient(Base):
 
 class CardiovascularParameter(Base):
     __tablename__ = "cardiovascular_parameters"
+    __table_args__ = (
+        Index("ix_cardiovascular_parameters_patient_date", "patient_id", "date", unique=True),
+        Index("ix_cardiovascular_parameters_date", "date"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     date = mapped_column(DateTime(timezone=True))
@@ -94,18 +106,152 @@ class CardiovascularParameter(Base):
     diastolic: Mapped[int] = mapped_column(default=80)
     heart_rate: Mapped[int | None] = mapped_column(default=None)
     patient_id: Mapped[str] = mapped_column(ForeignKey("patients.id", ondelete="CASCADE"))
-    doctor_id: Mapped[str] = mapped_column(ForeignKey("doctors.id", ondelete="CASCADE"))
+    # Doctor who recorded the reading, None when the patient entered it
+    doctor_id: Mapped[str | None] = mapped_column(ForeignKey("doctors.id", ondelete="CASCADE"))
     patient = relationship("Patient", back_populates="measure_cvs")
     doctor = relationship("Doctor", back_populates="measure_cvs")
 
 
 class BloodSugarLevel(Base):
     __tablename__ = "blood_sugar_levels"
+    __table_args__ = (
+        Index("ix_blood_sugar_levels_patient_date", "patient_id", "date", unique=True),
+        Index("ix_blood_sugar_levels_date", "date"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     date = mapped_column(DateTime(timezone=True))
     value: Mapped[float]
     patient_id: Mapped[str] = mapped_column(ForeignKey("patients.id", ondelete="CASCADE"))
-    doctor_id: Mapped[str] = mapped_column(ForeignKey("doctors.id", ondelete="CASCADE"))
+    # Doctor who recorded the reading, None when the patient entered it
+    doctor_id: Mapped[str | None] = mapped_column(ForeignKey("doctors.id", ondelete="CASCADE"))
     patient = relationship("Patient", back_populates="measure_blood_sugar")
     doctor = relationship("Doctor", back_populates="measure_blood_sugar")
+
+
+# Per patient and day aggregates of the measurements, kept up to date by cruds/summaries.py
+# in the same transaction as every write. `readings` counts the rows and each measured
+# column has its count (not null values), sum, sum of squares, minimum and maximum.
+
+
+class CardiovascularDailySummary(Base):
+    __tablename__ = "cardiovascular_daily_summaries"
+    measured = ("systolic", "diastolic", "heart_rate")
+
+    patient_id: Mapped[str] = mapped_column(ForeignKey("patients.id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    readings: Mapped[int]
+    systolic_count: Mapped[int]
+    systolic_sum: Mapped[float | None] = mapped_column(Float)
+    systolic_sumsq: Mapped[float | None] = mapped_column(Float)
+    systolic_min: Mapped[float | None] = mapped_column(Float)
+    systolic_max: Mapped[float | None] = mapped_column(Float)
+    diastolic_count: Mapped[int]
+    diastolic_sum: Mapped[float | None] = mapped_column(Float)
+    diastolic_sumsq: Mapped[float | None] = mapped_column(Float)
+    diastolic_min: Mapped[float | None] = mapped_column(Float)
+    diastolic_max: Mapped[float | None] = mapped_column(Float)
+    heart_rate_count: Mapped[int]
+    heart_rate_sum: Mapped[float | None] = mapped_column(Float)
+    heart_rate_sumsq: Mapped[float | None] = mapped_column(Float)
+    heart_rate_min: Mapped[float | None] = mapped_column(Float)
+    heart_rate_max: Mapped[float | None] = mapped_column(Float)
+
+
+class BloodSugarDailySummary(Base):
+    __tablename__ = "blood_sugar_daily_summaries"
+    measured = ("value",)
+
+    patient_id: Mapped[str] = mapped_column(ForeignKey("patients.id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    readings: Mapped[int]
+    value_count: Mapped[int]
+    value_sum: Mapped[float | None] = mapped_column(Float)
+    value_sumsq: Mapped[float | None] = mapped_column(Float)
+    value_min: Mapped[float | None] = mapped_column(Float)
+    value_max: Mapped[float | None] = mapped_column(Float)
+
+
+DAILY_SUMMARIES = {CardiovascularParameter: CardiovascularDailySummary, BloodSugarLevel: BloodSugarDailySummary}
+
+
+# Running lifetime statistics of one measured column of a patient, see cruds/patient_stats.py
+class PatientStat(Base):
+    __tablename__ = "patient_stats"
+
+    patient_id: Mapped[str] = mapped_column(ForeignKey("patients.id", ondelete="CASCADE"), primary_key=True)
+    # Table of the measurement and measured column, e.g. blood_sugar_levels / value
+    measure: Mapped[str] = mapped_column(String(30), primary_key=True)
+    field: Mapped[str] = mapped_column(String(30), primary_key=True)
+    count: Mapped[int]
+    mean: Mapped[float] = mapped_column(Float)
+    # Sum of the squared differences from the mean (Welford)
+    m2: Mapped[float] = mapped_column(Float)
+    minimum: Mapped[float] = mapped_column(Float)
+    maximum: Mapped[float] = mapped_column(Float)
+
+
+# Measurement over the alert thresholds, one row per doctor of the patient (cruds/alerts.py)
+class Alert(Base):
+    __tablename__ = "alerts"
+    __table_args__ = (
+        Index("ix_alerts_doctor_acknowledged_date", "doctor_id", "acknowledged", "date"),
+        Index("ix_alerts_patient_measure_date", "patient_id", "measure", "date"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    doctor_id: Mapped[str] = mapped_column(ForeignKey("doctors.id", ondelete="CASCADE"))
+    patient_id: Mapped[str] = mapped_column(ForeignKey("patients.id", ondelete="CASCADE"))
+    # Table of the measurement and its id
+    measure: Mapped[str] = mapped_column(String(30))
+    measurement_id: Mapped[int]
+    # Date of the measurement
+    date = mapped_column(DateTime(timezone=True))
+    acknowledged: Mapped[bool] = mapped_column(default=False, server_default="0")
+    created_at: Mapped[dt] = mapped_column(DateTime, server_default=func.now())
+
+
+# Alert thresholds of a doctor: the row without patient is the doctor's profile, the others
+# override it for one patient. Null values fall back to the profile and then to cruds/alerts.py.
+class AlertThreshold(Base):
+    __tablename__ = "alert_thresholds"
+    __table_args__ = (UniqueConstraint("doctor_id", "patient_id", name="uix_alert_thresholds_doctor_patient"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    doctor_id: Mapped[str] = mapped_column(ForeignKey("doctors.id", ondelete="CASCADE"))
+    patient_id: Mapped[str | None] = mapped_column(ForeignKey("patients.id", ondelete="CASCADE"))
+    systolic: Mapped[float | None] = mapped_column(Float)
+    diastolic: Mapped[float | None] = mapped_column(Float)
+    heart_rate: Mapped[float | None] = mapped_column(Float)
+    value: Mapped[float | None] = mapped_column(Float)
+
+
+# Last reading of each measure of a patient, kept up to date by cruds/latest_vitals.py
+class PatientLatestVitals(Base):
+    __tablename__ = "patient_latest_vitals"
+
+    patient_id: Mapped[str] = mapped_column(ForeignKey("patients.id", ondelete="CASCADE"), primary_key=True)
+    blood_pressure_date = mapped_column(DateTime(timezone=True), nullable=True)
+    systolic: Mapped[int | None]
+    diastolic: Mapped[int | None]
+    heart_rate: Mapped[int | None]
+    blood_sugar_date = mapped_column(DateTime(timezone=True), nullable=True)
+    blood_sugar: Mapped[float | None]
+
+
+# Status of the background imports of cruds/imports.py, so any worker can answer the polls
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    doctor_id: Mapped[str] = mapped_column(ForeignKey("doctors.id", ondelete="CASCADE"), index=True)
+    measure: Mapped[str] = mapped_column(String(30))
+    status: Mapped[JobStatus] = mapped_column(Enum(JobStatus))
+    processed: Mapped[int] = mapped_column(default=0)
+    inserted: Mapped[int] = mapped_column(default=0)
+    skipped: Mapped[int] = mapped_column(default=0)
+    rejected: Mapped[int] = mapped_column(default=0)
+    # First errors of the import, with their row number
+    errors = mapped_column(JSON, default=list)
+    created = mapped_column(DateTime(timezone=True))
+    finished = mapped_column(DateTime(timezone=True), nullable=True)
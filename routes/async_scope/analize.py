@@ -0,0 +1,46 @@
+# Async version of the analyze endpoints of routes/doctor_scope, mounted in DATABASE_MODE=async.
+# The warning endpoints are still served by the sync routers.
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Security
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dependencies.dependencies import get_async_db
+from models.models import BloodSugarLevel, CardiovascularParameter, Doctor
+from schemas.schemas import AnalizeCardiovascular, Analize
+from routes.oauth import get_current_user_async
+from routes.calc.calculation_async import analize_columns
+
+
+router = APIRouter(prefix="/analize", tags=["Analize"])
+
+
+@router.get("/blood_pressure", response_model=AnalizeCardiovascular)
+async def analize_blood_pressure(
+    current_doctor: Annotated[Doctor, Security(get_current_user_async, scopes=["doctor"])],
+    patient_id: str,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """**Get the mean, minimum and maximum value of blood pressure and heart rate**"""
+
+    systolic, diastolic, heart_rate = await analize_columns(
+        patient_id,
+        db,
+        [CardiovascularParameter.systolic, CardiovascularParameter.diastolic, CardiovascularParameter.heart_rate],
+        CardiovascularParameter,
+    )
+    return AnalizeCardiovascular(systolic=systolic, diastolic=diastolic, heart_rate=heart_rate)
+
+
+@router.get("/blood_sugar", response_model=Analize)
+async def analize_blood_sugar(
+    current_doctor: Annotated[Doctor, Security(get_current_user_async, scopes=["doctor"])],
+    patient_id: str,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    **Get the mean, minimum and maximum value of blood sugar**
+
+    """
+    (statistics,) = await analize_columns(patient_id, db, [BloodSugarLevel.value], BloodSugarLevel)
+    return statistics
@@ -0,0 +1,97 @@
+# Async version of routes/doctor_scope/blood_sugar.py, mounted in DATABASE_MODE=async
+from datetime import datetime
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query, Security
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.models import Doctor
+from models.models import BloodSugarLevel as bsl
+from dependencies.dependencies import get_async_db
+from schemas.schemas import BloodSugarLevel, BloodSugarLevelUpdate, BloodSugarLevelOutList, BloodSugarLevelOut
+from routes.oauth import get_current_user_async
+from routes.doctor_scope.blood_sugar import manage_null_values
+from cruds.measures_async import (
+    add_measurement,
+    get_all_measurements,
+    delete_measurements,
+    update_measurement,
+)
+
+
+router = APIRouter(prefix="/blood_sugar", tags=["Blood sugar"])
+
+
+@router.post("")
+async def add(
+    current_doctor: Annotated[Doctor, Security(get_current_user_async, scopes=["doctor"])],
+    measurement: BloodSugarLevel,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """**Adds a new measurement of the blood sugar level**"""
+    return await add_measurement(measurement, current_doctor.id, model_db=bsl, db=db)
+
+
+@router.get("/{patient_id}", response_model=BloodSugarLevelOutList)
+async def get(
+    current_doctor: Annotated[Doctor, Security(get_current_user_async, scopes=["doctor"])],
+    patient_id: str,
+    date_from: datetime | None = Query(default=None, alias="from", description="Fecha inicial (inclusive)"),
+    date_to: datetime | None = Query(default=None, alias="to", description="Fecha final (inclusive)"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: str | None = Query(default=None, description="next_cursor de la página anterior"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """**Obtains the patient's blood sugar measurements**, a page at a time ordered by date
+
+    Pass the _next_cursor_ of a response as _cursor_ to get the following page.
+    """
+    measurements, next_cursor = await get_all_measurements(
+        patient_id, model_db=bsl, db=db, date_from=date_from, date_to=date_to, limit=limit, cursor=cursor
+    )
+
+    return BloodSugarLevelOutList(
+        patient_id=patient_id,
+        measures=[
+            BloodSugarLevelOut(date=measurement.date, value=measurement.value, doctor=measurement.doctor_id)
+            for measurement in measurements
+        ],
+        next_cursor=next_cursor,
+    )
+
+
+@router.put("")
+async def update(
+    current_doctor: Annotated[Doctor, Security(get_current_user_async, scopes=["doctor"])],
+    measurment_id: int,
+    measurement: BloodSugarLevelUpdate,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """**Update a measurement**"""
+    return await update_measurement(
+        manage_null_values,
+        measurment_id,
+        measurement,
+        model_db=bsl,
+        db=db,
+    )
+
+
+@router.delete("/all", summary="Delete all patient measures")
+async def delete(
+    current_doctor: Annotated[Doctor, Security(get_current_user_async, scopes=["doctor"])],
+    patient_id: str,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """**Deletes all measurement** for a patient"""
+    return await delete_measurements(model_db=bsl, db=db, patient_id=patient_id)
+
+
+@router.delete("/{measurement_id}", summary="Delete measures by ID")
+async def delete(
+    current_doctor: Annotated[Doctor, Security(get_current_user_async, scopes=["doctor"])],
+    measurement_id: int,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """**Deletes a measurement** by a id"""
+    return await delete_measurements(model_db=bsl, db=db, measurement_id=measurement_id)
@@ -0,0 +1,38 @@
+# Cache of the analytics results, keyed by the patient's data version
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from cache.cache import LRUCache
+from env_loader import EnvLoader
+from models.models import Patient
+
+env_loader = EnvLoader()
+
+# Every write of a patient's measurements increments Patient.data_version in the same
+# transaction, so an entry of an older version is never found again and ages out.
+analytics_cache = LRUCache(maxsize=env_loader.analytics_cache_size, maxbytes=env_loader.analytics_cache_bytes)
+
+
+def data_version_stmt(patient_id: str):
+    return select(Patient.data_version).where(Patient.id == patient_id)
+
+
+def cached_analytics(db: Session, patient_id: str, key: tuple, compute):
+    """Result of `compute()` for the patient, from the cache while its data does not change.
+
+    Only for the analyses that aggregate the measurements: every call costs one
+    primary key read of the patient's data version.
+
+    `key` identifies the measure, the kind of analysis and its parameters (window,
+    bucket...). Errors are not cached.
+    """
+    version = db.scalar(data_version_stmt(patient_id))
+    if version is None:
+        return compute()
+    full_key = (patient_id, *key, version)
+    result = analytics_cache.get(full_key)
+    if result is None:
+        result = compute()
+        analytics_cache.set(full_key, result)
+    return result
+
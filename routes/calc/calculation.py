@@ -1,9 +1,19 @@
+from datetime import datetime
+from math import sqrt
+
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func
+from sqlalchemy import and_, case, literal, select, func
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import String
 
 
+from cruds.patient_stats import patient_stats_stmt
+from routes.calc.cache import cached_analytics
 from models.exceptions import exception_if_not_exists, OperationError
-from models.enumerations import Operation
+from models.enumerations import Bucket, Operation
+from models.models import DAILY_SUMMARIES, doctor_patient
+from schemas.schemas import Analize, SeriesStatistics
 
 
 def select_operation(operation: Operation, value: float):
@@ -32,10 +42,267 @@ def operation(patient_id: str, db: Session, operation: Operation, value: float,
     return result
 
 
+# Aggregates computed for each column by summary_aggregates
+AGGREGATES_PER_COLUMN = 5
+
+
+def summary_aggregates(summary, columns: list) -> list:
+    """Count of readings plus the count, minimum, maximum, mean and mean of the squares
+    of every column, merged from the daily summaries. The standard deviation is derived
+    from the last two, which works on every backend (SQLite has no STDDEV)."""
+    aggregates = [func.sum(summary.readings)]
+    for column in columns:
+        count = func.sum(getattr(summary, f"{column.key}_count"))
+        aggregates += [
+            count,
+            func.min(getattr(summary, f"{column.key}_min")),
+            func.max(getattr(summary, f"{column.key}_max")),
+            func.sum(getattr(summary, f"{column.key}_sum")) / count,
+            func.sum(getattr(summary, f"{column.key}_sumsq")) / count,
+        ]
+    return aggregates
+
+
+def analize_patients_stmt(
+    doctor_id: str,
+    columns: list,
+    model,
+    patient_ids: list[str] | None = None,
+    limit: int | None = None,
+    offset: int | None = None,
+):
+    """Statistics of every column for each patient of the doctor, with one GROUP BY
+    over the daily summaries.
+
+    Without `patient_ids` it covers all the doctor's patients; patients without
+    measurements are not returned.
+    """
+    summary = DAILY_SUMMARIES[model]
+    stmt = select(summary.patient_id, *summary_aggregates(summary, columns)).join(
+        doctor_patient,
+        and_(doctor_patient.c.patient_id == summary.patient_id, doctor_patient.c.doctor_id == doctor_id),
+    )
+    if patient_ids:
+        stmt = stmt.where(summary.patient_id.in_(patient_ids))
+    return stmt.group_by(summary.patient_id).order_by(summary.patient_id).limit(limit).offset(offset)
+
+
+def statistics_from_row(row, patient_id: str, columns: int) -> list[Analize]:
+    exception_if_not_exists(row[0], f"The patient with id {patient_id} has no records")
+    statistics = []
+    for index in range(columns):
+        start = 1 + index * AGGREGATES_PER_COLUMN
+        count, minimum, maximum, mean, mean_square = row[start : start + AGGREGATES_PER_COLUMN]
+        if not count:
+            statistics.append(Analize(count=0))
+            continue
+        mean = float(mean)
+        variance = max(float(mean_square) - mean * mean, 0.0)
+        statistics.append(
+            Analize(minimum=minimum, maximum=maximum, mean=mean, count=count, stddev=sqrt(variance))
+        )
+    return statistics
+
+
+def statistics_from_stats(stats: list, patient_id: str, columns: list) -> list[Analize]:
+    """Lifetime statistics of each column from the patient's accumulators (PatientStat)"""
+    exception_if_not_exists(stats, f"The patient with id {patient_id} has no records")
+    by_field = {stat.field: stat for stat in stats}
+    statistics = []
+    for column in columns:
+        stat = by_field.get(column.key)
+        if stat is None:
+            statistics.append(Analize(count=0))
+            continue
+        statistics.append(
+            Analize(
+                minimum=stat.minimum,
+                maximum=stat.maximum,
+                mean=stat.mean,
+                count=stat.count,
+                stddev=sqrt(stat.m2 / stat.count),
+            )
+        )
+    return statistics
+
+
+def analize_columns(patient_id: str, db: Session, columns: list, model) -> list[Analize]:
+    """Lifetime statistics of each column of the patient's measurements.
+
+    They are read from the running accumulators of cruds/patient_stats.py, one row per
+    column found by primary key, instead of aggregating the measurements. That read
+    is as cheap as the data version check of the analytics cache, so it is not cached.
+    """
+    stats = db.scalars(patient_stats_stmt(patient_id, model)).all()
+    return statistics_from_stats(stats, patient_id, columns)
+
+
+def analize_patients(
+    doctor_id: str,
+    db: Session,
+    columns: list,
+    model,
+    patient_ids: list[str] | None = None,
+    limit: int | None = None,
+    offset: int | None = None,
+) -> list[tuple[str, list[Analize]]]:
+    """Statistics of each column for a page of the doctor's patients, in a single query"""
+    stmt = analize_patients_stmt(doctor_id, columns, model, patient_ids, limit, offset)
+    return [(row[0], statistics_from_row(row[1:], row[0], len(columns))) for row in db.execute(stmt)]
+
+
+# Truncation of a date to the start of its hour, day or week (monday), as
+# 'YYYY-MM-DD HH:MM:SS' text. Each backend has its own date functions.
+
+
+class hour_bucket(FunctionElement):
+    type = String()
+    inherit_cache = True
+
+
+class day_bucket(FunctionElement):
+    type = String()
+    inherit_cache = True
+
+
+class week_bucket(FunctionElement):
+    type = String()
+    inherit_cache = True
+
+
+class interval_days(FunctionElement):
+    """MySQL `INTERVAL <days> DAY`"""
+
+    inherit_cache = True
+
+
+@compiles(interval_days, "mysql")
+def compile_interval_mysql(element, compiler, **kw):
+    (days,) = element.clauses
+    return f"INTERVAL {compiler.process(days, **kw)} DAY"
+
+
+BUCKETS = {Bucket.hour: hour_bucket, Bucket.day: day_bucket, Bucket.week: week_bucket}
+BUCKET_FORMATS = {hour_bucket: "%Y-%m-%d %H:00:00", day_bucket: "%Y-%m-%d 00:00:00", week_bucket: "%Y-%m-%d 00:00:00"}
+
+
+@compiles(hour_bucket, "sqlite")
+@compiles(day_bucket, "sqlite")
+def compile_bucket_sqlite(element, compiler, **kw):
+    (date,) = element.clauses
+    return compiler.process(func.strftime(literal(BUCKET_FORMATS[type(element)]), date), **kw)
+
+
+@compiles(week_bucket, "sqlite")
+def compile_week_sqlite(element, compiler, **kw):
+    (date,) = element.clauses
+    # Next sunday (or the same day) minus six days is the monday of the week
+    return compiler.process(
+        func.strftime(literal(BUCKET_FORMATS[week_bucket]), date, literal("weekday 0"), literal("-6 days")), **kw
+    )
+
+
+@compiles(hour_bucket, "mysql")
+@compiles(day_bucket, "mysql")
+def compile_bucket_mysql(element, compiler, **kw):
+    (date,) = element.clauses
+    return compiler.process(func.date_format(date, literal(BUCKET_FORMATS[type(element)])), **kw)
+
+
+@compiles(week_bucket, "mysql")
+def compile_week_mysql(element, compiler, **kw):
+    (date,) = element.clauses
+    monday = func.date_sub(date, interval_days(func.weekday(date)))
+    return compiler.process(func.date_format(monday, literal(BUCKET_FORMATS[week_bucket])), **kw)
+
+
+# Percentiles returned for every column of a series
+PERCENTILES = (("p25", 0.25), ("p50", 0.5), ("p75", 0.75))
+
+
+def series_stmt(
+    patient_id: str,
+    columns: list,
+    model,
+    bucket: Bucket,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+):
+    """Statistics of every column per time bucket, computed by the database.
+
+    The inner query tags each measurement with its bucket and its rank inside the
+    bucket for every column (window functions); the outer one groups by bucket and
+    picks the nearest-rank percentiles. NULL values sort first, so the rank of a
+    column discounts the NULLs of its bucket.
+    """
+    bucket_expression = BUCKETS[bucket](model.date)
+    window = {"partition_by": bucket_expression}
+    inner_columns = [bucket_expression.label("bucket"), func.count().over(**window).label("bucket_rows")]
+    for column in columns:
+        inner_columns += [
+            column.label(column.key),
+            func.row_number().over(order_by=column, **window).label(f"{column.key}_rank"),
+            func.count(column).over(**window).label(f"{column.key}_count"),
+        ]
+    inner = select(*inner_columns).where(model.patient_id == patient_id)
+    if date_from:
+        inner = inner.where(model.date >= date_from)
+    if date_to:
+        inner = inner.where(model.date <= date_to)
+    inner = inner.subquery()
+
+    outer_columns = [inner.c.bucket, func.count()]
+    for column in columns:
+        value = inner.c[column.key]
+        count = inner.c[f"{column.key}_count"]
+        rank = inner.c[f"{column.key}_rank"] - (inner.c.bucket_rows - count)
+        outer_columns += [func.count(value), func.min(value), func.max(value), func.avg(value), func.avg(value * value)]
+        outer_columns += [
+            func.max(case((and_(rank >= fraction * count, rank - 1 < fraction * count), value)))
+            for _, fraction in PERCENTILES
+        ]
+    return select(*outer_columns).group_by(inner.c.bucket).order_by(inner.c.bucket)
+
+
+def series_from_rows(rows, columns: int) -> list[tuple[datetime, int, list[SeriesStatistics]]]:
+    width = AGGREGATES_PER_COLUMN + len(PERCENTILES)
+    series = []
+    for row in rows:
+        statistics = []
+        for index in range(columns):
+            start = 2 + index * width
+            aggregates = row[start : start + AGGREGATES_PER_COLUMN]
+            percentiles = row[start + AGGREGATES_PER_COLUMN : start + width]
+            (analize,) = statistics_from_row((row[1], *aggregates), None, 1)
+            statistics.append(
+                SeriesStatistics(
+                    **analize.model_dump(), **{name: value for (name, _), value in zip(PERCENTILES, percentiles)}
+                )
+            )
+        series.append((datetime.fromisoformat(row[0]), row[1], statistics))
+    return series
+
+
+def make_series(
+    patient_id: str,
+    db: Session,
+    columns: list,
+    model,
+    bucket: Bucket,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+) -> list[tuple[datetime, int, list[SeriesStatistics]]]:
+    """Per-bucket statistics of each column of the patient's measurements, in a single query"""
+
+    def compute():
+        rows = db.execute(series_stmt(patient_id, columns, model, bucket, date_from, date_to))
+        return series_from_rows(rows, len(columns))
+
+    key = (model.__tablename__, "series", tuple(c.key for c in columns), bucket, date_from, date_to)
+    return cached_analytics(db, patient_id, key, compute)
+
+
 def make_analize(patient_id: str, db: Session, value: float, model):
     """De vuelve el mínimo, máximo y media"""
-
-    minimum = operation(patient_id, db, Operation.minimum, value, model)
-    maximum = operation(patient_id, db, Operation.maximum, value, model)
-    mean = operation(patient_id, db, Operation.mean, value, model)
-    return (minimum, maximum, mean)
+    (statistics,) = analize_columns(patient_id, db, [value], model)
+    return (statistics.minimum, statistics.maximum, statistics.mean)
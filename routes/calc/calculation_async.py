@@ -0,0 +1,17 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cruds.patient_stats import patient_stats_stmt
+from routes.calc.calculation import statistics_from_stats
+from schemas.schemas import Analize
+
+
+async def analize_columns(patient_id: str, db: AsyncSession, columns: list, model) -> list[Analize]:
+    """Lifetime statistics of each column of the patient's measurements, from its accumulators"""
+    stats = (await db.scalars(patient_stats_stmt(patient_id, model))).all()
+    return statistics_from_stats(stats, patient_id, columns)
+
+
+async def make_analize(patient_id: str, db: AsyncSession, value: float, model):
+    """De vuelve el mínimo, máximo y media"""
+    (statistics,) = await analize_columns(patient_id, db, [value], model)
+    return (statistics.minimum, statistics.maximum, statistics.mean)
@@ -0,0 +1,129 @@
+# Analytics that the databases cannot aggregate (percentiles, IQR, time in range),
+# computed with NumPy over the columns of a patient's measurements.
+from datetime import datetime
+from itertools import chain
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models.exceptions import exception_if_not_exists
+from models.models import BloodSugarLevel, CardiovascularParameter
+from routes.calc.cache import cached_analytics
+from schemas.schemas import BloodSugarExtended, CardiovascularExtended, ExtendedStatistics
+
+# Glucose target range in mmol/L (international consensus on time in range)
+GLUCOSE_RANGE = (3.9, 10.0)
+# Blood pressure load thresholds in mmHg
+SYSTOLIC_LIMIT = 140
+DIASTOLIC_LIMIT = 90
+
+
+def load_columns(
+    db: Session,
+    model,
+    patient_id: str,
+    columns: list,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+) -> np.ndarray:
+    """The patient's values of `columns` as a (readings, columns) float array, NULL as NaN.
+
+    Only those columns are selected and the tuples of the DBAPI cursor are streamed
+    into np.fromiter, so no ORM objects nor SQLAlchemy rows are built.
+    """
+    stmt = select(*columns).where(model.patient_id == patient_id)
+    if date_from:
+        stmt = stmt.where(model.date >= date_from)
+    if date_to:
+        stmt = stmt.where(model.date <= date_to)
+    result = db.connection().execute(stmt)
+    try:
+        values = np.fromiter(chain.from_iterable(result.cursor), dtype=np.float64)
+    finally:
+        result.close()
+    exception_if_not_exists(values.size, f"The patient with id {patient_id} has no records")
+    return values.reshape(-1, len(columns))
+
+
+def extended_statistics(values: np.ndarray) -> list[ExtendedStatistics]:
+    """Statistics of every column of the array, each one computed for all columns at once"""
+    counts = np.count_nonzero(~np.isnan(values), axis=0)
+    statistics = [ExtendedStatistics(count=0) for _ in range(values.shape[1])]
+    present = counts > 0
+    if not present.any():
+        return statistics
+
+    values = values[:, present]
+    mean = np.nanmean(values, axis=0)
+    stddev = np.nanstd(values, axis=0)
+    p25, median, p75 = np.nanpercentile(values, [25, 50, 75], axis=0)
+    minimum, maximum = np.nanmin(values, axis=0), np.nanmax(values, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cv = np.where(mean != 0, stddev / mean * 100, np.nan)
+
+    for position, index in enumerate(np.flatnonzero(present)):
+        statistics[index] = ExtendedStatistics(
+            count=int(counts[index]),
+            mean=float(mean[position]),
+            stddev=float(stddev[position]),
+            cv=None if np.isnan(cv[position]) else float(cv[position]),
+            minimum=float(minimum[position]),
+            p25=float(p25[position]),
+            median=float(median[position]),
+            p75=float(p75[position]),
+            iqr=float(p75[position] - p25[position]),
+            maximum=float(maximum[position]),
+        )
+    return statistics
+
+
+def percentage(mask: np.ndarray, total: int) -> float:
+    return float(np.count_nonzero(mask) * 100 / total) if total else 0.0
+
+
+def blood_sugar_extended(
+    db: Session, patient_id: str, date_from: datetime | None = None, date_to: datetime | None = None
+) -> BloodSugarExtended:
+    def compute():
+        values = load_columns(db, BloodSugarLevel, patient_id, [BloodSugarLevel.value], date_from, date_to)
+        (statistics,) = extended_statistics(values)
+        value = values[:, 0]
+        low, high = GLUCOSE_RANGE
+        return BloodSugarExtended(
+            value=statistics,
+            time_below_range=percentage(value < low, len(value)),
+            time_in_range=percentage((value >= low) & (value <= high), len(value)),
+            time_above_range=percentage(value > high, len(value)),
+        )
+
+    key = (BloodSugarLevel.__tablename__, "extended", date_from, date_to)
+    return cached_analytics(db, patient_id, key, compute)
+
+
+def blood_pressure_extended(
+    db: Session, patient_id: str, date_from: datetime | None = None, date_to: datetime | None = None
+) -> CardiovascularExtended:
+    def compute():
+        values = load_columns(
+            db,
+            CardiovascularParameter,
+            patient_id,
+            [CardiovascularParameter.systolic, CardiovascularParameter.diastolic, CardiovascularParameter.heart_rate],
+            date_from,
+            date_to,
+        )
+        systolic, diastolic, heart_rate = extended_statistics(values)
+        systolic_high = values[:, 0] >= SYSTOLIC_LIMIT
+        diastolic_high = values[:, 1] >= DIASTOLIC_LIMIT
+        return CardiovascularExtended(
+            systolic=systolic,
+            diastolic=diastolic,
+            heart_rate=heart_rate,
+            systolic_load=percentage(systolic_high, len(values)),
+            diastolic_load=percentage(diastolic_high, len(values)),
+            load=percentage(systolic_high | diastolic_high, len(values)),
+        )
+
+    key = (CardiovascularParameter.__tablename__, "extended", date_from, date_to)
+    return cached_analytics(db, patient_id, key, compute)
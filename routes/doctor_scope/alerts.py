@@ -0,0 +1,25 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query, Security
+from sqlalchemy.orm import Session
+
+from cruds.alerts import acknowledge_alerts
+from dependencies.dependencies import get_db
+from models.models import Doctor
+from routes.oauth import get_current_user
+
+
+router = APIRouter(prefix="/alerts", tags=["Alerts"])
+
+
+@router.put("/acknowledge")
+def acknowledge(
+    current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
+    alert_id: list[int] = Query(description="Alertas a confirmar"),
+    db: Session = Depends(get_db),
+):
+    """**Acknowledge alerts so they no longer appear in the warnings**
+
+    Only your own alerts are changed; returns how many were acknowledged.
+    """
+    return {"acknowledged": acknowledge_alerts(db, current_doctor.id, alert_id)}
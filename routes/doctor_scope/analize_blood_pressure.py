@@ -1,17 +1,24 @@
 from datetime import datetime, timedelta
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Security
+from fastapi import APIRouter, Depends, Query, Security
 from fastapi.responses import JSONResponse
-from sqlalchemy import select, or_
 from sqlalchemy.orm import Session
 
+from cruds.alerts import get_alerts
 from dependencies.dependencies import get_db
-from models.models import CardiovascularParameter, Doctor, Patient
-from schemas.schemas import AnalizeCardiovascular, Analize, WarningCardiovascularParameter
+from models.models import CardiovascularParameter, Doctor
+from models.enumerations import Bucket
+from schemas.schemas import (
+    AnalizeCardiovascular,
+    AnalizeCardiovascularPatient,
+    CardiovascularExtended,
+    CardiovascularSeriesBucket,
+    WarningCardiovascularParameter,
+)
 from routes.oauth import get_current_user
-from routes.calc.calculation import make_analize
-from models.exceptions import exception_if_not_exists
+from routes.calc.vectorized import blood_pressure_extended
+from routes.calc.calculation import analize_columns, analize_patients, make_series
 
 
 router = APIRouter(prefix="/analize", tags=["Analize"])
@@ -25,60 +32,115 @@ def analize(
 ):
     """**Get the mean, minimum and maximum value of blood pressure and heart rate**"""
 
-    minimum_systolic, maximum_systolic, mean_systolic = make_analize(
-        patient_id, db, CardiovascularParameter.systolic, CardiovascularParameter
+    systolic, diastolic, heart_rate = analize_columns(
+        patient_id,
+        db,
+        [CardiovascularParameter.systolic, CardiovascularParameter.diastolic, CardiovascularParameter.heart_rate],
+        CardiovascularParameter,
     )
-    minimum_diastolic, maximum_diastolic, mean_diastolic = make_analize(
-        patient_id, db, CardiovascularParameter.diastolic, CardiovascularParameter
-    )
-    minimum_heart_rate, maximum_heart_rate, mean_heart_rate = make_analize(
-        patient_id, db, CardiovascularParameter.heart_rate, CardiovascularParameter
+    return AnalizeCardiovascular(systolic=systolic, diastolic=diastolic, heart_rate=heart_rate)
+
+
+@router.get("/blood_pressure/patients", response_model=list[AnalizeCardiovascularPatient])
+def analize_patients_blood_pressure(
+    current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
+    patient_id: list[str] | None = Query(default=None, description="Pacientes a analizar, por defecto todos"),
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+):
+    """**Blood pressure and heart rate statistics of several of your patients at once**
+
+    Patients are ordered by id and paginated with _limit_ and _offset_; the ones without
+    measurements are left out.
+    """
+    patients = analize_patients(
+        current_doctor.id,
+        db,
+        [CardiovascularParameter.systolic, CardiovascularParameter.diastolic, CardiovascularParameter.heart_rate],
+        CardiovascularParameter,
+        patient_ids=patient_id,
+        limit=limit,
+        offset=offset,
     )
+    return [
+        AnalizeCardiovascularPatient(patient_id=id, systolic=systolic, diastolic=diastolic, heart_rate=heart_rate)
+        for id, (systolic, diastolic, heart_rate) in patients
+    ]
+
 
-    return AnalizeCardiovascular(
-        systolic=Analize(minimum=minimum_systolic, maximum=maximum_systolic, mean=mean_systolic),
-        diastolic=Analize(minimum=minimum_diastolic, maximum=maximum_diastolic, mean=mean_diastolic),
-        heart_rate=Analize(minimum=minimum_heart_rate, maximum=maximum_heart_rate, mean=mean_heart_rate),
+@router.get("/blood_pressure/series", response_model=list[CardiovascularSeriesBucket])
+def series_blood_pressure(
+    current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
+    patient_id: str,
+    bucket: Bucket = Bucket.day,
+    date_from: datetime | None = Query(default=None, alias="from", description="Fecha inicial (inclusive)"),
+    date_to: datetime | None = Query(default=None, alias="to", description="Fecha final (inclusive)"),
+    db: Session = Depends(get_db),
+):
+    """**Blood pressure and heart rate statistics per hour, day or week, for charts**
+
+    Each bucket has the count, minimum, maximum, mean, standard deviation and the 25th,
+    50th and 75th percentiles of every column. Weeks start on monday.
+    """
+    series = make_series(
+        patient_id,
+        db,
+        [CardiovascularParameter.systolic, CardiovascularParameter.diastolic, CardiovascularParameter.heart_rate],
+        CardiovascularParameter,
+        bucket,
+        date_from,
+        date_to,
     )
+    return [
+        CardiovascularSeriesBucket(start=start, count=count, systolic=systolic, diastolic=diastolic, heart_rate=heart_rate)
+        for start, count, (systolic, diastolic, heart_rate) in series
+    ]
+
+
+@router.get("/blood_pressure/extended", response_model=CardiovascularExtended)
+def extended_blood_pressure(
+    current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
+    patient_id: str,
+    date_from: datetime | None = Query(default=None, alias="from", description="Fecha inicial (inclusive)"),
+    date_to: datetime | None = Query(default=None, alias="to", description="Fecha final (inclusive)"),
+    db: Session = Depends(get_db),
+):
+    """**Median, IQR, coefficient of variation and load of blood pressure and heart rate**
+
+    The load is the percentage of readings with systolic >= 140 or diastolic >= 90 mmHg.
+    """
+    return blood_pressure_extended(db, patient_id, date_from, date_to)
 
 
 @router.get("/warning_cardiovascular_parameter", response_model=list[WarningCardiovascularParameter])
 def get_warning_patients(
     current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
-    systolic: int | None = 120,
-    diastolic: int | None = 80,
-    heart_rate: int | None = 100,
     day: int | None = 1,
     hours: int | None = 0,
+    limit: int = Query(default=100, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+    worst: bool = Query(default=False, description="Solo la medición más alta de cada paciente"),
     db: Session = Depends(get_db),
 ):
-    stmt = select(CardiovascularParameter).where(
-        CardiovascularParameter.date >= (datetime.now() - timedelta(days=day, hours=hours)),
-        or_(
-            CardiovascularParameter.systolic >= systolic,
-            CardiovascularParameter.diastolic >= diastolic,
-            CardiovascularParameter.heart_rate >= heart_rate,
-        ),
-    )
+    """**Unacknowledged blood pressure alerts of your patients in the last _day_ days and _hours_ hours**
 
-    patients_measures = db.scalars(stmt).all()
-
-    if not patients_measures:
+    Alerts are raised when a reading is saved with any value at or above its threshold.
+    Newest first; with _worst_ only the highest reading of each patient is returned.
+    Acknowledge them with `PUT /alerts/acknowledge`.
+    """
+    columns = [CardiovascularParameter.systolic, CardiovascularParameter.diastolic, CardiovascularParameter.heart_rate]
+    warnings = get_alerts(
+        db,
+        CardiovascularParameter,
+        columns,
+        columns,
+        doctor_id=current_doctor.id,
+        since=datetime.now() - timedelta(days=day, hours=hours),
+        worst_per_patient=worst,
+        limit=limit,
+        offset=offset,
+    )
+    if not warnings:
         return JSONResponse("No hay pacientes con problemas", status_code=404)
-    patient_dict = {}
-    patient_list = []
-    for measures in patients_measures:
-        stmt = select(Patient).where(Patient.id == measures.patient_id)
-        patient = db.scalars(stmt).first()
-        exception_if_not_exists(patient, "Paciente no encontrado")
-
-        patient_dict["patient_id"] = measures.patient_id
-        patient_dict["systolic"] = measures.systolic
-        patient_dict["diastolic"] = measures.diastolic
-        patient_dict["heart_rate"] = measures.heart_rate
-        patient_dict["date"] = measures.date
-        patient_dict["first_name"] = patient.first_name
-        patient_dict["last_name"] = patient.last_name
-        patient_list.append(WarningCardiovascularParameter(**patient_dict))
-
-    return patient_list
+    return [WarningCardiovascularParameter(**warning) for warning in warnings]
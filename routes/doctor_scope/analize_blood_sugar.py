@@ -1,17 +1,18 @@
 from datetime import datetime, timedelta
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Security
+from fastapi import APIRouter, Depends, Query, Security
 from fastapi.responses import JSONResponse
-from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from cruds.alerts import get_alerts
 from dependencies.dependencies import get_db
-from models.models import BloodSugarLevel, Doctor, Patient
-from schemas.schemas import Analize, WarningBloodSugar
+from models.models import BloodSugarLevel, Doctor
+from models.enumerations import Bucket
+from schemas.schemas import Analize, BloodSugarExtended, AnalizePatient, BloodSugarSeriesBucket, WarningBloodSugar
 from routes.oauth import get_current_user
-from routes.calc.calculation import make_analize
-from models.exceptions import exception_if_not_exists
+from routes.calc.vectorized import blood_sugar_extended
+from routes.calc.calculation import analize_columns, analize_patients, make_series
 
 router = APIRouter(prefix="/analize", tags=["Analize"])
 
@@ -26,39 +27,95 @@ def analize(
     **Get the mean, minimum and maximum value of blood sugar**
 
     """
-    minimum, maximum, mean = make_analize(patient_id, db, BloodSugarLevel.value, BloodSugarLevel)
-    return Analize(minimum=minimum, maximum=maximum, mean=mean)
+    (statistics,) = analize_columns(patient_id, db, [BloodSugarLevel.value], BloodSugarLevel)
+    return statistics
+
+
+@router.get("/blood_sugar/patients", response_model=list[AnalizePatient])
+def analize_patients_blood_sugar(
+    current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
+    patient_id: list[str] | None = Query(default=None, description="Pacientes a analizar, por defecto todos"),
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+):
+    """**Blood sugar statistics of several of your patients at once**
+
+    Patients are ordered by id and paginated with _limit_ and _offset_; the ones without
+    measurements are left out.
+    """
+    patients = analize_patients(
+        current_doctor.id,
+        db,
+        [BloodSugarLevel.value],
+        BloodSugarLevel,
+        patient_ids=patient_id,
+        limit=limit,
+        offset=offset,
+    )
+    return [AnalizePatient(patient_id=id, **statistics.model_dump()) for id, (statistics,) in patients]
+
+
+@router.get("/blood_sugar/series", response_model=list[BloodSugarSeriesBucket])
+def series_blood_sugar(
+    current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
+    patient_id: str,
+    bucket: Bucket = Bucket.day,
+    date_from: datetime | None = Query(default=None, alias="from", description="Fecha inicial (inclusive)"),
+    date_to: datetime | None = Query(default=None, alias="to", description="Fecha final (inclusive)"),
+    db: Session = Depends(get_db),
+):
+    """**Blood sugar statistics per hour, day or week, for charts**
+
+    Each bucket has the count, minimum, maximum, mean, standard deviation and the 25th,
+    50th and 75th percentiles. Weeks start on monday.
+    """
+    series = make_series(patient_id, db, [BloodSugarLevel.value], BloodSugarLevel, bucket, date_from, date_to)
+    return [BloodSugarSeriesBucket(start=start, count=count, value=value) for start, count, (value,) in series]
+
+
+@router.get("/blood_sugar/extended", response_model=BloodSugarExtended)
+def extended_blood_sugar(
+    current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
+    patient_id: str,
+    date_from: datetime | None = Query(default=None, alias="from", description="Fecha inicial (inclusive)"),
+    date_to: datetime | None = Query(default=None, alias="to", description="Fecha final (inclusive)"),
+    db: Session = Depends(get_db),
+):
+    """**Median, IQR, coefficient of variation and time in range of blood sugar**
+
+    Time in range is the percentage of readings between 3.9 and 10.0 mmol/L.
+    """
+    return blood_sugar_extended(db, patient_id, date_from, date_to)
 
 
 @router.get("/warning_blood_sugar", response_model=list[WarningBloodSugar])
 def get_warning_patients(
     current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
-    value: float | None = 6.1,
     day: int | None = 1,
     hours: int | None = 0,
+    limit: int = Query(default=100, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+    worst: bool = Query(default=False, description="Solo la medición más alta de cada paciente"),
     db: Session = Depends(get_db),
 ):
-    stmt = select(BloodSugarLevel).where(
-        BloodSugarLevel.value >= value,
-        BloodSugarLevel.date >= (datetime.now() - timedelta(days=day, hours=hours)),
-    )
+    """**Unacknowledged blood sugar alerts of your patients in the last _day_ days and _hours_ hours**
 
-    patients_measures = db.scalars(stmt).all()
-
-    if not patients_measures:
+    Alerts are raised when a reading is saved at or above the threshold. Newest first;
+    with _worst_ only the highest reading of each patient is returned. Acknowledge them
+    with `PUT /alerts/acknowledge`.
+    """
+    warnings = get_alerts(
+        db,
+        BloodSugarLevel,
+        [BloodSugarLevel.value],
+        [BloodSugarLevel.value],
+        doctor_id=current_doctor.id,
+        since=datetime.now() - timedelta(days=day, hours=hours),
+        worst_per_patient=worst,
+        limit=limit,
+        offset=offset,
+    )
+    if not warnings:
         return JSONResponse("No hay pacientes con problemas", status_code=404)
-    patient_dict = {}
-    patient_list = []
-    for measures in patients_measures:
-        stmt = select(Patient).where(Patient.id == measures.patient_id)
-        patient = db.scalars(stmt).first()
-        exception_if_not_exists(patient, "Paciente no encontrado")
-
-        patient_dict["patient_id"] = measures.patient_id
-        patient_dict["value"] = measures.value
-        patient_dict["date"] = measures.date
-        patient_dict["first_name"] = patient.first_name
-        patient_dict["last_name"] = patient.last_name
-        patient_list.append(WarningBloodSugar(**patient_dict))
-
-    return patient_list
+    return [WarningBloodSugar(**warning) for warning in warnings]
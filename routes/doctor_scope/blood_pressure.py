@@ -1,8 +1,11 @@
+from datetime import datetime
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Security
+from fastapi import APIRouter, Depends, Query, Security
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
+from models.enumerations import FileFormat
 from models.models import Doctor
 from models.models import CardiovascularParameter as cvpm
 from dependencies.dependencies import get_db
@@ -11,10 +14,14 @@ from schemas.schemas import (
     CardiovascularParameterOutList,
     CardiovascularParameterUpdate,
     CardiovascularParameterOut,
+    BulkMeasurementResult,
 )
 from routes.oauth import get_current_user
 from cruds.measures import (
     add_measurement,
+    add_measurements_bulk,
+    check_has_measurements,
+    export_measurements,
     get_all_measurements,
     delete_measurements,
     update_measurement,
@@ -51,14 +58,37 @@ def add(
     return add_measurement(measurement, current_doctor.id, model_db=cvpm, db=db)
 
 
-@router.get("/{patient_id}", response_model=CardiovascularParameterOut)
+@router.post("/bulk", response_model=BulkMeasurementResult)
+def add_bulk(
+    current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
+    measurements: list[CardiovascularParameter],
+    db: Session = Depends(get_db),
+):
+    """**Adds a batch of measurements of the main cardiovascular parameters**
+
+    Measurements already registered are skipped and invalid ones are rejected,
+    the response reports the result of each one by its position in the list.
+    """
+    return add_measurements_bulk(measurements, current_doctor.id, model_db=cvpm, db=db)
+
+
+@router.get("/{patient_id}", response_model=CardiovascularParameterOutList)
 def get(
     current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
     patient_id: str,
+    date_from: datetime | None = Query(default=None, alias="from", description="Fecha inicial (inclusive)"),
+    date_to: datetime | None = Query(default=None, alias="to", description="Fecha final (inclusive)"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: str | None = Query(default=None, description="next_cursor de la página anterior"),
     db: Session = Depends(get_db),
 ):
-    """**Obtains all measurements of the patient's cardiovascular parameters**"""
-    measurements = get_all_measurements(patient_id, model_db=cvpm, db=db)
+    """**Obtains the patient's cardiovascular measurements**, a page at a time ordered by date
+
+    Pass the _next_cursor_ of a response as _cursor_ to get the following page.
+    """
+    measurements, next_cursor = get_all_measurements(
+        patient_id, model_db=cvpm, db=db, date_from=date_from, date_to=date_to, limit=limit, cursor=cursor
+    )
     return CardiovascularParameterOutList(
         patient_id=patient_id,
         measures=[
@@ -67,9 +97,31 @@ def get(
                 diastolic=measurement.diastolic,
                 heart_rate=measurement.heart_rate,
                 date=measurement.date,
+                doctor_id=measurement.doctor_id,
             )
             for measurement in measurements
         ],
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/{patient_id}/export")
+def export(
+    current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
+    patient_id: str,
+    file_format: FileFormat = Query(default=FileFormat.ndjson, alias="format"),
+    db: Session = Depends(get_db),
+):
+    """**Downloads the full history of the patient's cardiovascular parameters** as NDJSON or CSV
+
+    The file is streamed while it is read from the database.
+    """
+    check_has_measurements(patient_id, model_db=cvpm, db=db)
+    columns = ["date", "systolic", "diastolic", "heart_rate", "doctor_id"]
+    return StreamingResponse(
+        export_measurements(patient_id, cvpm, columns, file_format),
+        media_type="text/csv" if file_format == FileFormat.csv else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="blood_pressure_{patient_id}.{file_format.value}"'},
     )
 
 
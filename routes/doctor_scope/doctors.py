@@ -2,6 +2,7 @@ from typing import Annotated
 import os
 
 from fastapi import APIRouter, Depends, Request, status, Security
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 from sqlalchemy import select, update, delete, distinct, func
 from sqlalchemy.orm import Session
@@ -11,7 +12,7 @@ from models.models import Email, Doctor, doctor_patient
 from schemas.schemas import EmailSchema, DoctorIn, DoctorOut, DoctorUp
 
 
-from routes.oauth import get_password_hash, get_current_user, verify_password
+from routes.oauth import get_password_hash, get_current_user, verify_password, invalidate_user
 from sendemail.sendemail import send_email
 from models.exceptions import exception_if_already_exists
 
@@ -92,11 +93,11 @@ def update_doctor_info(new_data: str | int | None, current_data: str | int | Non
     return new_data
 
 
-def update_password(new_password, old_password):
+async def update_password(new_password, old_password):
     if new_password:
-        if not verify_password(new_password, old_password):
+        if not await verify_password(new_password, old_password):
             # Si es la misma contraseña no la sobreescribe en la base de datos
-            return get_password_hash(update_doctor_info(new_password, old_password))
+            return await get_password_hash(update_doctor_info(new_password, old_password))
     return old_password
 
 
@@ -118,17 +119,8 @@ def get_url_photo(doctor: Doctor, request: Request, db: Session, end_point: str)
     return
 
 
-@router.post("", status_code=status.HTTP_201_CREATED)
-def register_doctor(doctor: DoctorIn, db: Session = Depends(get_db)):
-    """**Register a new doctor**
-
-    If you submit an email address, a verification code will be sent to your inbox.
-    """
-    doctor_db = get_doctor_by_id(doctor.id, db)
-    exception_if_already_exists(doctor_db, {"detail": "Doctor already exists", "id": doctor.id})
-    doctor_bd = doctor.__dict__
-    doctor_bd.update(password=get_password_hash(doctor_bd["password"]))
-
+def save_doctor(doctor_bd: dict, db: Session):
+    """Stores the new doctor and its email, sending the verification code"""
     if doctor_bd["email_address"]:
         code = send_email(doctor_bd["first_name"], doctor_bd["email_address"])
         email = EmailSchema(
@@ -141,6 +133,31 @@ def register_doctor(doctor: DoctorIn, db: Session = Depends(get_db)):
     del doctor_bd["email_address"]
     db.add(Doctor(**doctor_bd))
     db.commit()
+
+
+def save_doctor_update(current_doctor: Doctor, doctor: DoctorUp, updated_data: dict, db: Session):
+    updated_data["portrait"] = update_photo_name(current_doctor, new_id=doctor.id, db=db)
+    if doctor.id or doctor.email_address:
+        update_doctor_email(doctor.email_address, current_doctor, db, doctor.id)
+
+    stmt = update(Doctor).where(Doctor.id == current_doctor.id).values(**updated_data)
+    db.execute(stmt)
+    db.commit()
+
+
+# The endpoints that hash passwords are coroutines: they await bcrypt in the password pool
+# and run their database work in the threadpool, so no request thread waits on bcrypt
+@router.post("", status_code=status.HTTP_201_CREATED)
+async def register_doctor(doctor: DoctorIn, db: Session = Depends(get_db)):
+    """**Register a new doctor**
+
+    If you submit an email address, a verification code will be sent to your inbox.
+    """
+    doctor_db = await run_in_threadpool(get_doctor_by_id, doctor.id, db)
+    exception_if_already_exists(doctor_db, {"detail": "Doctor already exists", "id": doctor.id})
+    doctor_bd = doctor.__dict__
+    doctor_bd.update(password=await get_password_hash(doctor_bd["password"]))
+    await run_in_threadpool(save_doctor, doctor_bd, db)
     return JSONResponse(content={"message": "Doctor registration successful", "id": doctor.id})
 
 
@@ -167,7 +184,7 @@ def get_doctor(
 
 
 @router.put("", status_code=status.HTTP_200_OK)
-def update_doctor(
+async def update_doctor(
     current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
     doctor: DoctorUp,
     db: Session = Depends(get_db),
@@ -186,15 +203,9 @@ def update_doctor(
     updated_data["first_name"] = update_doctor_info(doctor.first_name, current_doctor.first_name)
     updated_data["last_name"] = update_doctor_info(doctor.last_name, current_doctor.last_name)
     updated_data["specialty"] = update_doctor_info(doctor.specialty, current_doctor.specialty)
-    updated_data["portrait"] = update_photo_name(current_doctor, new_id=doctor.id, db=db)
-    updated_data["password"] = update_password(doctor.password, current_doctor.password)
-
-    if doctor.id or doctor.email_address:
-        update_doctor_email(doctor.email_address, current_doctor, db, doctor.id)
-
-    stmt = update(Doctor).where(Doctor.id == current_doctor.id).values(**updated_data)
-    db.execute(stmt)
-    db.commit()
+    updated_data["password"] = await update_password(doctor.password, current_doctor.password)
+    await run_in_threadpool(save_doctor_update, current_doctor, doctor, updated_data, db)
+    invalidate_user(current_doctor.id, doctor.id)
     return JSONResponse({"message": "Doctor data was updated successfully."})
 
 
@@ -209,4 +220,5 @@ def delete_doctor(
     stmt = delete(Doctor).where(Doctor.id == current_doctor.id)
     db.execute(stmt)
     db.commit()
+    invalidate_user(current_doctor.id)
     return JSONResponse({"message": f"Doctor with ID {current_doctor.id} has been successfully deleted."})
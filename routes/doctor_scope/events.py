@@ -0,0 +1,48 @@
+import json
+from typing import Annotated
+
+from fastapi import APIRouter, Request, Security
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+
+from cruds.measures import broker
+from models.models import Doctor
+from routes.oauth import get_current_user_short_session
+
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+# Seconds without events after which a comment is sent, so proxies keep the connection open
+KEEP_ALIVE = 15
+
+
+async def event_stream(request: Request, doctor_id: str):
+    subscription = broker.subscribe(doctor_id)
+    try:
+        yield "retry: 5000\n\n"
+        while not await request.is_disconnected():
+            event = await subscription.get(KEEP_ALIVE)
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(jsonable_encoder(event))}\n\n"
+    finally:
+        broker.unsubscribe(doctor_id, subscription)
+
+
+@router.get("")
+async def get_events(
+    current_doctor: Annotated[Doctor, Security(get_current_user_short_session, scopes=["doctor"])],
+    request: Request,
+):
+    """**Server-Sent Events with the new readings and alerts of your patients as they are saved**
+
+    Event types: `measurement` (a new reading), `alert` (a reading over the thresholds)
+    and `measurements_changed` (readings of a patient were updated or deleted). A client
+    that falls behind loses the oldest events of its queue rather than slowing the writes.
+    """
+    return StreamingResponse(
+        event_stream(request, current_doctor.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
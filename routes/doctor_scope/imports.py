@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, File, Security, UploadFile, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from dependencies.dependencies import get_db
+from models.enumerations import FileFormat
+from models.exceptions import exception_if_not_exists
+from models.models import Doctor
+from models.models import BloodSugarLevel as bsl
+from models.models import CardiovascularParameter as cvpm
+from routes.oauth import get_current_user
+from schemas.schemas import BloodSugarLevel, CardiovascularParameter, ImportJobOut
+from cruds.imports import get_import_job, start_import
+
+
+router = APIRouter(prefix="/import", tags=["Import"])
+
+
+def save_upload(file: UploadFile, file_format: FileFormat | None) -> tuple[str, FileFormat]:
+    """Copies the upload to a temporary file in blocks, so memory does not grow with its size"""
+    if file_format is None:
+        extension = os.path.splitext(file.filename or "")[1].lower()
+        file_format = FileFormat.ndjson if extension in (".ndjson", ".jsonl") else FileFormat.csv
+    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_format.value}") as temporary:
+        shutil.copyfileobj(file.file, temporary, 1024 * 1024)
+    return temporary.name, file_format
+
+
+def accepted(job_id: str):
+    return JSONResponse(
+        {"job_id": job_id, "status_url": f"{router.prefix}/{job_id}"},
+        status_code=status.HTTP_202_ACCEPTED,
+    )
+
+
+@router.post("/blood_pressure", status_code=status.HTTP_202_ACCEPTED)
+def import_blood_pressure(
+    current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
+    file: UploadFile = File(...),
+    file_format: FileFormat | None = None,
+):
+    """**Imports a CSV or NDJSON file of cardiovascular measurements**
+
+    Columns/keys: patient_id, date, systolic, diastolic and heart_rate. The format is taken
+    from the file extension unless _file_format_ is set. The file is processed in the
+    background, follow its progress in the returned _status_url_.
+    """
+    path, file_format = save_upload(file, file_format)
+    job = start_import(path, file_format, "blood_pressure", CardiovascularParameter, cvpm, current_doctor.id)
+    return accepted(job.status.id)
+
+
+@router.post("/blood_sugar", status_code=status.HTTP_202_ACCEPTED)
+def import_blood_sugar(
+    current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
+    file: UploadFile = File(...),
+    file_format: FileFormat | None = None,
+):
+    """**Imports a CSV or NDJSON file of blood sugar measurements**
+
+    Columns/keys: patient_id, date and value. The format is taken from the file extension
+    unless _file_format_ is set. The file is processed in the background, follow its
+    progress in the returned _status_url_.
+    """
+    path, file_format = save_upload(file, file_format)
+    job = start_import(path, file_format, "blood_sugar", BloodSugarLevel, bsl, current_doctor.id)
+    return accepted(job.status.id)
+
+
+@router.get("/{job_id}", response_model=ImportJobOut)
+def get_import(
+    current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
+    job_id: str,
+    db: Session = Depends(get_db),
+):
+    """**Status of an import**"""
+    job = get_import_job(db, job_id, current_doctor.id)
+    exception_if_not_exists(job, "This import does not exist.")
+    return job
@@ -3,17 +3,21 @@ from random import randint
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, Query, Security, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.exceptions import HTTPException
 from fastapi.responses import JSONResponse
-from sqlalchemy import asc, between, delete, desc, distinct, func, select, update
+from sqlalchemy import delete, select, update
 from sqlalchemy.orm import Session
 
+from cruds.patient_filters import get_patient_list, parse_filter
+from cruds.patient_search import search_patients, with_search_columns
 from dependencies.dependencies import get_db
 from models.enumerations import FilterBy, Order, SortBy
 from models.exceptions import exception_if_already_exists, exception_if_not_exists
-from models.models import Address, Doctor, Patient, doctor_patient
-from routes.oauth import get_current_user
+from models.models import Address, Doctor, Patient, PatientLatestVitals, doctor_patient
+from routes.oauth import get_current_user, invalidate_user
 from schemas.schemas import PatientSchema, PatientSchemeList, PatientUp
+from schemas.schemas import PatientLatestVitals as PatientLatestVitalsOut
 
 from ..oauth import get_password_hash
 
@@ -72,65 +76,69 @@ def patient_exist_alert(patient: dict):
         )
 
 
-def choice_filter(
-    filter_by, range: list[int] | None = None, birth_date: list[datetime] | None = None, value: int | str = None
-):
-    match filter_by:
-        case "first name":
-            filter = Patient.first_name == value
-        case "last name":
-            filter = Patient.last_name == value
-        case "birth date":
-            if value:
-                filter = Patient.birth_date = value
-            else:
-                filter = between(Patient.birth_date, birth_date[0], birth_date[1])
-        case "height":
-            if value:
-                filter = Patient.height = value
-            else:
-                filter = between(Patient.height, range[0], range[1])
-        case "weight":
-            if value:
-                filter = Patient.weight = value
-            else:
-                filter = between(Patient.weight, range[0], range[1])
-        case "scholing":
-            filter = Patient.scholing == value
-        case "employee":
-            filter = Patient.employee == value
-        case SortBy.married:
-            filter = Patient.married == value
-        case "gender":
-            filter = Patient.gender == value
-    return filter
-
-
-def choice_order_by(order_by):
-    match order_by:
-        case "first name":
-            filter = Patient.first_name
-        case "last name":
-            filter = Patient.last_name
-        case "birth date":
-            filter = Patient.birth_date
-        case "height":
-            filter = Patient.height
-        case "weight":
-            filter = Patient.weight
-        case "scholing":
-            filter = Patient.scholing
-        case "employee":
-            filter = Patient.employee
-        case SortBy.married:
-            filter = Patient.married
-        case "gender":
-            filter = Patient.gender
-    return filter
+def patient_out(patient: Patient) -> PatientSchema:
+    """Public data of a patient with its address, without the password hash"""
+    fields = [field for field in PatientSchema.model_fields if field not in ("password", "address")]
+    data = {field: getattr(patient, field) for field in fields}
+    data["address"] = patient.address.address if patient.address else None
+    return PatientSchema(**data)
+
+
+def legacy_filter(filter_by, value, range_min, range_max, birth_date_min, birth_date_max) -> str | None:
+    """The single filter of filter_by/value/range_*/birth_date_* in field:operation:value form"""
+    if filter_by is None:
+        return None
+    if value is not None:
+        return f"{filter_by.value}:eq:{value}"
+    if filter_by == FilterBy.birth_date and (birth_date_min or birth_date_max):
+        low, high = (bound.isoformat() if bound else "" for bound in (birth_date_min, birth_date_max))
+        return f"{filter_by.value}:range:{low},{high}"
+    if range_min is not None or range_max is not None:
+        low, high = ("" if bound is None else bound for bound in (range_min, range_max))
+        return f"{filter_by.value}:range:{low},{high}"
+    return None
+
+
+def save_new_patient(patient: PatientSchema, password: str, password_hash: str, doctor_id: str, db: Session):
+    patient_dict = patient.model_dump(exclude_unset=True)
+    patient_dict = check_and_add_address(patient_dict, db)
+    patient_dict["password"] = password_hash
+    db.add(Patient(**with_search_columns(patient_dict)))
+    return add_patient_bd(patient_dict["id"], password, doctor_id, db)
 
 
+def save_patient_update(patient_dict: dict, patient_db: Patient, doctor_id: str, db: Session):
+    if patient_dict.get("address"):
+        address_db = db.scalars(select(Address).where(Address.address == patient_dict["address"])).first()
+        if not address_db:
+            address = Address(address=patient_dict["address"])
+            db.add(address)
+            db.flush()
+            patient_dict["address_id"] = address.id
+        else:
+            patient_dict["address_id"] = address_db.id
+    else:
+        stmt = select(Address).where(Address.id == patient_db.address_id)
+        address = db.scalars(stmt).first()
+        patient_dict["address"] = address.id
+    del patient_dict["address"]
+    with_search_columns(patient_dict, patient_db)
+
+    stmt = update(Patient).where(Patient.id == patient_db.id).values(**patient_dict)
+    if patient_dict.get("id"):
+        db.execute(
+            doctor_patient.update()
+            .where(doctor_patient.c.patient_id == patient_db.id)
+            .values(patient_id=patient_dict["id"], doctor_id=doctor_id)
+        )
+    db.execute(stmt)
+    db.commit()
+
+
+# The endpoints that hash passwords are coroutines: they await bcrypt in the password pool
+# and run their database work in the threadpool, so no request thread waits on bcrypt
 @router.post("")
-def add_patient(
+async def add_patient(
     current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
     patient: PatientSchema,
     isExist: bool = False,
@@ -145,41 +153,44 @@ def add_patient(
     in None the parameter _patient_
 
     """
-    result = get_patient_by_id_and_doctor_id(patient.id, current_doctor.id, db)
+    result = await run_in_threadpool(get_patient_by_id_and_doctor_id, patient.id, current_doctor.id, db)
     exception_if_already_exists(result, "This patient already exists.")
 
     if isExist:
-        patient_db = get_patient_by_id(patient_id, db)
+        patient_db = await run_in_threadpool(get_patient_by_id, patient_id, db)
         exception_if_not_exists(patient_db, "This patient does not exist.")
-        return add_patient_bd(patient_id, None, current_doctor.id, db)
+        return await run_in_threadpool(add_patient_bd, patient_id, None, current_doctor.id, db)
     else:
-        patient_db = get_patient_by_id(patient.id, db)
+        patient_db = await run_in_threadpool(get_patient_by_id, patient.id, db)
         patient_exist_alert(patient_db)
-        patient_dict = patient.model_dump(exclude_unset=True)
-        patient_dict = check_and_add_address(patient_dict, db)
-        password = patient_dict["first_name"] + "_" + str(randint(10_000, 99_999))
-        patient_dict["password"] = get_password_hash(password)
-        db.add(Patient(**patient_dict))
-        return add_patient_bd(patient_dict["id"], password, current_doctor.id, db)
+        password = patient.first_name + "_" + str(randint(10_000, 99_999))
+        password_hash = await get_password_hash(password)
+        return await run_in_threadpool(save_new_patient, patient, password, password_hash, current_doctor.id, db)
 
 
 @router.get("", response_model=PatientSchemeList)
 def get_patient(
     current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
-    filter_by: FilterBy = "first_name",
+    filter: list[str] = Query(
+        default=[],
+        description="Filtros con la forma campo:operación:valor, se pueden repetir y se aplican todos. "
+        "Operaciones: eq, in (valores separados por comas), prefix y range (min,max; un límite puede quedar vacío).",
+        examples=["height:range:170,190"],
+    ),
+    filter_by: FilterBy | None = None,
     value: int | str | datetime = None,
     range_min: int | None = None,
     range_max: int | None = None,
-    birth_date_min: datetime = Query(
+    birth_date_min: datetime | None = Query(
         description="Establece el limite inferior de un rango  de fecha para filtrar por fecha.",
-        default=datetime(1950, 1, 1),
+        default=None,
     ),
-    birth_date_max: datetime = Query(
+    birth_date_max: datetime | None = Query(
         description="Establece el limite superior de un rango  de fecha para filtrar por fecha.",
-        default=datetime(2025, 1, 1),
+        default=None,
     ),
-    order_by: SortBy = "last name",
-    order: Order = "asc",
+    order_by: SortBy = SortBy.last_name,
+    order: Order = Order.asc,
     limit: int | None = None,
     offset: int | None = None,
     db: Session = Depends(get_db),
@@ -188,15 +199,13 @@ def get_patient(
 
     *Args:*
 
-        filter_by: Criterio de filtrado (obligatorio). Puede ser: first_name, last_name, birth_date, gender, height, weight, scholing, employee o married. Por defecto es first_name.
-
-        value: Valor a aplicar al filtro (opcional). Puede ser un número entero, una cadena de texto o una fecha. Si se configura, se ignorara el filtrado por rango.
+        filter: Filtros con la forma campo:operación:valor (opcional, repetible). Los campos son: first_name, last_name, birth_date, gender, height, weight, scholing, employee y married.
+        Operaciones: eq (igual), in (uno de varios valores separados por comas), prefix (empieza por, solo nombres) y range (min,max para birth_date, height y weight; uno de los límites puede quedar vacío).
+        Ejemplo: ?filter=gender:eq:female&filter=height:range:170,190&filter=last_name:prefix:Her
 
-        range_min y range_max: Límites inferior y superior para filtrar por rango de valores (opcional).
+        filter_by, value, range_min, range_max, birth_date_min y birth_date_max: Forma anterior de un solo filtro (opcional). Con value se filtra por igualdad y sin él por rango. Se combina con los de filter.
 
-        birth_date_min y birth_date_max: Límites inferior y superior para filtrar por rango de fechas de nacimiento (opcional). Por defecto, el límite inferior es el 1 de enero de 1950 y el límite superior es el 1 de enero de 2025.
-
-        order_by: Criterio de ordenamiento (opcional). Puede ser: first_name, last_name, birth_date, gender, height, weight, scholing, employee o married. Por defecto es last name.
+        order_by: Criterio de ordenamiento (opcional). Puede ser: first_name, last_name, birth_date, gender, height, weight, employee o married. Por defecto es last_name.
 
         order: Orden de ordenamiento (opcional). Puede ser asc (ascendente) o desc (descendente). Por defecto es asc.
 
@@ -206,47 +215,70 @@ def get_patient(
 
         Descripción:
 
-        Este endpoint devuelve una lista de pacientes que coinciden con los criterios de filtrado y ordenamiento especificados. Si no se proporciona ningún parámetro de consulta, se devuelve la lista completa de pacientes.
+        Este endpoint devuelve una lista de pacientes que coinciden con todos los filtros y en el orden especificado. Si no se proporciona ningún filtro, se devuelve la lista completa de pacientes.
 
     """
-    filter = choice_filter(
-        filter_by, range=[range_min, range_max], birth_date=[birth_date_min, birth_date_max], value=value
-    )
-    order_critery = choice_order_by(order_by)
+    filters = [parse_filter(text) for text in filter]
+    legacy = legacy_filter(filter_by, value, range_min, range_max, birth_date_min, birth_date_max)
+    if legacy:
+        filters.append(parse_filter(legacy))
 
-    len = (
-        db.query(func.count(distinct(Patient.id)))
-        .select_from(Patient)
-        .where(Doctor.id == current_doctor.id, filter)
-        .scalar()
-    )
+    rows = get_patient_list(db, current_doctor.id, filters, order_by.value, order.value, limit, offset)
+    exception_if_not_exists(rows, "Patients no fount")
+    return PatientSchemeList(len=rows[0].total, patients=[patient_out(patient) for patient, _ in rows])
 
-    order_query = asc
-    if order == "desc":
-        order_query = desc
 
-    stmt = (
-        select(Patient)
-        .join(Patient.doctors)
-        .where(Doctor.id == current_doctor.id, filter)
-        .order_by(order_query(order_critery))
-        .offset(offset)
-        .limit(limit)
-    )
+# Declared before /{patient_id}, which would take "search" as an id
+@router.get("/search", response_model=PatientSchemeList)
+def search_patient(
+    current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
+    q: str = Query(
+        min_length=1, description="Nombre, apellidos o el comienzo de ellos, sin importar tildes ni mayúsculas"
+    ),
+    limit: int | None = Query(default=20, ge=1),
+    db: Session = Depends(get_db),
+):
+    """**Search your patients by name**
+
+    Case and accent insensitive. Returns the patients whose full name (first name or last
+    name first) starts with _q_, an exact name first, found through the indexes of the
+    search columns. Only when there is none, it looks through all your patients for those
+    where every word of _q_ starts some word of the name.
+    """
+    rows = search_patients(db, current_doctor.id, q, limit)
+    exception_if_not_exists(rows, "Patients no fount")
+    return PatientSchemeList(len=rows[0].total, patients=[patient_out(patient) for patient, _ in rows])
 
-    patients_db = db.scalars(stmt).all()
-    exception_if_not_exists(patients_db, "Patients no fount")
 
-    patients_list = []
-    for patient_db in patients_db:
-        patient_db = patient_db.__dict__
-        if patient_db.get("address_id"):
-            stmt = select(Address).where(Address.id == patient_db.get("address_id"))
-            address = db.scalars(stmt).first()
-            if address:
-                patient_db["address"] = address.address
-        patients_list.append(PatientSchema(**patient_db))
-    return PatientSchemeList(len=len, patients=patients_list)
+# Declared before /{patient_id}, which would take "latest_vitals" as an id
+@router.get("/latest_vitals", response_model=list[PatientLatestVitalsOut])
+def get_latest_vitals(
+    current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
+    db: Session = Depends(get_db),
+):
+    """**Last blood pressure, heart rate and blood sugar of all your patients, and when they were taken**
+
+    One query over the patient_latest_vitals table, kept up to date with every
+    measurement write. Patients without readings have empty values.
+    """
+    stmt = (
+        select(
+            Patient.id.label("patient_id"),
+            Patient.first_name,
+            Patient.last_name,
+            PatientLatestVitals.blood_pressure_date,
+            PatientLatestVitals.systolic,
+            PatientLatestVitals.diastolic,
+            PatientLatestVitals.heart_rate,
+            PatientLatestVitals.blood_sugar_date,
+            PatientLatestVitals.blood_sugar,
+        )
+        .join(doctor_patient, doctor_patient.c.patient_id == Patient.id)
+        .outerjoin(PatientLatestVitals, PatientLatestVitals.patient_id == Patient.id)
+        .where(doctor_patient.c.doctor_id == current_doctor.id)
+        .order_by(Patient.last_name, Patient.first_name, Patient.id)
+    )
+    return [PatientLatestVitalsOut(**row) for row in db.execute(stmt).mappings()]
 
 
 @router.get("/{patient_id}", response_model=PatientSchema)
@@ -267,7 +299,7 @@ def get_patient(
 
 
 @router.put("")
-def update_patient(
+async def update_patient(
     current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
     patient_id: str,
     patient: PatientUp,
@@ -283,8 +315,7 @@ def update_patient(
 
         patient_id (str): Patient id.
     """
-    stmt = select(Patient).join(Patient.doctors).where(Patient.id == patient_id, Doctor.id == current_doctor.id)
-    patient_db = db.scalars(stmt).first()
+    patient_db = await run_in_threadpool(get_patient_by_id_and_doctor_id, patient_id, current_doctor.id, db)
     if not patient_db:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -296,31 +327,9 @@ def update_patient(
         patient.first_name = patient_db.first_name
 
     patient_dict = patient.model_dump(exclude_unset=True)
-    patient_dict["password"] = get_password_hash(patient_dict["password"])
-    if patient_dict.get("address"):
-        address_db = db.scalars(select(Address).where(Address.address == patient_dict["address"])).first()
-        if not address_db:
-            address = Address(address=patient_dict["address"])
-            db.add(address)
-            db.flush()
-            patient_dict["address_id"] = address.id
-        else:
-            patient_dict["address_id"] = address_db.id
-    else:
-        stmt = select(Address).where(Address.id == patient_db.address_id)
-        address = db.scalars(stmt).first()
-        patient_dict["address"] = address.id
-    del patient_dict["address"]
-
-    stmt = update(Patient).where(Patient.id == patient_id).values(**patient_dict)
-    if patient_dict.get("id"):
-        db.execute(
-            doctor_patient.update()
-            .where(doctor_patient.c.patient_id == patient_id)
-            .values(patient_id=patient_dict["id"], doctor_id=current_doctor.id)
-        )
-    db.execute(stmt)
-    db.commit()
+    patient_dict["password"] = await get_password_hash(patient_dict["password"])
+    await run_in_threadpool(save_patient_update, patient_dict, patient_db, current_doctor.id, db)
+    invalidate_user(patient_id, patient.id)
     return JSONResponse(f"The info of the patient {patient.id} has been changed successfully.")
 
 
@@ -349,4 +358,5 @@ def delete_patient(
     )
     db.execute(stmt)
     db.commit()
+    invalidate_user(patient_id)
     return JSONResponse(f"The user patient {patient_id} has been successfully deleted.")
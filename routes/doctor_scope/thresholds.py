@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query, Security
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from cruds.alerts import reevaluate_alerts
+from dependencies.dependencies import get_db
+from models.exceptions import exception_if_not_exists
+from models.models import AlertThreshold, Doctor
+from routes.oauth import get_current_user
+from schemas.schemas import AlertThresholdIn, AlertThresholdOut
+
+from .patients import get_patient_by_id_and_doctor_id
+
+router = APIRouter(prefix="/thresholds", tags=["Alert thresholds"])
+
+
+def threshold_stmt(doctor_id: str, patient_id: str | None):
+    stmt = select(AlertThreshold).where(AlertThreshold.doctor_id == doctor_id)
+    if patient_id is None:
+        return stmt.where(AlertThreshold.patient_id.is_(None))
+    return stmt.where(AlertThreshold.patient_id == patient_id)
+
+
+@router.get("", response_model=list[AlertThresholdOut])
+def get_thresholds(
+    current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
+    db: Session = Depends(get_db),
+):
+    """**Your alert threshold profile and the overrides of your patients**
+
+    The profile is the entry without _patient_id_.
+    """
+    stmt = select(AlertThreshold).where(AlertThreshold.doctor_id == current_doctor.id)
+    return [
+        AlertThresholdOut(
+            patient_id=threshold.patient_id,
+            systolic=threshold.systolic,
+            diastolic=threshold.diastolic,
+            heart_rate=threshold.heart_rate,
+            value=threshold.value,
+        )
+        for threshold in db.scalars(stmt)
+    ]
+
+
+@router.put("", response_model=AlertThresholdOut)
+def set_thresholds(
+    current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
+    thresholds: AlertThresholdIn,
+    patient_id: str | None = Query(default=None, description="Paciente, o ninguno para su perfil"),
+    db: Session = Depends(get_db),
+):
+    """**Set your alert thresholds, or the ones of one of your patients**
+
+    A reading raises an alert when a value is at or above its threshold. Empty values
+    use your profile and then the defaults (120/80 mmHg, heart rate 100, glucose 6.1 mmol/L).
+    New readings use them at once; call `POST /thresholds/evaluate` to apply them to the
+    recent ones.
+    """
+    if patient_id is not None:
+        patient = get_patient_by_id_and_doctor_id(patient_id, current_doctor.id, db)
+        exception_if_not_exists(patient, "Patient not found")
+    threshold = db.scalars(threshold_stmt(current_doctor.id, patient_id)).first()
+    if threshold is None:
+        threshold = AlertThreshold(doctor_id=current_doctor.id, patient_id=patient_id)
+        db.add(threshold)
+    for field, value in thresholds.model_dump().items():
+        setattr(threshold, field, value)
+    db.commit()
+    return AlertThresholdOut(patient_id=patient_id, **thresholds.model_dump())
+
+
+@router.delete("")
+def delete_thresholds(
+    current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
+    patient_id: str | None = Query(default=None, description="Paciente, o ninguno para su perfil"),
+    db: Session = Depends(get_db),
+):
+    """**Remove your alert threshold profile or a patient's override**"""
+    threshold = db.scalars(threshold_stmt(current_doctor.id, patient_id)).first()
+    exception_if_not_exists(threshold, "There are no thresholds to delete")
+    db.execute(delete(AlertThreshold).where(AlertThreshold.id == threshold.id))
+    db.commit()
+    return JSONResponse("The thresholds have been deleted.")
+
+
+@router.post("/evaluate")
+def evaluate(
+    current_doctor: Annotated[Doctor, Security(get_current_user, scopes=["doctor"])],
+    day: int = Query(default=1, ge=0),
+    hours: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+):
+    """**Evaluate the readings of all your patients in the last _day_ days and _hours_ hours again**
+
+    Replaces their unacknowledged alerts using the current thresholds, in one set-based
+    statement per measure. Acknowledged readings are not raised again.
+    """
+    since = datetime.now() - timedelta(days=day, hours=hours)
+    return {"alerts": reevaluate_alerts(db, current_doctor.id, since)}
@@ -0,0 +1,51 @@
+import secrets
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import APIKeyHeader
+
+from cruds.measures import broker
+from cruds.patient_filters import patient_list_stmt
+from database.database import engine, async_engine
+from database.engine import pool_status
+from routes.calc.cache import analytics_cache
+from env_loader import EnvLoader
+from routes.oauth import principal_cache
+
+env_loader = EnvLoader()
+
+monitoring_token_header = APIKeyHeader(name="X-Monitoring-Token", auto_error=False)
+
+
+def verify_monitoring_token(token: Annotated[str | None, Depends(monitoring_token_header)]):
+    """The operations token of MONITORING_TOKEN; the router is only mounted when it is set"""
+    if not token or not secrets.compare_digest(token, env_loader.monitoring_token or ""):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid monitoring token")
+
+
+router = APIRouter(prefix="/monitoring", tags=["Monitoring"], dependencies=[Depends(verify_monitoring_token)])
+
+
+@router.get("/pool")
+def get_pool_status():
+    """**Occupation of the database connection pools and checkout wait times**"""
+    return {
+        "sync": pool_status(engine),
+        "async": pool_status(async_engine) if async_engine is not None else None,
+    }
+
+
+@router.get("/cache")
+def get_cache_status():
+    """**Size, memory, hits, misses and evictions of the in-process caches**"""
+    return {
+        "principals": principal_cache.stats(),
+        "analytics": analytics_cache.stats(),
+        "patient_filters": patient_list_stmt.cache_info()._asdict(),
+    }
+
+
+@router.get("/events")
+def get_events_status():
+    """**Subscribers of the event stream, events published and events dropped by slow clients**"""
+    return broker.stats()
@@ -2,18 +2,22 @@ from typing import Annotated
 from datetime import datetime, timedelta, UTC
 
 from fastapi import Depends, APIRouter, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm, SecurityScopes
 from jose import jwt
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from pydantic import BaseModel, ValidationError
 from jose.exceptions import JWTError
 
-from dependencies.dependencies import get_db
+from database.database import session_local
+from dependencies.dependencies import get_async_db, get_db
 from models.models import Doctor, Patient
 from schemas.schemas import DoctorScopes, PatientScopes
 from env_loader import EnvLoader
+from cache.cache import LRUCache
+from security.passwords import PasswordPool
 
 env_loader = EnvLoader()
 
@@ -31,30 +35,43 @@ class TokenData(BaseModel):
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
-pwd_context = CryptContext(schemes=["bcrypt"])
+password_pool = PasswordPool(
+    workers=env_loader.password_workers,
+    queue_depth=env_loader.password_queue_depth,
+    rounds=env_loader.bcrypt_rounds,
+)
 
+# Usuarios autenticados indexados por el `sub` del token
+principal_cache = LRUCache(maxsize=env_loader.principal_cache_size, ttl=env_loader.principal_cache_ttl)
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
 
+# Coroutines: bcrypt runs in the password pool while the endpoint awaits on the event loop
+async def verify_password(plain_password, hashed_password):
+    return await password_pool.verify(plain_password, hashed_password)
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
 
+async def get_password_hash(password):
+    return await password_pool.hash(password)
 
-def get_user(id: str, db: Session):
-    user = db.scalar(select(Doctor).where(Doctor.id == id))
 
-    if user:
-        return DoctorScopes(
-            id=user.id,
-            first_name=user.first_name,
-            last_name=user.last_name,
-            specialty=user.specialty,
-            password=user.password,
-            scopes=["doctor", " "],
-        )
-    else:
+def get_user(id: str, db: Session, scope: str | None = None):
+    """Busca al usuario entre los doctores y los pacientes.
+
+    `scope` es la pista que viaja en el token ("doctor" o "patient"); cuando se
+    conoce solo se consulta la tabla correspondiente.
+    """
+    if scope != "patient":
+        user = db.scalar(select(Doctor).where(Doctor.id == id))
+        if user:
+            return DoctorScopes(
+                id=user.id,
+                first_name=user.first_name,
+                last_name=user.last_name,
+                specialty=user.specialty,
+                password=user.password,
+                scopes=["doctor", " "],
+            )
+    if scope != "doctor":
         user = db.scalar(select(Patient).where(Patient.id == id))
         if user:
             user = user.__dict__
@@ -62,11 +79,29 @@ def get_user(id: str, db: Session):
             return PatientScopes(**user)
 
 
-def authenticate_user(db: Session, identification: str, password: str):
-    user = get_user(identification, db)
+def get_cached_user(id: str, db: Session, scope: str | None = None):
+    """Returns the principal from the cache, loading it from the database on a miss"""
+    user = principal_cache.get(id)
+    if user is None or (scope and user.scopes[0] != scope):
+        user = get_user(id, db, scope)
+        if not user:
+            return None
+        principal_cache.set(id, user)
+    return user.model_copy()
+
+
+def invalidate_user(*ids: str | None):
+    """Drops the cached principal of each id, call it after changing or deleting a user"""
+    for id in ids:
+        if id:
+            principal_cache.invalidate(id)
+
+
+async def authenticate_user(db: Session, identification: str, password: str):
+    user = await run_in_threadpool(get_user, identification, db)
     if not user:
         return False
-    if not verify_password(password, user.password):
+    if not await verify_password(password, user.password):
         return False
     return user
 
@@ -82,49 +117,91 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 
-def get_current_user(
-    security_scopes: SecurityScopes,
-    token: Annotated[str, Depends(oauth2_scheme)],
-    db: Session = Depends(get_db),
-):
+def credentials_error(authenticate_value: str, detail: str = "Could not validate credentials") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": authenticate_value},
+    )
+
+
+def read_token(security_scopes: SecurityScopes, token: str) -> tuple[TokenData, str]:
+    """Decodes the bearer token, returns its data and the WWW-Authenticate value of the errors"""
     if security_scopes.scopes:
         authenticate_value = f'Bearer scope="{security_scopes.scope_str}"'
     else:
         authenticate_value = "Bearer"
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": authenticate_value},
-    )
     try:
         payload = jwt.decode(token, env_loader.secrete_key, algorithms=env_loader.algorithm)
         user_id: str = payload.get("sub")
         if user_id is None:
-            raise credentials_exception
+            raise credentials_error(authenticate_value)
         token_scopes = payload.get("scopes", [])
         token_data = TokenData(scopes=token_scopes, user_id=user_id)
     except (JWTError, ValidationError):
-        raise credentials_exception
-    user = get_user(token_data.user_id, db)
+        raise credentials_error(authenticate_value)
+    return token_data, authenticate_value
+
+
+def authorize(security_scopes: SecurityScopes, token_data: TokenData, authenticate_value: str, user):
+    """Returns the user loaded for the token if it exists and the token has every required scope"""
     if not user:
-        raise credentials_exception
+        raise credentials_error(authenticate_value)
     for scope in security_scopes.scopes:
         if scope not in token_data.scopes:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Not enough permissions",
-                headers={"WWW-Authenticate": authenticate_value},
-            )
+            raise credentials_error(authenticate_value, "Not enough permissions")
     return user
 
 
+def scope_hint(token_data: TokenData) -> str | None:
+    return token_data.scopes[0] if token_data.scopes else None
+
+
+def get_current_user(
+    security_scopes: SecurityScopes,
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Session = Depends(get_db),
+):
+    token_data, authenticate_value = read_token(security_scopes, token)
+    user = get_cached_user(token_data.user_id, db, scope_hint(token_data))
+    return authorize(security_scopes, token_data, authenticate_value, user)
+
+
+async def get_current_user_async(
+    security_scopes: SecurityScopes,
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: AsyncSession = Depends(get_async_db),
+):
+    """get_current_user for the async routes, loading the user through their AsyncSession.
+
+    Only available when DATABASE_MODE is async.
+    """
+    token_data, authenticate_value = read_token(security_scopes, token)
+    user = await db.run_sync(lambda session: get_cached_user(token_data.user_id, session, scope_hint(token_data)))
+    return authorize(security_scopes, token_data, authenticate_value, user)
+
+
+def get_current_user_short_session(
+    security_scopes: SecurityScopes,
+    token: Annotated[str, Depends(oauth2_scheme)],
+):
+    """get_current_user with a session of its own, closed before the endpoint runs.
+
+    For long-lived responses such as the event stream: the cleanup of `get_db` only
+    runs when the response finishes, so it would keep a session (and its pooled
+    connection on a principal cache miss) for the whole life of the stream.
+    """
+    with session_local() as db:
+        return get_current_user(security_scopes, token, db)
+
+
 @router.post("/token", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: Session = Depends(get_db),
 ) -> Token:
     """**Wait by doctor ID and Password**"""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
     access_token_expires = timedelta(minutes=env_loader.acces_token_expire_minutes)
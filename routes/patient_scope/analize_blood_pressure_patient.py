@@ -1,17 +1,24 @@
 from datetime import datetime, timedelta
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Security
+from fastapi import APIRouter, Depends, Query, Security
 from fastapi.responses import JSONResponse
-from sqlalchemy import select, or_
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
+from cruds.warnings import get_warnings
 from dependencies.dependencies import get_db
 from models.models import CardiovascularParameter, Doctor, Patient
-from schemas.schemas import AnalizeCardiovascular, Analize, WarningCardiovascularParameter
+from models.enumerations import Bucket
+from schemas.schemas import (
+    AnalizeCardiovascular,
+    CardiovascularExtended,
+    CardiovascularSeriesBucket,
+    WarningCardiovascularParameter,
+)
 from routes.oauth import get_current_user
-from routes.calc.calculation import make_analize
-from models.exceptions import exception_if_not_exists
+from routes.calc.vectorized import blood_pressure_extended
+from routes.calc.calculation import analize_columns, make_series
 
 
 router = APIRouter(prefix="/patient/analize", tags=["Patient Analize"])
@@ -24,21 +31,55 @@ def analize(
 ):
     """**Get the mean, minimum and maximum value of blood pressure and heart rate**"""
 
-    minimum_systolic, maximum_systolic, mean_systolic = make_analize(
-        current_patient.id, db, CardiovascularParameter.systolic, CardiovascularParameter
-    )
-    minimum_diastolic, maximum_diastolic, mean_diastolic = make_analize(
-        current_patient.id, db, CardiovascularParameter.diastolic, CardiovascularParameter
-    )
-    minimum_heart_rate, maximum_heart_rate, mean_heart_rate = make_analize(
-        current_patient.id, db, CardiovascularParameter.heart_rate, CardiovascularParameter
+    systolic, diastolic, heart_rate = analize_columns(
+        current_patient.id,
+        db,
+        [CardiovascularParameter.systolic, CardiovascularParameter.diastolic, CardiovascularParameter.heart_rate],
+        CardiovascularParameter,
     )
+    return AnalizeCardiovascular(systolic=systolic, diastolic=diastolic, heart_rate=heart_rate)
+
+
+@router.get("/blood_pressure/series", response_model=list[CardiovascularSeriesBucket])
+def series_blood_pressure(
+    current_patient: Annotated[Patient, Security(get_current_user, scopes=["patient"])],
+    bucket: Bucket = Bucket.day,
+    date_from: datetime | None = Query(default=None, alias="from", description="Fecha inicial (inclusive)"),
+    date_to: datetime | None = Query(default=None, alias="to", description="Fecha final (inclusive)"),
+    db: Session = Depends(get_db),
+):
+    """**Blood pressure and heart rate statistics per hour, day or week, for charts**
 
-    return AnalizeCardiovascular(
-        systolic=Analize(minimum=minimum_systolic, maximum=maximum_systolic, mean=mean_systolic),
-        diastolic=Analize(minimum=minimum_diastolic, maximum=maximum_diastolic, mean=mean_diastolic),
-        heart_rate=Analize(minimum=minimum_heart_rate, maximum=maximum_heart_rate, mean=mean_heart_rate),
+    Each bucket has the count, minimum, maximum, mean, standard deviation and the 25th,
+    50th and 75th percentiles of every column. Weeks start on monday.
+    """
+    series = make_series(
+        current_patient.id,
+        db,
+        [CardiovascularParameter.systolic, CardiovascularParameter.diastolic, CardiovascularParameter.heart_rate],
+        CardiovascularParameter,
+        bucket,
+        date_from,
+        date_to,
     )
+    return [
+        CardiovascularSeriesBucket(start=start, count=count, systolic=systolic, diastolic=diastolic, heart_rate=heart_rate)
+        for start, count, (systolic, diastolic, heart_rate) in series
+    ]
+
+
+@router.get("/blood_pressure/extended", response_model=CardiovascularExtended)
+def extended_blood_pressure(
+    current_patient: Annotated[Patient, Security(get_current_user, scopes=["patient"])],
+    date_from: datetime | None = Query(default=None, alias="from", description="Fecha inicial (inclusive)"),
+    date_to: datetime | None = Query(default=None, alias="to", description="Fecha final (inclusive)"),
+    db: Session = Depends(get_db),
+):
+    """**Median, IQR, coefficient of variation and load of blood pressure and heart rate**
+
+    The load is the percentage of readings with systolic >= 140 or diastolic >= 90 mmHg.
+    """
+    return blood_pressure_extended(db, current_patient.id, date_from, date_to)
 
 
 @router.get("/warning_cardiovascular_parameter", response_model=list[WarningCardiovascularParameter])
@@ -49,35 +90,33 @@ def get_warning_patients(
     heart_rate: int | None = 100,
     day: int | None = 1,
     hours: int | None = 0,
+    limit: int = Query(default=100, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+    worst: bool = Query(default=False, description="Solo la medición más alta de cada paciente"),
     db: Session = Depends(get_db),
 ):
-    stmt = select(CardiovascularParameter).where(
-        CardiovascularParameter.date >= (datetime.now() - timedelta(days=day, hours=hours)),
+    """**Your blood pressure readings with any value at or above its limit in the last _day_ days
+    and _hours_ hours**
+
+    Newest first. With _worst_ only the highest one is returned.
+    """
+    columns = [CardiovascularParameter.systolic, CardiovascularParameter.diastolic, CardiovascularParameter.heart_rate]
+    warnings = get_warnings(
+        db,
+        CardiovascularParameter,
+        columns,
         or_(
             CardiovascularParameter.systolic >= systolic,
             CardiovascularParameter.diastolic >= diastolic,
             CardiovascularParameter.heart_rate >= heart_rate,
         ),
+        columns,
+        since=datetime.now() - timedelta(days=day, hours=hours),
+        patient_id=current_patient.id,
+        worst_per_patient=worst,
+        limit=limit,
+        offset=offset,
     )
-
-    patients_measures = db.scalars(stmt).all()
-
-    if not patients_measures:
+    if not warnings:
         return JSONResponse("No hay pacientes con problemas", status_code=404)
-    patient_dict = {}
-    patient_list = []
-    for measures in patients_measures:
-        stmt = select(Patient).where(Patient.id == measures.patient_id)
-        patient = db.scalars(stmt).first()
-        exception_if_not_exists(patient, "Paciente no encontrado")
-
-        patient_dict["patient_id"] = measures.patient_id
-        patient_dict["systolic"] = measures.systolic
-        patient_dict["diastolic"] = measures.diastolic
-        patient_dict["heart_rate"] = measures.heart_rate
-        patient_dict["date"] = measures.date
-        patient_dict["first_name"] = patient.first_name
-        patient_dict["last_name"] = patient.last_name
-        patient_list.append(WarningCardiovascularParameter(**patient_dict))
-
-    return patient_list
+    return [WarningCardiovascularParameter(**warning) for warning in warnings]
@@ -1,15 +1,23 @@
+from datetime import datetime
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Security
+from fastapi import APIRouter, Depends, Query, Security
 from sqlalchemy.orm import Session
 
 from models.models import Patient
 from models.models import BloodSugarLevel as bsl
 from dependencies.dependencies import get_db
-from schemas.schemas import BloodSugarLevel, BloodSugarLevelUpdate, BloodSugarLevelOutList, BloodSugarLevelOut
+from schemas.schemas import (
+    BloodSugarLevel,
+    BloodSugarLevelUpdate,
+    BloodSugarLevelOutList,
+    BloodSugarLevelOut,
+    BulkMeasurementResult,
+)
 from routes.oauth import get_current_user
 from cruds.measures import (
     add_measurement,
+    add_measurements_bulk,
     get_all_measurements,
     delete_measurements,
     update_measurement,
@@ -34,17 +42,40 @@ def add(
     db: Session = Depends(get_db),
 ):
     """**Adds a new measurement of the blood sugar level**"""
-    return add_measurement(measurement, "by patient", model_db=bsl, db=db)
+    return add_measurement(measurement, None, model_db=bsl, db=db)
+
+
+@router.post("/bulk", response_model=BulkMeasurementResult)
+def add_bulk(
+    current_patient: Annotated[Patient, Security(get_current_user, scopes=["patient"])],
+    measurements: list[BloodSugarLevel],
+    db: Session = Depends(get_db),
+):
+    """**Adds a batch of your measurements of the blood sugar level**
+
+    Measurements already registered are skipped and invalid ones are rejected,
+    the response reports the result of each one by its position in the list.
+    """
+    return add_measurements_bulk(measurements, None, model_db=bsl, db=db, patient_id=current_patient.id)
 
 
 @router.get("/", response_model=BloodSugarLevelOutList)
 def get(
     current_patient: Annotated[Patient, Security(get_current_user, scopes=["patient"])],
     patient_id: str,
+    date_from: datetime | None = Query(default=None, alias="from", description="Fecha inicial (inclusive)"),
+    date_to: datetime | None = Query(default=None, alias="to", description="Fecha final (inclusive)"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: str | None = Query(default=None, description="next_cursor de la página anterior"),
     db: Session = Depends(get_db),
 ):
-    """**Obtains all measurements of the patient's blood sugar level**"""
-    measurements = get_all_measurements(patient_id, model_db=bsl, db=db)
+    """**Obtains the patient's blood sugar measurements**, a page at a time ordered by date
+
+    Pass the _next_cursor_ of a response as _cursor_ to get the following page.
+    """
+    measurements, next_cursor = get_all_measurements(
+        patient_id, model_db=bsl, db=db, date_from=date_from, date_to=date_to, limit=limit, cursor=cursor
+    )
 
     return BloodSugarLevelOutList(
         patient_id=patient_id,
@@ -52,6 +83,7 @@ def get(
             BloodSugarLevelOut(date=measurement.date, value=measurement.value, doctor=measurement.doctor_id)
             for measurement in measurements
         ],
+        next_cursor=next_cursor,
     )
 
 
@@ -1,15 +1,17 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, Security, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.exceptions import HTTPException
 from fastapi.responses import JSONResponse
 from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
+from cruds.patient_search import with_search_columns
 from models.models import Patient, Address, doctor_patient
 from dependencies.dependencies import get_db
 from schemas.schemas import PatientSchema, PatientUp
-from routes.oauth import get_password_hash, get_current_user
+from routes.oauth import get_password_hash, get_current_user, invalidate_user
 
 
 router = APIRouter(prefix="/patient", tags=["Patient Access: Your Information"])
@@ -36,8 +38,42 @@ def get_patient(
     return PatientSchema(**patient_db_dict)
 
 
+def save_patient_update(patient_dict: dict, patient_db: Patient, db: Session):
+    if patient_dict.get("address"):
+        address_db = db.scalars(select(Address).where(Address.address == patient_dict["address"])).first()
+        if not address_db:
+            address = Address(address=patient_dict["address"])
+            db.add(address)
+            db.flush()
+            patient_dict["address_id"] = address.id
+        else:
+            patient_dict["address_id"] = address_db.id
+    else:
+        stmt = select(Address).where(Address.id == patient_db.address_id)
+        address = db.scalars(stmt).first()
+        patient_dict["address"] = address.id
+    del patient_dict["address"]
+    with_search_columns(patient_dict, patient_db)
+
+    stmt = update(Patient).where(Patient.id == patient_db.id).values(**patient_dict)
+    if patient_dict.get("id"):
+        db.execute(
+            doctor_patient.update()
+            .where(doctor_patient.c.patient_id == patient_db.id)
+            .values(patient_id=patient_db.id)
+        )
+    db.execute(stmt)
+    db.commit()
+
+
+def get_registered_patient(patient_id: str, db: Session):
+    stmt = select(Patient).join(Patient.doctors).where(Patient.id == patient_id)
+    return db.scalars(stmt).first()
+
+
+# A coroutine: it awaits bcrypt in the password pool and runs its database work in the threadpool
 @router.put("")
-def update_patient(
+async def update_patient(
     current_patient: Annotated[Patient, Security(get_current_user, scopes=["patient"])],
     patient: PatientUp,
     db: Session = Depends(get_db),
@@ -52,8 +88,7 @@ def update_patient(
 
         patient_id (str): Patient id.
     """
-    stmt = select(Patient).join(Patient.doctors).where(Patient.id == current_patient.id)
-    patient_db = db.scalars(stmt).first()
+    patient_db = await run_in_threadpool(get_registered_patient, current_patient.id, db)
     if not patient_db:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -65,29 +100,7 @@ def update_patient(
         patient.first_name = patient_db.first_name
 
     patient_dict = patient.model_dump(exclude_unset=True)
-    patient_dict["password"] = get_password_hash(patient_dict["password"])
-    if patient_dict.get("address"):
-        address_db = db.scalars(select(Address).where(Address.address == patient_dict["address"])).first()
-        if not address_db:
-            address = Address(address=patient_dict["address"])
-            db.add(address)
-            db.flush()
-            patient_dict["address_id"] = address.id
-        else:
-            patient_dict["address_id"] = address_db.id
-    else:
-        stmt = select(Address).where(Address.id == patient_db.address_id)
-        address = db.scalars(stmt).first()
-        patient_dict["address"] = address.id
-    del patient_dict["address"]
-
-    stmt = update(Patient).where(Patient.id == current_patient.id).values(**patient_dict)
-    if patient_dict.get("id"):
-        db.execute(
-            doctor_patient.update()
-            .where(doctor_patient.c.patient_id == current_patient.id)
-            .values(patient_id=current_patient.id)
-        )
-    db.execute(stmt)
-    db.commit()
+    patient_dict["password"] = await get_password_hash(patient_dict["password"])
+    await run_in_threadpool(save_patient_update, patient_dict, patient_db, db)
+    invalidate_user(current_patient.id, patient.id)
     return JSONResponse(f"The info of the patient {patient.id} has been changed successfully.")
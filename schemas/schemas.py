@@ -3,7 +3,7 @@ from pydantic import BaseModel, EmailStr, validator, Field
 
 from datetime import datetime
 
-from models.enumerations import Gender, Scholing
+from models.enumerations import BulkStatus, Gender, JobStatus, Scholing
 
 
 class Doctor(BaseModel):
@@ -110,6 +110,18 @@ class PatientUp(PatientSchema):
         return value
 
 
+class PatientLatestVitals(BaseModel):
+    patient_id: str
+    first_name: str
+    last_name: str | None = None
+    blood_pressure_date: datetime | None = Field(default=None, description="Fecha de la última tensión arterial")
+    systolic: int | None = None
+    diastolic: int | None = None
+    heart_rate: int | None = None
+    blood_sugar_date: datetime | None = Field(default=None, description="Fecha de la última glucemia")
+    blood_sugar: float | None = None
+
+
 class DoctorPatient(BaseModel):
     doctor_id: str
     patient_id: str
@@ -127,12 +139,13 @@ class CardiovascularParameter(CardiovascularParameterUpdate):
 
 
 class CardiovascularParameterOut(CardiovascularParameterUpdate):
-    doctor_id: str
+    doctor_id: str | None = Field(default=None, description="Médico que registró la medición, vacío si fue el paciente")
 
 
 class CardiovascularParameterOutList(BaseModel):
-    patient_id: int
+    patient_id: str
     measures: List[CardiovascularParameterOut]
+    next_cursor: str | None = Field(default=None, description="Cursor de la página siguiente, si existe")
 
 
 class BloodSugarLevelUpdate(BaseModel):
@@ -149,14 +162,43 @@ class BloodSugarLevelOut(BloodSugarLevelUpdate):
 
 
 class BloodSugarLevelOutList(BaseModel):
-    patient_id: int
+    patient_id: str
     measures: List[BloodSugarLevelOut]
+    next_cursor: str | None = Field(default=None, description="Cursor de la página siguiente, si existe")
+
+
+class BulkMeasurementRow(BaseModel):
+    index: int = Field(description="Posición de la medición en la lista enviada")
+    status: BulkStatus
+    detail: str | None = None
+
+
+class BulkMeasurementResult(BaseModel):
+    inserted: int = 0
+    skipped: int = Field(default=0, description="Mediciones que ya estaban registradas")
+    rejected: int = Field(default=0, description="Mediciones con datos inválidos")
+    rows: list[BulkMeasurementRow] = []
+
+
+class ImportJobOut(BaseModel):
+    id: str
+    measure: str
+    status: JobStatus
+    processed: int = Field(default=0, description="Filas leídas del archivo")
+    inserted: int = 0
+    skipped: int = 0
+    rejected: int = 0
+    errors: list[str] = Field(default=[], description="Primeros errores encontrados, con su número de fila")
+    created: datetime
+    finished: datetime | None = None
 
 
 class Analize(BaseModel):
-    minimum: float
-    maximum: float
-    mean: float
+    minimum: float | None = None
+    maximum: float | None = None
+    mean: float | None = None
+    count: int = Field(default=0, description="Número de mediciones con valor")
+    stddev: float | None = Field(default=None, description="Desviación estándar poblacional")
 
 
 class AnalizeCardiovascular(BaseModel):
@@ -165,14 +207,85 @@ class AnalizeCardiovascular(BaseModel):
     heart_rate: Analize
 
 
+class SeriesStatistics(Analize):
+    p25: float | None = Field(default=None, description="Percentil 25")
+    p50: float | None = Field(default=None, description="Mediana")
+    p75: float | None = Field(default=None, description="Percentil 75")
+
+
+class SeriesBucket(BaseModel):
+    start: datetime = Field(description="Inicio del intervalo")
+    count: int = Field(description="Mediciones en el intervalo")
+
+
+class BloodSugarSeriesBucket(SeriesBucket):
+    value: SeriesStatistics
+
+
+class CardiovascularSeriesBucket(SeriesBucket):
+    systolic: SeriesStatistics
+    diastolic: SeriesStatistics
+    heart_rate: SeriesStatistics
+
+
+class ExtendedStatistics(BaseModel):
+    count: int = Field(default=0, description="Número de mediciones con valor")
+    mean: float | None = None
+    stddev: float | None = Field(default=None, description="Desviación estándar poblacional")
+    cv: float | None = Field(default=None, description="Coeficiente de variación (%)")
+    minimum: float | None = None
+    p25: float | None = Field(default=None, description="Percentil 25")
+    median: float | None = None
+    p75: float | None = Field(default=None, description="Percentil 75")
+    iqr: float | None = Field(default=None, description="Rango intercuartílico")
+    maximum: float | None = None
+
+
+class BloodSugarExtended(BaseModel):
+    value: ExtendedStatistics
+    time_below_range: float = Field(description="% de mediciones por debajo de 3.9 mmol/L")
+    time_in_range: float = Field(description="% de mediciones entre 3.9 y 10.0 mmol/L")
+    time_above_range: float = Field(description="% de mediciones por encima de 10.0 mmol/L")
+
+
+class CardiovascularExtended(BaseModel):
+    systolic: ExtendedStatistics
+    diastolic: ExtendedStatistics
+    heart_rate: ExtendedStatistics
+    systolic_load: float = Field(description="% de mediciones con sistólica >= 140 mmHg")
+    diastolic_load: float = Field(description="% de mediciones con diastólica >= 90 mmHg")
+    load: float = Field(description="% de mediciones con sistólica >= 140 o diastólica >= 90 mmHg")
+
+
+class AnalizePatient(Analize):
+    patient_id: str
+
+
+class AnalizeCardiovascularPatient(AnalizeCardiovascular):
+    patient_id: str
+
+
+class AlertThresholdIn(BaseModel):
+    systolic: float | None = Field(default=None, description="Sistólica máxima (mmHg)")
+    diastolic: float | None = Field(default=None, description="Diastólica máxima (mmHg)")
+    heart_rate: float | None = Field(default=None, description="Frecuencia cardiaca máxima")
+    value: float | None = Field(default=None, description="Glucemia máxima (mmol/L)")
+
+
+class AlertThresholdOut(AlertThresholdIn):
+    patient_id: str | None = Field(default=None, description="Paciente, o ninguno para el perfil del médico")
+
+
 class WarningBloodSugar(BaseModel):
+    alert_id: int | None = Field(default=None, description="Id de la alerta, para confirmarla")
     patient_id: str = Field(description="Id del paciente")
     first_name: str
-    last_name: str
+    last_name: str | None = None
     value: float = Field(description="Valor de la glucemia")
     date: datetime = Field(description="Fecha y hora de registro")
 
 
 class WarningCardiovascularParameter(CardiovascularParameter):
+    alert_id: int | None = Field(default=None, description="Id de la alerta, para confirmarla")
     first_name: str
-    last_name: str
+    last_name: str | None = None
@@ -0,0 +1,53 @@
+# Bounded worker pool for the bcrypt work of the authentication routes.
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import status
+from fastapi.exceptions import HTTPException
+from passlib.context import CryptContext
+
+
+class PasswordPool:
+    """Runs bcrypt hashing and verification in a dedicated, size-limited pool.
+
+    bcrypt releases the GIL, so a thread pool uses every core. `hash` and `verify`
+    are coroutines: the calling endpoint awaits the result on the event loop and
+    holds no request thread while bcrypt runs. At most `workers + queue_depth`
+    calls may be running or waiting at the same time; any call beyond that is
+    rejected with a 503 instead of queueing without bound.
+    """
+
+    def __init__(self, workers: int, queue_depth: int, rounds: int = 12):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+
+    async def _run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The server is busy, please try again in a moment.",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            future = self._executor.submit(function, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is freed when bcrypt finishes, even if the request is cancelled before
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(self.context.verify, plain_password, hashed_password)
@@ -0,0 +1,105 @@
+# Shared fixtures: the app on a temporary SQLite database
+import os
+import sys
+import tempfile
+
+# The application modules read their configuration when imported
+DATABASE_DIR = tempfile.mkdtemp(prefix="biodash-tests-")
+os.environ.update(
+    DATABASE_TYPE="sqlite",
+    DATABASE_PROFILE="development",
+    DATABASE_MODE="sync",
+    DB_ECHO="false",
+    BD=os.path.join(DATABASE_DIR, "biodash.db"),
+    SECRET_KEY="tests-secret-key",
+    ALGORITHM="HS256",
+    ACCESS_TOKEN_EXPIRE_MINUTES="30",
+    BCRYPT_ROUNDS="4",
+    MONITORING_TOKEN="tests-monitoring-token",
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from database.database import Base, engine, session_local  # noqa: E402
+from main import app  # noqa: E402
+from models.models import Address, Doctor, Patient  # noqa: E402
+from routes.oauth import create_access_token, principal_cache  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(engine)
+    session = session_local()
+    yield session
+    session.close()
+    principal_cache.clear()
+    Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def client(db):
+    # Without the context manager the lifespan (schema version check) does not run
+    return TestClient(app)
+
+
+def token_headers(user_id: str, scope: str) -> dict:
+    token = create_access_token({"sub": user_id, "scopes": [scope]})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def doctor(db):
+    doctor = Doctor(
+        id="doctor", first_name="Doctor", last_name="House", specialty="Cardiology", password="hashed-password"
+    )
+    db.add(doctor)
+    db.commit()
+    return doctor
+
+
+@pytest.fixture
+def add_patients(db, doctor):
+    """Adds `count` patients with an address each to the doctor"""
+
+    def add(count: int, start: int = 0):
+        for number in range(start, start + count):
+            patient = Patient(
+                id=f"patient{number}",
+                first_name=f"Patient {number}",
+                last_name=f"Last {number}",
+                password="-",
+                address=Address(address={"Provincia": "Cienfuegos", "Barrio": f"Barrio {number}"}),
+            )
+            doctor.patients.append(patient)
+        db.commit()
+
+    return add
+
+
+class QueryCounter:
+    """Counts the statements sent to the database while it is active"""
+
+    def __init__(self):
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self.record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self.record)
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@pytest.fixture
+def query_counter():
+    return QueryCounter
@@ -0,0 +1,40 @@
+from sqlalchemy import select
+
+from conftest import token_headers
+from models.models import Alert, BloodSugarLevel
+
+HEADERS = token_headers("doctor", "doctor")
+
+
+def alerts(db) -> list[tuple]:
+    db.expire_all()
+    return db.execute(select(Alert.measurement_id, Alert.acknowledged).order_by(Alert.id)).all()
+
+
+def test_editing_a_reading_keeps_its_acknowledged_alert(client, db, add_patients):
+    add_patients(1)
+    reading = {"patient_id": "patient0", "date": "2024-01-01T08:00:00", "value": 9.5}
+    assert client.post("/blood_sugar", json=reading, headers=HEADERS).status_code == 200
+    measurement_id = db.scalar(select(BloodSugarLevel.id))
+    alert_id = db.scalar(select(Alert.id))
+    assert alerts(db) == [(measurement_id, False)]
+
+    response = client.put("/alerts/acknowledge", params={"alert_id": [alert_id]}, headers=HEADERS)
+    assert response.status_code == 200
+    params = {"measurment_id": measurement_id}
+    response = client.put("/blood_sugar", params=params, json={"value": 9.6}, headers=HEADERS)
+    assert response.status_code == 200
+
+    assert alerts(db) == [(measurement_id, True)]
+
+
+def test_deleting_a_reading_drops_its_acknowledged_alert(client, db, add_patients):
+    add_patients(1)
+    reading = {"patient_id": "patient0", "date": "2024-01-01T08:00:00", "value": 9.5}
+    assert client.post("/blood_sugar", json=reading, headers=HEADERS).status_code == 200
+    measurement_id = db.scalar(select(BloodSugarLevel.id))
+    client.put("/alerts/acknowledge", params={"alert_id": [db.scalar(select(Alert.id))]}, headers=HEADERS)
+
+    assert client.delete(f"/blood_sugar/{measurement_id}", headers=HEADERS).status_code == 200
+
+    assert alerts(db) == []
@@ -0,0 +1,38 @@
+from conftest import token_headers
+
+HEADERS = token_headers("doctor", "doctor")
+
+
+def test_lifetime_statistics_are_one_read_of_the_accumulators(client, add_patients, query_counter):
+    add_patients(1)
+    readings = [{"patient_id": "patient0", "date": f"2024-01-0{day}T08:00:00", "value": day} for day in (1, 2, 3)]
+    client.post("/blood_sugar/bulk", json=readings, headers=HEADERS)
+    params = {"patient_id": "patient0"}
+    # Loads the doctor into the principal cache
+    assert client.get("/patients", headers=HEADERS).status_code == 200
+
+    for _ in range(2):
+        with query_counter() as counter:
+            response = client.get("/analize/blood_sugar", params=params, headers=HEADERS)
+
+        assert response.json()["count"] == 3
+        assert response.json()["mean"] == 2
+        assert counter.count == 1, counter.statements
+
+
+def test_extended_statistics_load_the_columns_with_their_nulls(client, add_patients):
+    add_patients(1)
+    readings = [
+        {"patient_id": "patient0", "date": "2024-01-01T08:00:00", "systolic": 150, "diastolic": 85, "heart_rate": 70},
+        {"patient_id": "patient0", "date": "2024-01-02T08:00:00", "systolic": 110, "diastolic": 70},
+    ]
+    client.post("/blood_pressure/bulk", json=readings, headers=HEADERS)
+
+    response = client.get("/analize/blood_pressure/extended", params={"patient_id": "patient0"}, headers=HEADERS)
+
+    body = response.json()
+    assert (body["systolic"]["count"], body["systolic"]["mean"]) == (2, 130)
+    assert (body["heart_rate"]["count"], body["heart_rate"]["mean"]) == (1, 70)
+    assert body["systolic_load"] == 50
+    params = {"patient_id": "nobody"}
+    assert client.get("/analize/blood_pressure/extended", params=params, headers=HEADERS).status_code == 404
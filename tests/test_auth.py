@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import SecurityScopes
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from conftest import DATABASE_DIR, token_headers
+from routes.oauth import create_access_token, get_current_user_async
+
+
+def test_deleting_all_measurements_requires_the_doctor_scope(client, add_patients):
+    add_patients(1)
+    reading = {"patient_id": "patient0", "date": "2024-01-01T08:00:00", "value": 5.5}
+    assert client.post("/blood_sugar", json=reading, headers=token_headers("doctor", "doctor")).status_code == 200
+    params = {"patient_id": "patient0"}
+
+    response = client.delete("/blood_sugar/all", params=params, headers=token_headers("patient0", "patient"))
+
+    assert response.status_code == 401
+    assert client.delete("/blood_sugar/all", params=params, headers=token_headers("doctor", "doctor")).status_code == 200
+
+
+async def current_user_async(scopes: list[str], user_id: str, scope: str):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{DATABASE_DIR}/biodash.db")
+    try:
+        async with AsyncSession(engine) as db:
+            token = create_access_token({"sub": user_id, "scopes": [scope]})
+            return await get_current_user_async(SecurityScopes(scopes), token, db)
+    finally:
+        await engine.dispose()
+
+
+def test_async_routes_authenticate_through_the_async_session(add_patients):
+    add_patients(1)
+
+    assert asyncio.run(current_user_async(["doctor"], "doctor", "doctor")).id == "doctor"
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(current_user_async(["doctor"], "patient0", "patient"))
+    assert error.value.detail == "Not enough permissions"
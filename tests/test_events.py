@@ -0,0 +1,29 @@
+from fastapi import Request
+
+from conftest import token_headers
+from cruds.measures import broker
+from database.database import engine
+
+
+def test_event_stream_does_not_hold_a_connection(client, doctor, monkeypatch):
+    checked_out = []
+    subscribe = broker.subscribe
+
+    def recording_subscribe(doctor_id):
+        # Runs when the stream starts, after the authentication
+        checked_out.append(engine.pool.checkedout())
+        return subscribe(doctor_id)
+
+    async def is_disconnected(self):
+        return True
+
+    monkeypatch.setattr(broker, "subscribe", recording_subscribe)
+    # The client leaves right after the first message, so the stream ends
+    monkeypatch.setattr(Request, "is_disconnected", is_disconnected)
+
+    response = client.get("/events", headers=token_headers("doctor", "doctor"))
+
+    assert response.status_code == 200
+    assert response.text.startswith("retry:")
+    assert checked_out == [0]
+    assert not broker.has_subscribers()
@@ -0,0 +1,42 @@
+import time
+
+from conftest import token_headers
+from models.models import Doctor, ImportJob
+
+HEADERS = token_headers("doctor", "doctor")
+CSV = "patient_id,date,value\npatient0,2024-01-01T08:00:00,5.5\npatient0,2024-01-02T08:00:00,\nnobody,2024-01-03T08:00:00,6\n"
+
+
+def wait_for(client, status_url: str) -> dict:
+    for _ in range(100):
+        job = client.get(status_url, headers=HEADERS).json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.05)
+    raise TimeoutError(status_url)
+
+
+def test_the_import_status_is_served_from_the_database(client, db, add_patients):
+    add_patients(1)
+    files = {"file": ("readings.csv", CSV, "text/csv")}
+    response = client.post("/import/blood_sugar", files=files, headers=HEADERS)
+    assert response.status_code == 202
+
+    job = wait_for(client, response.json()["status_url"])
+
+    assert (job["status"], job["processed"], job["inserted"], job["rejected"]) == ("done", 3, 1, 2)
+    assert len(job["errors"]) == 2
+    row = db.get(ImportJob, response.json()["job_id"])
+    assert (row.status, row.inserted) == ("done", 1)
+
+
+def test_other_doctors_can_not_see_the_import(client, db, add_patients):
+    add_patients(1)
+    files = {"file": ("readings.csv", CSV, "text/csv")}
+    status_url = client.post("/import/blood_sugar", files=files, headers=HEADERS).json()["status_url"]
+    wait_for(client, status_url)
+    db.add(Doctor(id="another", first_name="Doctor", last_name="Wilson", specialty="Oncology", password="hashed"))
+    db.commit()
+
+    assert client.get(status_url, headers=token_headers("another", "doctor")).status_code == 404
+    assert client.get("/import/unknown", headers=HEADERS).status_code == 404
@@ -0,0 +1,43 @@
+from sqlalchemy import select
+
+from conftest import token_headers
+from models.models import BloodSugarLevel, PatientLatestVitals
+
+HEADERS = token_headers("doctor", "doctor")
+
+
+def latest(db) -> dict:
+    db.expire_all()
+    rows = db.scalars(select(PatientLatestVitals))
+    return {row.patient_id: (str(row.blood_sugar_date), row.blood_sugar) for row in rows}
+
+
+def test_bulk_updates_the_latest_vitals_without_reading_the_measurements(client, db, add_patients, query_counter):
+    add_patients(50)
+    readings = [{"patient_id": f"patient{n}", "date": "2024-01-01T08:00:00", "value": 5.0} for n in range(50)]
+
+    with query_counter() as counter:
+        response = client.post("/blood_sugar/bulk", json=readings, headers=HEADERS)
+
+    assert response.json()["inserted"] == 50
+    vitals = [statement for statement in counter.statements if "patient_latest_vitals" in statement]
+    assert len(vitals) == 2, vitals
+    assert len(latest(db)) == 50
+
+
+def test_latest_vitals_keep_the_newest_reading(client, db, add_patients):
+    add_patients(2)
+    readings = [
+        {"patient_id": "patient0", "date": "2024-01-02T08:00:00", "value": 6.0},
+        {"patient_id": "patient0", "date": "2024-01-01T08:00:00", "value": 5.0},
+        {"patient_id": "patient1", "date": "2024-01-01T08:00:00", "value": 4.0},
+    ]
+    client.post("/blood_sugar/bulk", json=readings, headers=HEADERS)
+    older = [{"patient_id": "patient0", "date": "2023-12-31T08:00:00", "value": 7.0}]
+    client.post("/blood_sugar/bulk", json=older, headers=HEADERS)
+
+    assert latest(db) == {"patient0": ("2024-01-02 08:00:00", 6.0), "patient1": ("2024-01-01 08:00:00", 4.0)}
+
+    newest = db.scalar(select(BloodSugarLevel.id).where(BloodSugarLevel.value == 6.0))
+    assert client.delete(f"/blood_sugar/{newest}", headers=HEADERS).status_code == 200
+    assert latest(db)["patient0"] == ("2024-01-01 08:00:00", 5.0)
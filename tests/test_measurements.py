@@ -0,0 +1,36 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from conftest import token_headers
+from cruds.measures import is_duplicate_key
+from models.models import BloodSugarLevel
+
+
+def test_patient_bulk_stores_the_readings_without_a_doctor(client, db, add_patients):
+    add_patients(1)
+    readings = [{"date": "2024-01-01T08:00:00", "value": 5.5}, {"date": "2024-01-02T08:00:00", "value": 5.8}]
+    response = client.post("/patient/blood_sugar/bulk", json=readings, headers=token_headers("patient0", "patient"))
+
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 2
+    assert db.scalars(select(BloodSugarLevel.doctor_id)).all() == [None, None]
+
+
+def integrity_error(db, values: dict) -> IntegrityError:
+    with pytest.raises(IntegrityError) as error:
+        db.execute(insert(BloodSugarLevel).values(**values))
+    db.rollback()
+    return error.value
+
+
+def test_only_unique_violations_are_duplicates(db, add_patients):
+    add_patients(1)
+    reading = {"patient_id": "patient0", "date": datetime(2024, 1, 1, 8), "value": 5.5}
+    db.execute(insert(BloodSugarLevel).values(**reading))
+    db.commit()
+
+    assert is_duplicate_key(integrity_error(db, reading))
+    assert not is_duplicate_key(integrity_error(db, {**reading, "value": None}))
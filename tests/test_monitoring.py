@@ -0,0 +1,11 @@
+import pytest
+
+from conftest import token_headers
+
+
+@pytest.mark.parametrize("path", ["/monitoring/pool", "/monitoring/cache", "/monitoring/events"])
+def test_monitoring_requires_the_operations_token(client, doctor, path):
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers=token_headers("doctor", "doctor")).status_code == 401
+    assert client.get(path, headers={"X-Monitoring-Token": "wrong"}).status_code == 401
+    assert client.get(path, headers={"X-Monitoring-Token": "tests-monitoring-token"}).status_code == 200
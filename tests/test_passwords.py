@@ -0,0 +1,56 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi.exceptions import HTTPException
+
+from conftest import token_headers
+from security.passwords import PasswordPool
+
+
+def test_register_login_and_add_patient(client, db):
+    doctor = {"id": "3210", "first_name": "Marcos", "last_name": "Avila", "specialty": "General"}
+    doctor["password"] = "secret-1"
+    assert client.post("/doctor", json=doctor).status_code == 200
+
+    response = client.post("/token", data={"username": "3210", "password": "secret-1"})
+    assert response.status_code == 200
+    assert client.post("/token", data={"username": "3210", "password": "wrong-1"}).status_code == 400
+
+    patient = {"id": "39231", "first_name": "Javier", "last_name": "Hernandez", "address": {"Provincia": "Cienfuegos"}}
+    response = client.post("/patients", json=patient, headers=token_headers("3210", "doctor"))
+    assert response.status_code == 201
+    password = response.json()["password"]
+    assert client.post("/token", data={"username": "39231", "password": password}).status_code == 200
+
+    headers = token_headers("3210", "doctor")
+    response = client.put("/patients", params={"patient_id": "39231"}, json={"password": "changed-1"}, headers=headers)
+    assert response.status_code == 200
+    assert client.post("/token", data={"username": "39231", "password": "changed-1"}).status_code == 200
+
+    response = client.put("/patient", json={"password": "changed-3"}, headers=token_headers("39231", "patient"))
+    assert response.status_code == 200
+    assert client.post("/token", data={"username": "39231", "password": "changed-3"}).status_code == 200
+
+    response = client.put("/doctor", json={"password": "changed-2"}, headers=token_headers("3210", "doctor"))
+    assert response.status_code == 200
+    assert client.post("/token", data={"username": "3210", "password": "changed-2"}).status_code == 200
+
+
+def test_full_pool_rejects_with_503():
+    pool = PasswordPool(workers=1, queue_depth=0, rounds=4)
+    release = threading.Event()
+
+    async def burst():
+        busy = asyncio.ensure_future(pool._run(release.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as rejected:
+            await pool.hash("secret-1")
+        release.set()
+        await busy
+        return rejected.value
+
+    assert asyncio.run(burst()).status_code == 503
+    assert pool.rejected == 1
+    # The slot is free again once the work is done
+    assert asyncio.run(pool.verify("secret-1", asyncio.run(pool.hash("secret-1"))))
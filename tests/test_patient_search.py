@@ -0,0 +1,61 @@
+from sqlalchemy import text
+
+from conftest import token_headers
+from cruds.patient_search import prefix_stmt
+from models.models import Doctor, Patient
+
+HEADERS = token_headers("doctor", "doctor")
+
+
+def add_patient(db, doctor, id, first_name, last_name):
+    patient = Patient(id=id, first_name=first_name, last_name=last_name, password="-")
+    patient.search_name, patient.search_last = f"{first_name} {last_name}", f"{last_name} {first_name}"
+    doctor.patients.append(patient)
+
+
+def search(client, q) -> list[str]:
+    response = client.get("/patients/search", params={"q": q}, headers=HEADERS)
+    return [patient["id"] for patient in response.json()["patients"]] if response.status_code == 200 else []
+
+
+def test_search_by_prefix_then_by_words(client, db, doctor):
+    add_patient(db, doctor, "p1", "javier", "hernandez lao")
+    add_patient(db, doctor, "p2", "ana", "herrera")
+    add_patient(db, doctor, "p3", "laura", "gomez")
+    other = Doctor(id="other", first_name="Other", last_name="Doctor", specialty="General", password="hashed-password")
+    db.add(other)
+    add_patient(db, other, "p4", "hernan", "diaz")
+    db.commit()
+
+    assert search(client, "HER") == ["p1", "p2"]
+    assert search(client, "Ána Herrera") == ["p2"]
+    assert search(client, "lau") == ["p3"]
+    # No full name starts with it: falls back to the words of the name
+    assert search(client, "her lao") == ["p1"]
+    assert search(client, "diaz") == []
+
+
+def test_prefix_search_uses_the_search_indexes(db):
+    stmt = prefix_stmt("doctor", "her").compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+    plan = " ".join(row[3] for row in db.execute(text(f"EXPLAIN QUERY PLAN {stmt}")))
+
+    assert "USING INDEX ix_patients_search_name" in plan
+    assert "USING INDEX ix_patients_search_last" in plan
+
+
+def test_long_queries_match_the_truncated_columns_by_prefix(client, db, doctor, monkeypatch):
+    first_name, last_name = "maria de los angeles", "fernandez de la concepcion y rodriguez del castillo"
+    patient = Patient(id="p1", first_name=first_name, last_name=last_name, password="-")
+    patient.search_name, patient.search_last = f"{first_name} {last_name}"[:64], f"{last_name} {first_name}"[:64]
+    doctor.patients.append(patient)
+    db.commit()
+    monkeypatch.setattr("cruds.patient_search.words_stmt", None)
+
+    assert search(client, f"{first_name} {last_name}") == ["p1"]
+
+
+def test_queries_ending_in_the_last_code_points(client, doctor):
+    for q in ("ana \U0010ffff", "ana \ud7ff"):
+        response = client.get("/patients/search", params={"q": q}, headers=HEADERS)
+        # No patient matches: not found rather than an error of the range bound
+        assert response.status_code == 404, q
@@ -0,0 +1,30 @@
+import pytest
+
+from conftest import token_headers
+
+
+@pytest.mark.parametrize("patients", [3, 12])
+def test_patient_list_runs_a_fixed_number_of_statements(client, add_patients, query_counter, patients):
+    add_patients(patients)
+    headers = token_headers("doctor", "doctor")
+    # The first request loads the doctor into the principal cache
+    assert client.get("/patients", headers=headers).status_code == 200
+
+    with query_counter() as counter:
+        response = client.get("/patients", headers=headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["len"] == patients
+    assert all(patient["address"]["Provincia"] == "Cienfuegos" for patient in body["patients"])
+    # The list statement and the selectin of the addresses, whatever the number of patients
+    assert counter.count == 2, counter.statements
+
+
+def test_patient_list_total_ignores_the_page(client, add_patients):
+    add_patients(5)
+    response = client.get("/patients", params={"limit": 2, "offset": 1}, headers=token_headers("doctor", "doctor"))
+
+    assert response.status_code == 200
+    assert response.json()["len"] == 5
+    assert [patient["id"] for patient in response.json()["patients"]] == ["patient1", "patient2"]
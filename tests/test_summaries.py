@@ -0,0 +1,48 @@
+from datetime import date
+
+from sqlalchemy import select
+
+from conftest import token_headers
+from models.models import BloodSugarDailySummary
+
+HEADERS = token_headers("doctor", "doctor")
+
+
+def summaries(db) -> dict:
+    db.expire_all()
+    rows = db.scalars(select(BloodSugarDailySummary)).all()
+    return {(row.patient_id, row.day): (row.readings, row.value_sum) for row in rows}
+
+
+def test_bulk_refreshes_the_summaries_of_every_patient_at_once(client, add_patients, query_counter):
+    add_patients(50)
+    readings = [{"patient_id": f"patient{n}", "date": "2024-01-01T08:00:00", "value": 5.0} for n in range(50)]
+
+    with query_counter() as counter:
+        response = client.post("/blood_sugar/bulk", json=readings, headers=HEADERS)
+
+    assert response.json()["inserted"] == 50
+    statements = [statement for statement in counter.statements if "blood_sugar_daily_summaries" in statement]
+    assert len(statements) == 2, statements
+
+
+def test_only_the_touched_days_are_recomputed(client, db, add_patients):
+    add_patients(1)
+    reading = {"patient_id": "patient0", "date": "2024-06-01T08:00:00", "value": 5.0}
+    assert client.post("/blood_sugar", json=reading, headers=HEADERS).status_code == 200
+    # A row that a refresh of June 1st would set back to (1, 5.0)
+    db.get(BloodSugarDailySummary, ("patient0", date(2024, 6, 1))).readings = 7
+    db.commit()
+
+    readings = [
+        {"patient_id": "patient0", "date": "2024-01-01T08:00:00", "value": 5.5},
+        {"patient_id": "patient0", "date": "2024-12-31T20:00:00", "value": 6.0},
+        {"patient_id": "patient0", "date": "2024-12-31T21:00:00", "value": 4.0},
+    ]
+    assert client.post("/blood_sugar/bulk", json=readings, headers=HEADERS).json()["inserted"] == 3
+
+    assert summaries(db) == {
+        ("patient0", date(2024, 1, 1)): (1, 5.5),
+        ("patient0", date(2024, 6, 1)): (7, 5.0),
+        ("patient0", date(2024, 12, 31)): (2, 10.0),
+    }